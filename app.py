@@ -3,12 +3,16 @@ Streamlit UI for AI Product Recommendation Agent
 """
 import sys
 import os
+from itertools import islice
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 import streamlit as st
-from config.settings import STREAMLIT_PAGE_CONFIG, SAMPLE_PRODUCTS, OPENAI_API_KEY, DEFAULT_LLM_MODEL
+from config.settings import STREAMLIT_PAGE_CONFIG, SAMPLE_PRODUCTS, OPENAI_API_KEY, DEFAULT_LLM_MODEL, METRICS_ENABLED, PRODUCT_TABLE_ROWS
 from src.agents.recommendation_agent import ProductRecommendationAgent
-from src.vectors.db import VectorDatabase
+from src.agents.pipeline import RecommendationPipeline, STAGES
+from src.vectors.db import get_shared_database
+from src.data.loader import catalog_files, catalog_fingerprint, iter_catalog
+from src.monitoring.metrics import start_metrics_server
 import pandas as pd
 
 # Page configuration
@@ -38,17 +42,37 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state
+@st.cache_resource(show_spinner="Loading product index...")
+def load_vector_db():
+    """
+    One embedding model and index per process, shared by every session.
+    The model loads on a background thread, so a catalog restored from a
+    snapshot is ready before the model is.
+    Product files in DATA_DIR are streamed in; without any, the sample catalog is used.
+    """
+    paths = catalog_files()
+    if not paths:
+        return get_shared_database(SAMPLE_PRODUCTS, warm_up=True)
+    return get_shared_database(iter_catalog(paths), fingerprint=catalog_fingerprint(paths), warm_up=True)
+
+
+@st.cache_resource
+def load_metrics_server():
+    """Prometheus /metrics endpoint, started once per process"""
+    return start_metrics_server() if METRICS_ENABLED else None
+
+
+vector_db = load_vector_db()
+load_metrics_server()
+
+# Initialize session state (per browser session: agent and chat history only)
 if "agent" not in st.session_state:
     st.session_state.agent = ProductRecommendationAgent(
         api_key=OPENAI_API_KEY,
-        model=DEFAULT_LLM_MODEL
+        model=DEFAULT_LLM_MODEL,
+        filter_index=lambda: vector_db.product_filter  # Current generation, looked up per call
     )
     
-if "vector_db" not in st.session_state:
-    st.session_state.vector_db = VectorDatabase()
-    st.session_state.vector_db.add_products(SAMPLE_PRODUCTS)
-    
 if "history" not in st.session_state:
     st.session_state.history = []
 
@@ -106,7 +130,7 @@ with st.sidebar:
         
     st.divider()
     st.markdown("### 📊 Products Available")
-    st.metric("Total Products", len(SAMPLE_PRODUCTS))
+    st.metric("Total Products", vector_db.catalog.live_count)
 
 # Main content area
 col1, col2 = st.columns([2, 1])
@@ -134,36 +158,11 @@ with col2:
 # Display recommendations
 if search_button and user_query:
     with st.spinner("🔍 Searching for the perfect products..."):
-        # Extract preferences
-        preferences = st.session_state.agent.extract_preferences(user_query)
-        
-        # Search with vector DB
-        search_results = st.session_state.vector_db.search(
-            user_query,
-            top_k=max_recs * 2,
-            threshold=similarity_threshold
-        )
-        
-        # Get products and scores
-        products_with_scores = [(p, score) for p, score in search_results]
-        products = [p for p, _ in products_with_scores]
-        
-        # Filter by preferences
-        filtered_products = st.session_state.agent.filter_products(products, preferences)
-        
-        # Rank products
-        ranked_products = st.session_state.agent.rank_products(
-            filtered_products,
-            user_query,
-            products_with_scores[:len(filtered_products)] if filtered_products else [],
-            preferences
-        )[:max_recs]
-        
-        # Generate recommendation text
-        recommendation_text = st.session_state.agent.generate_recommendation_text(
-            ranked_products,
-            user_query
-        )
+        # Preferences -> vector search -> filter -> rank -> recommendation text
+        pipeline = RecommendationPipeline(st.session_state.agent, vector_db)
+        result = pipeline.run(user_query, top_k=max_recs, threshold=similarity_threshold)
+        ranked_products = result["products"]
+        recommendation_text = result["recommendation_text"]
         
         # Add to history
         st.session_state.agent.add_to_history("user", user_query)
@@ -204,6 +203,14 @@ if search_button and user_query:
                         st.success(f"Added {product['name']} to favorites!")
         else:
             st.info("❌ No products found matching your criteria. Try adjusting your filters.")
+        
+        # Where the time went
+        with st.expander("⏱️ Timing breakdown"):
+            timings = result["timings"]
+            st.dataframe(pd.DataFrame([{
+                "Stage": stage,
+                "Time (ms)": round(timings[stage] * 1000, 2)
+            } for stage in STAGES + ("total",)]), use_container_width=True, hide_index=True)
 
 # Display conversation history in tabs
 if st.session_state.history:
@@ -224,11 +231,11 @@ if st.session_state.history:
         # Display all products in a table
         products_df = pd.DataFrame([{
             "Product": p['name'],
-            "Price": f"${p['price']}",
+            "Price": f"${p['price']}" if 'price' in p else 'N/A',
             "Category": p['category'],
             "Rating": p.get('rating', 'N/A'),
             "Description": p.get('description', '')[:50] + "..."
-        } for p in SAMPLE_PRODUCTS])
+        } for p in map(vector_db.catalog.get, islice(vector_db.catalog.rows(), PRODUCT_TABLE_ROWS))])
         
         st.dataframe(products_df, use_container_width=True, hide_index=True)
 
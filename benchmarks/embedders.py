@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Embedder benchmark: encode throughput, single-query latency and retrieval
+quality for each EMBEDDING_MODEL spec.
+
+Quality is measured two ways on SAMPLE_PRODUCTS:
+  - known-item recall@k: searching a product's name finds that product
+  - agreement recall@k: overlap with the top-k of the reference (first) embedder
+
+    python benchmarks/embedders.py [--specs sentence-transformers/all-MiniLM-L6-v2 hashing hashing:1024]
+                                   [--size 20000] [--k 5] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from config.settings import SAMPLE_PRODUCTS, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE
+from src.vectors.catalog import product_text
+from src.vectors.embedders import get_embedder
+from src.vectors.faiss_index import normalize
+from src.vectors.quantization import exact_top_k, recall_at_k
+
+QUERIES = [
+    "wireless headphones", "running shoes", "gaming chair", "laptop for work", "kitchen knife set",
+    "yoga mat", "baby stroller", "dog toys", "skincare moisturizer", "car phone mount",
+    "travel backpack", "science fiction novel", "winter jacket", "smart watch", "coffee maker"
+]
+
+
+def throughput(embedder, texts, batch_size: int) -> dict:
+    start = time.perf_counter()
+    embedder.encode_batch(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return {"texts": len(texts), "seconds": elapsed, "texts_per_sec": len(texts) / elapsed if elapsed else 0.0}
+
+
+def query_latency(embedder, queries) -> float:
+    """Median seconds to encode one query"""
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        embedder.encode(query)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def benchmark(spec: str, texts, corpus_texts, names, k: int, batch_size: int) -> dict:
+    embedder = get_embedder(spec)
+    embedder.warm_up()  # Exclude model loading from the timings
+    result = {"name": embedder.name, "dimension": embedder.dimension, "load_seconds": embedder.load_seconds}
+    result["encode"] = throughput(embedder, texts, batch_size)
+    result["query_latency_seconds"] = query_latency(embedder, QUERIES)
+
+    corpus = normalize(embedder.encode_batch(corpus_texts, batch_size=batch_size))
+    name_hits = exact_top_k(corpus, normalize(embedder.encode_batch(names)), k)
+    result[f"known_item_recall@{k}"] = float(np.mean([row in hits for row, hits in enumerate(name_hits)]))
+    result["query_top_k"] = exact_top_k(corpus, normalize(embedder.encode_batch(QUERIES)), k)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--specs", nargs="+", default=[EMBEDDING_MODEL, "hashing", "hashing:1024"])
+    parser.add_argument("--size", type=int, default=20000, help="Texts encoded for the throughput test")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    corpus_texts = [product_text(p) for p in SAMPLE_PRODUCTS]
+    names = [p["name"] for p in SAMPLE_PRODUCTS]
+    texts = (corpus_texts * (args.size // len(corpus_texts) + 1))[:args.size]
+
+    results = []
+    for spec in args.specs:
+        try:
+            results.append(benchmark(spec, texts, corpus_texts, names, args.k, args.batch_size))
+        except Exception as e:
+            print(f"Warning: Skipping embedder '{spec}': {e}")
+
+    reference = results[0]["query_top_k"] if results else None
+    print(f"\n{'='*78}\n  EMBEDDERS ({args.size} texts, batch size {args.batch_size}, k={args.k})\n{'='*78}")
+    print(f"  {'embedder':<42} {'texts/s':>10} {'query ms':>9} {'known-item':>10} {'agreement':>10}")
+    for result in results:
+        result[f"agreement_recall@{args.k}"] = recall_at_k(reference, result.pop("query_top_k"))
+        print(
+            f"  {result['name']:<42} {result['encode']['texts_per_sec']:>10.0f} "
+            f"{result['query_latency_seconds'] * 1000:>9.2f} {result[f'known_item_recall@{args.k}']:>10.3f} "
+            f"{result[f'agreement_recall@{args.k}']:>10.3f}"
+        )
+    if results:
+        print(f"\n  Agreement is measured against '{results[0]['name']}'.")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Load generator for the recommendation service: closed-loop clients send
+POST /recommend for a fixed duration and the report gives throughput, latency
+percentiles and the server's mean micro-batch size.
+
+With --compare, the service is started twice in fresh processes, once with
+batching disabled (--max-batch 1) and once with the given window and batch
+size, and both are driven with the same load.
+
+    python benchmarks/load_generator.py --compare [--concurrency 32] [--duration 10]
+                                        [--window-ms 3] [--max-batch 32] [--embedding-model hashing]
+    python benchmarks/load_generator.py --url http://127.0.0.1:8080 [--concurrency 32]
+"""
+import os
+import re
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from string import ascii_lowercase
+from typing import Tuple
+from urllib.parse import urlparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic import make_queries
+from benchmarks.run_suite import percentiles
+
+
+def letters(number: int) -> str:
+    """0 -> "a", 25 -> "z", 26 -> "ba": a digit-free tag that the price parser ignores"""
+    word = ""
+    while True:
+        number, digit = divmod(number, 26)
+        word = ascii_lowercase[digit] + word
+        if not number:
+            return word
+
+
+def client(url: str, queries: list, deadline: float, latencies: list, errors: list, offset: int, unique: bool):
+    """One closed-loop client on a keep-alive connection"""
+    target = urlparse(url)
+    connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+    sent = 0
+    while time.perf_counter() < deadline:
+        query = queries[(offset + sent) % len(queries)]
+        if unique:
+            # Distinct text per request, so the query embedding cache never answers
+            query = f"{query} {letters(offset * 1000003 + sent)}"
+        body = json.dumps({"query": query, "top_k": 5, "threshold": 0.0})
+        start = time.perf_counter()
+        try:
+            connection.request("POST", "/recommend", body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+            else:
+                latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            connection.close()
+            connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        sent += 1
+    connection.close()
+
+
+def server_batch_stats(url: str) -> dict:
+    """Mean micro-batch size and batched call count from the service's /metrics"""
+    target = urlparse(url)
+    connection = http.client.HTTPConnection(target.hostname, target.port, timeout=10)
+    connection.request("GET", "/metrics")
+    text = connection.getresponse().read().decode("utf-8")
+    connection.close()
+    total = re.search(r"^microbatch_size_sum\S* (\S+)$", text, re.M)
+    count = re.search(r"^microbatch_size_count\S* (\S+)$", text, re.M)
+    if not (total and count and float(count.group(1))):
+        return {"batches": 0, "mean_batch_size": None}
+    return {"batches": int(float(count.group(1))), "mean_batch_size": float(total.group(1)) / float(count.group(1))}
+
+
+def run_load(url: str, concurrency: int, duration: float, warm_up: float, unique: bool) -> dict:
+    queries = make_queries(1000)
+    if warm_up > 0:
+        client(url, queries, time.perf_counter() + warm_up, [], [], 0, unique)
+    baseline = server_batch_stats(url)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(url, queries, deadline, latencies, errors, i + 1, unique))
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    batches = server_batch_stats(url)
+    if batches["batches"] and baseline["batches"]:
+        # Only the batches formed during the timed run
+        count = batches["batches"] - baseline["batches"]
+        total = batches["mean_batch_size"] * batches["batches"] - baseline["mean_batch_size"] * baseline["batches"]
+        batches = {"batches": count, "mean_batch_size": total / count if count else None}
+    return {
+        "concurrency": concurrency,
+        "duration_seconds": elapsed,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": percentiles(latencies),
+        **batches
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(window_ms: float, max_batch: int, db_type: str, embedding_model: str,
+                  snapshot_dir: str) -> Tuple[subprocess.Popen, str]:
+    """
+    Start the service in a fresh interpreter and wait until /health answers.
+    Its snapshots go to `snapshot_dir`, never to the app's VECTOR_DB_DIR.
+    """
+    port = free_port()
+    command = [sys.executable, "-m", "src.service.server", "--port", str(port), "--db-type", db_type,
+               "--window-ms", str(window_ms), "--max-batch", str(max_batch), "--snapshot-dir", snapshot_dir]
+    if embedding_model:
+        command += ["--embedding-model", embedding_model]
+    process = subprocess.Popen(
+        command, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(1200):
+        if process.poll() is not None:
+            raise RuntimeError(f"Service exited: {process.stderr.read().strip()}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Service did not become healthy")
+
+
+def print_result(label: str, result: dict):
+    latency = result["latency"]
+    mean_batch = f"{result['mean_batch_size']:.1f}" if result.get("mean_batch_size") else "-"
+    print(
+        f"  {label:<22} {result['requests_per_second']:>9.1f} {latency.get('p50_ms', 0):>9.2f} "
+        f"{latency.get('p95_ms', 0):>9.2f} {latency.get('p99_ms', 0):>9.2f} {mean_batch:>10} {result['errors']:>7}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Drive an already running service")
+    parser.add_argument("--compare", action="store_true", help="Start the service unbatched and batched and compare")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of timed load")
+    parser.add_argument("--warm-up", type=float, default=1.0, help="Seconds of untimed single-client load")
+    parser.add_argument("--repeat-queries", action="store_true", help="Let repeated queries hit the embedding cache")
+    parser.add_argument("--window-ms", type=float, default=3.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--db-type", default="faiss", choices=["faiss", "chroma"])
+    parser.add_argument("--embedding-model", help="Model name or hashing[:dim] (default: EMBEDDING_MODEL)")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+    if not args.url and not args.compare:
+        parser.error("pass --url or --compare")
+
+    print(f"\n{'='*86}\n  LOAD: {args.concurrency} clients, {args.duration:.0f}s, POST /recommend (latencies in ms)\n{'='*86}")
+    print(f"  {'service':<22} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'mean batch':>10} {'errors':>7}")
+    unique = not args.repeat_queries
+    report = {"concurrency": args.concurrency, "duration_seconds": args.duration, "unique_queries": unique, "runs": {}}
+    if args.url:
+        report["runs"][args.url] = run_load(args.url, args.concurrency, args.duration, args.warm_up, unique)
+        print_result(args.url, report["runs"][args.url])
+    else:
+        configurations = {
+            "unbatched": (0.0, 1),
+            f"batched {args.window_ms:g}ms/{args.max_batch}": (args.window_ms, args.max_batch)
+        }
+        with tempfile.TemporaryDirectory(prefix="load-snapshots-") as snapshot_dir:
+            for label, (window_ms, max_batch) in configurations.items():
+                process, url = start_service(window_ms, max_batch, args.db_type, args.embedding_model, snapshot_dir)
+                try:
+                    result = run_load(url, args.concurrency, args.duration, args.warm_up, unique)
+                finally:
+                    process.terminate()
+                    process.wait()
+                result.update(window_ms=window_ms, max_batch=max_batch)
+                report["runs"][label] = result
+                print_result(label, result)
+        unbatched, batched = report["runs"].values()
+        if unbatched["requests_per_second"]:
+            report["throughput_gain"] = batched["requests_per_second"] / unbatched["requests_per_second"]
+            print(f"\n  Throughput gain from batching: {report['throughput_gain']:.2f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Parallel embedding benchmark: builds the same synthetic catalog with
+add_products at 1, 2, 4 and N (= CPU count) embedding worker processes and
+reports the scaling curve. One worker is the in-process baseline; the other
+timings include starting the pool and loading the embedder in each worker.
+Stored vectors are checked against the baseline.
+
+    python benchmarks/parallel_embedding.py [--size 100000] [--workers 1 2 4 N]
+                                            [--embedding-model hashing] [--db-type faiss] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+
+from config.settings import EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE
+from benchmarks.synthetic import make_products
+from benchmarks.run_suite import environment
+from src.vectors.db import VectorDatabase
+from src.vectors.embedders import get_embedder
+
+
+def worker_counts(values: list) -> list:
+    """Parse 1 2 4 N style arguments ("N" is the CPU count), de-duplicated in order"""
+    cpus = os.cpu_count() or 1
+    counts = [cpus if str(value).upper() == "N" else int(value) for value in values]
+    return list(dict.fromkeys(max(1, count) for count in counts))
+
+
+def build(products: list, workers: int, embedder, db_type: str, batch_size: int):
+    db = VectorDatabase(db_type=db_type, embedding_model=embedder, snapshot_dir=None, hybrid=False,
+                        embedding_workers=workers)
+    start = time.perf_counter()
+    db.add_products(products, batch_size=batch_size)
+    return time.perf_counter() - start, db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000, help="Synthetic catalog size")
+    parser.add_argument("--workers", nargs="+", default=["1", "2", "4", "N"], help="Worker counts; N is the CPU count")
+    parser.add_argument("--embedding-model", default=EMBEDDING_MODEL, help="Model name or hashing[:dim]")
+    parser.add_argument("--db-type", default="faiss", choices=["faiss", "chroma"])
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    products = make_products(args.size, args.seed)
+    embedder = get_embedder(args.embedding_model)
+    # Model load in this process is not part of the in-process baseline
+    embedder.warm_up()
+
+    print(f"\n{'='*72}\n  PARALLEL EMBEDDING: {args.size} products, {embedder.name}, "
+          f"{os.cpu_count()} CPUs\n{'='*72}")
+    print(f"  {'workers':>7} {'seconds':>9} {'products/s':>11} {'speedup':>8} {'efficiency':>10} {'max |diff|':>11}")
+    runs, baseline_seconds, baseline_vectors = [], None, None
+    for workers in worker_counts(args.workers):
+        seconds, db = build(products, workers, embedder, args.db_type, args.batch_size)
+        vectors = db.vectors.take(slice(None)).astype(np.float32)
+        if baseline_seconds is None:
+            baseline_seconds, baseline_vectors = seconds, vectors
+        run = {
+            "workers": workers,
+            "seconds": seconds,
+            "products_per_second": args.size / seconds if seconds else None,
+            "speedup": baseline_seconds / seconds if seconds else None,
+            "max_abs_diff": float(np.abs(vectors - baseline_vectors).max()) if len(vectors) else 0.0
+        }
+        run["efficiency"] = run["speedup"] / workers if run["speedup"] else None
+        runs.append(run)
+        print(f"  {workers:>7} {seconds:>9.2f} {run['products_per_second']:>11.0f} {run['speedup']:>7.2f}x "
+              f"{run['efficiency']:>10.2f} {run['max_abs_diff']:>11.2g}")
+
+    if args.json:
+        settings = {key: value for key, value in vars(args).items() if key != "json"}
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment(), "settings": settings, "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
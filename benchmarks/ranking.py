@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Ranking benchmark: rank_products relevance scoring with the per-product loop
+versus the vectorized RankingEngine, on synthetic catalogs. Every product is
+ranked against each query and the top k are kept. The two orders must
+be identical.
+
+    python benchmarks/ranking.py [--sizes 10000 100000 1000000] [--top-k 10] [--json out.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agents.recommendation_agent import ProductRecommendationAgent
+from src.agents.scoring import RankingEngine
+from benchmarks.synthetic import QUERIES, make_products
+
+
+def time_call(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def benchmark_size(size: int, top_k: int, queries) -> dict:
+    products = make_products(size)
+    loop_agent = ProductRecommendationAgent()
+    engine, build_seconds = time_call(lambda: RankingEngine.from_products(products))
+    engine_agent = ProductRecommendationAgent(ranking_engine=engine)
+
+    loop_times, engine_times, identical = [], [], True
+    for query in queries:
+        preferences = loop_agent.extract_preferences(query)
+        expected, loop_seconds = time_call(lambda: loop_agent.rank_products(products, query, None, preferences)[:top_k])
+        ranked, engine_seconds = time_call(lambda: engine_agent.rank_products(products, query, None, preferences, top_k=top_k))
+        identical &= [p["id"] for p in expected] == [p["id"] for p in ranked]
+        loop_times.append(loop_seconds)
+        engine_times.append(engine_seconds)
+
+    loop_median, engine_median = statistics.median(loop_times), statistics.median(engine_times)
+    return {
+        "products": size,
+        "engine_build_seconds": build_seconds,
+        "loop_seconds": loop_median,
+        "engine_seconds": engine_median,
+        "speedup": loop_median / engine_median if engine_median else 0.0,
+        "identical": identical
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=5, help="How many benchmark queries to time per size")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    print(f"\n{'='*78}\n  RANK_PRODUCTS: loop vs RankingEngine (top {args.top_k}, median per query)\n{'='*78}")
+    print(f"  {'products':>10} {'build s':>9} {'loop ms':>11} {'engine ms':>11} {'speedup':>9} {'identical':>10}")
+    results = []
+    for size in args.sizes:
+        result = benchmark_size(size, args.top_k, QUERIES[:args.queries])
+        results.append(result)
+        print(
+            f"  {size:>10} {result['engine_build_seconds']:>9.2f} {result['loop_seconds'] * 1000:>11.1f} "
+            f"{result['engine_seconds'] * 1000:>11.1f} {result['speedup']:>8.1f}x {str(result['identical']):>10}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
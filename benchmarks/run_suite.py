@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: ingest throughput, search latency percentiles, filter and
+rank cost, and peak RSS for each backend on synthetic catalogs of growing
+size. Each (backend, size) case runs in a fresh interpreter, so peak RSS and
+caches belong to that case alone. The report is JSON, for comparing runs.
+
+    python benchmarks/run_suite.py [--backends faiss chroma] [--sizes 1000 10000 100000 1000000]
+                                   [--queries 200] [--embedding-model hashing] [--json out.json]
+                                   [--baseline previous.json] [--shards 4]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+from datetime import datetime, timezone
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def percentiles(samples: list) -> dict:
+    """p50/p95/p99/mean/max of a list of seconds, in milliseconds"""
+    import numpy as np
+    values = np.asarray(samples, dtype=np.float64) * 1000
+    if not len(values):
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "mean_ms": values.mean(), "max_ms": values.max()}
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(backend: str, size: int, query_count: int, top_k: int, embedding_model: str, seed: int,
+             shards: int = 1) -> dict:
+    """Measure one backend on one catalog size (called inside the worker process)"""
+    from src.vectors.db import VectorDatabase
+    from src.agents.recommendation_agent import ProductRecommendationAgent
+    from benchmarks.synthetic import make_products, make_queries
+
+    start = time.perf_counter()
+    products = make_products(size, seed)
+    queries = make_queries(query_count, seed)
+    generate_seconds = time.perf_counter() - start
+    rss_before_ingest = peak_rss_bytes()
+
+    db = VectorDatabase(db_type=backend, embedding_model=embedding_model, snapshot_dir=None, shards=shards)
+    start = time.perf_counter()
+    db.add_products(products)
+    ingest_seconds = time.perf_counter() - start
+
+    agent = ProductRecommendationAgent()
+    start = time.perf_counter()
+    agent.index_catalog(products)
+    index_catalog_seconds = time.perf_counter() - start
+    preferences = [agent.extract_preferences(query) for query in queries]
+
+    # One untimed query loads the model and any lazy indexes
+    db.search(queries[0], top_k=top_k, threshold=0.0)
+    search_times, filtered_search_times = [], []
+    for query, query_preferences in zip(queries, preferences):
+        # Every timed search encodes its query: repeated workload queries must not hit the cache
+        db.query_cache.clear()
+        start = time.perf_counter()
+        db.search(query, top_k=top_k, threshold=0.0)
+        search_times.append(time.perf_counter() - start)
+        db.query_cache.clear()
+        start = time.perf_counter()
+        db.search(query, top_k=top_k, threshold=0.0, preferences=query_preferences)
+        filtered_search_times.append(time.perf_counter() - start)
+
+    # Filter and rank over the whole catalog: the worst case for a candidate list
+    filter_times, rank_times = [], []
+    for query, query_preferences in zip(queries, preferences):
+        start = time.perf_counter()
+        agent.filter_products(products, query_preferences)
+        filter_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        agent.rank_products(products, query, None, query_preferences, top_k=top_k)
+        rank_times.append(time.perf_counter() - start)
+
+    return {
+        "backend": backend,
+        "backend_used": db.db_type,
+        "products": size,
+        "queries": len(queries),
+        "top_k": top_k,
+        "embedding_model": db.embedding_model_name,
+        "index_type": db.index_type if db.db_type == "faiss" else None,
+        "shards": db.shards if db.db_type == "faiss" else 1,
+        "generate_seconds": generate_seconds,
+        "ingest_seconds": ingest_seconds,
+        "ingest_products_per_second": size / ingest_seconds if ingest_seconds else None,
+        "model_load_seconds": db.model_load_seconds,
+        "index_catalog_seconds": index_catalog_seconds,
+        "search": percentiles(search_times),
+        "filtered_search": percentiles(filtered_search_times),
+        "filter_catalog": percentiles(filter_times),
+        "rank_catalog": percentiles(rank_times),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "peak_rss_before_ingest_bytes": rss_before_ingest
+    }
+
+
+def run_case_process(args, backend: str, size: int) -> dict:
+    """Run one case in a fresh interpreter and parse the JSON it prints last"""
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker",
+        "--backends", backend, "--sizes", str(size), "--queries", str(args.queries),
+        "--top-k", str(args.top_k), "--seed", str(args.seed), "--shards", str(args.shards)
+    ]
+    if args.embedding_model:
+        command += ["--embedding-model", args.embedding_model]
+    try:
+        result = subprocess.run(
+            command, cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=args.timeout,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+        )
+    except subprocess.TimeoutExpired:
+        return {"backend": backend, "products": size, "error": f"timed out after {args.timeout}s"}
+    if result.returncode != 0:
+        stderr = result.stderr.strip()
+        return {"backend": backend, "products": size, "error": stderr.splitlines()[-1] if stderr else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def environment() -> dict:
+    """What the numbers depend on, recorded next to them"""
+    import numpy as np
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def print_case(case: dict):
+    if "error" in case:
+        print(f"  {case['backend']:<14} {case['products']:>9}  error: {case['error']}")
+        return
+    backend = case["backend"] if case["backend"] == case["backend_used"] else f"{case['backend']}->{case['backend_used']}"
+    if case.get("shards", 1) > 1:
+        backend += f" x{case['shards']}"
+    print(
+        f"  {backend:<14} {case['products']:>9} {case['ingest_products_per_second']:>10.0f} "
+        f"{case['search']['p50_ms']:>8.2f} {case['search']['p95_ms']:>8.2f} {case['search']['p99_ms']:>8.2f} "
+        f"{case['filtered_search']['p50_ms']:>9.2f} {case['filter_catalog']['p50_ms']:>9.2f} "
+        f"{case['rank_catalog']['p50_ms']:>9.2f} {case['peak_rss_bytes'] / 2**20:>9.0f}"
+    )
+
+
+def compare(cases: list, baseline: dict):
+    """Print current / baseline ratios for cases present in both reports"""
+    previous = {(case["backend"], case["products"]): case for case in baseline["cases"] if "error" not in case}
+    metrics = [("ingest/s", "ingest_products_per_second", None), ("search p50", "search", "p50_ms"),
+               ("search p95", "search", "p95_ms"), ("search p99", "search", "p99_ms"),
+               ("filter p50", "filter_catalog", "p50_ms"), ("rank p50", "rank_catalog", "p50_ms"),
+               ("peak RSS", "peak_rss_bytes", None)]
+    print(f"\n{'='*104}\n  CHANGE VS BASELINE ({baseline['environment'].get('commit')}; current / baseline)\n{'='*104}")
+    print(f"  {'backend':<14} {'products':>9} " + " ".join(f"{label:>11}" for label, _, _ in metrics))
+    for case in cases:
+        before = previous.get((case["backend"], case["products"]))
+        if before is None or "error" in case:
+            continue
+        ratios = []
+        for _, key, field in metrics:
+            now, then = case[key], before[key]
+            if field:
+                now, then = now.get(field), then.get(field)
+            ratios.append(f"{now / then:>10.2f}x" if now and then else f"{'-':>11}")
+        print(f"  {case['backend']:<14} {case['products']:>9} " + " ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["faiss", "chroma"], choices=["faiss", "chroma"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200, help="Workload queries timed per case")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embedding-model", help="Model name or hashing[:dim] (default: EMBEDDING_MODEL)")
+    parser.add_argument("--shards", type=int, default=1, help="FAISS index shards (worker processes)")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds before a case is abandoned")
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Report from an earlier run to compare against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        from config.settings import EMBEDDING_MODEL
+        case = run_case(args.backends[0], args.sizes[0], args.queries, args.top_k,
+                        args.embedding_model or EMBEDDING_MODEL, args.seed, args.shards)
+        print(json.dumps(case))
+        return
+
+    print(f"\n{'='*104}\n  BENCHMARK SUITE ({args.queries} queries per case, top {args.top_k}; latencies in ms)\n{'='*104}")
+    print(
+        f"  {'backend':<14} {'products':>9} {'ingest/s':>10} {'p50':>8} {'p95':>8} {'p99':>8} "
+        f"{'filt p50':>9} {'filter':>9} {'rank':>9} {'RSS MiB':>9}"
+    )
+    cases = []
+    for backend in args.backends:
+        for size in args.sizes:
+            case = run_case_process(args, backend, size)
+            cases.append(case)
+            print_case(case)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(cases, json.load(f))
+    if args.json:
+        settings = {key: value for key, value in vars(args).items() if key not in ("worker", "json", "baseline")}
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment(), "settings": settings, "cases": cases}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import time of the vector module and its backends, time
+until the catalog is searchable, and first/second query latency.
+Every measurement runs in a fresh interpreter so module caches do not leak
+between runs.
+
+    python benchmarks/startup.py [--db-type faiss] [--runs 3] [--json out.json]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+STARTUP_PROBE = """
+import json, time
+start = time.perf_counter()
+from config.settings import SAMPLE_PRODUCTS
+from src.vectors.db import VectorDatabase
+imported = time.perf_counter()
+db = VectorDatabase(db_type={db_type!r}, snapshot_dir={snapshot_dir!r}, warm_up={warm_up!r})
+db.add_products(SAMPLE_PRODUCTS)
+ready = time.perf_counter()
+query_start = time.perf_counter()
+db.search("wireless headphones under 200", top_k=5)
+first_query = time.perf_counter() - query_start
+query_start = time.perf_counter()
+db.search("ergonomic office chair", top_k=5)
+second_query = time.perf_counter() - query_start
+print(json.dumps({{
+    "import_seconds": imported - start,
+    "ready_seconds": ready - start,
+    "source": db.ingest_stats["source"],
+    "model_load_seconds": db.model_load_seconds,
+    "first_query_seconds": first_query,
+    "second_query_seconds": second_query,
+    "time_to_first_result_seconds": ready - start + first_query
+}}))
+"""
+
+
+def run_probe(code: str) -> dict:
+    """Run a snippet in a fresh interpreter and parse the JSON it prints last"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_of(runs: list, key: str):
+    values = [run[key] for run in runs if run.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+def measure_imports(runs: int) -> dict:
+    """Median cold import time per module"""
+    report = {}
+    for module in ("src.vectors.db", "faiss", "chromadb", "sentence_transformers"):
+        samples = [run_probe(IMPORT_PROBE.format(module=module)) for _ in range(runs)]
+        errors = [s["error"] for s in samples if "error" in s]
+        report[module] = {"error": errors[0]} if errors else {"seconds": median_of(samples, "seconds")}
+    return report
+
+
+def measure_startup(db_type: str, snapshot_dir, warm_up: bool, runs: int) -> dict:
+    """Median timings of fresh-process startup scenarios"""
+    samples = [
+        run_probe(STARTUP_PROBE.format(db_type=db_type, snapshot_dir=snapshot_dir, warm_up=warm_up))
+        for _ in range(runs)
+    ]
+    errors = [s["error"] for s in samples if "error" in s]
+    if errors:
+        return {"error": errors[0]}
+    report = {key: median_of(samples, key) for key in samples[0] if key != "source"}
+    report["source"] = samples[-1]["source"]
+    return report
+
+
+def print_report(report: dict):
+    print(f"\n{'='*60}\n  IMPORT TIME (fresh interpreter, median)\n{'='*60}")
+    for module, stats in report["imports"].items():
+        value = f"{stats['seconds'] * 1000:9.1f} ms" if "seconds" in stats else f"unavailable ({stats['error']})"
+        print(f"  {module:<24} {value}")
+
+    print(f"\n{'='*60}\n  STARTUP ({report['db_type']}, median of {report['runs']} runs)\n{'='*60}")
+    for name, stats in report["startup"].items():
+        print(f"\n  {name}")
+        if "error" in stats:
+            print(f"    error: {stats['error']}")
+            continue
+        for key, value in stats.items():
+            if isinstance(value, float):
+                print(f"    {key:<30} {value * 1000:9.1f} ms")
+            elif value is not None:
+                print(f"    {key:<30} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-type", default="faiss", choices=["faiss", "chroma"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--snapshot-dir", default=os.path.join(PROJECT_ROOT, "vector_db", "benchmark-startup"))
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    # Write the snapshot that the "snapshot" scenarios reload
+    measure_startup(args.db_type, args.snapshot_dir, False, 1)
+    startup = {
+        "no snapshot, lazy model": measure_startup(args.db_type, None, False, args.runs),
+        "snapshot, lazy model": measure_startup(args.db_type, args.snapshot_dir, False, args.runs),
+        "snapshot, background warm-up": measure_startup(args.db_type, args.snapshot_dir, True, args.runs),
+    }
+    report = {
+        "db_type": args.db_type,
+        "runs": args.runs,
+        "imports": measure_imports(args.runs),
+        "startup": startup
+    }
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
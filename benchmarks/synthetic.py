@@ -0,0 +1,71 @@
+"""
+Synthetic product catalogs for benchmarks, derived from SAMPLE_PRODUCTS.
+Products keep the sample categories, descriptions and tag vocabulary, with
+numbered names, jittered prices/ratings and reshuffled tags, so catalogs of
+any size have realistic text and filter selectivity. Query workloads mix
+product nouns with feature words and price constraints in the forms the
+preference extractor understands. Output is deterministic for a given seed.
+"""
+import os
+import sys
+import random
+from typing import Dict, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import SAMPLE_PRODUCTS
+
+QUERIES = [
+    "wireless headphones under 200", "gaming chair", "running shoes under 150", "ergonomic office desk",
+    "portable bluetooth speaker", "smart home lamp", "kitchen knife set", "yoga mat", "baby stroller",
+    "waterproof hiking boots", "mechanical keyboard rgb", "laptop for work between 800 and 1500"
+]
+
+FEATURE_WORDS = ["wireless", "ergonomic", "gaming", "portable", "lightweight", "smart", "waterproof",
+                 "rgb", "professional", "budget", "premium", "noise cancelling"]
+
+
+def iter_products(count: int, seed: int = 0) -> Iterator[Dict]:
+    """Yield `count` synthetic products with ids 1..count"""
+    rng = random.Random(seed)
+    tags = sorted({tag for product in SAMPLE_PRODUCTS for tag in product.get("tags", [])})
+    for product_id in range(1, count + 1):
+        template = SAMPLE_PRODUCTS[rng.randrange(len(SAMPLE_PRODUCTS))]
+        product_tags = list(template.get("tags", []))
+        if product_tags and rng.random() < 0.5:
+            product_tags[rng.randrange(len(product_tags))] = rng.choice(tags)
+        yield {
+            "id": product_id,
+            "name": f"{template['name']} {product_id}",
+            "category": template["category"],
+            "price": round(template["price"] * rng.uniform(0.5, 1.5), 2),
+            "description": template["description"],
+            "tags": product_tags,
+            "rating": round(min(5.0, max(1.0, template.get("rating", 4.0) + rng.uniform(-0.5, 0.3))), 1),
+            "image_url": template.get("image_url", "")
+        }
+
+
+def make_products(count: int, seed: int = 0) -> List[Dict]:
+    return list(iter_products(count, seed))
+
+
+def iter_queries(count: int, seed: int = 0) -> Iterator[str]:
+    """Yield `count` queries: a product's leading tag, optionally with a feature word and a price constraint"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        template = SAMPLE_PRODUCTS[rng.randrange(len(SAMPLE_PRODUCTS))]
+        words = [(template.get("tags") or template["name"].split())[0].lower()]
+        if rng.random() < 0.5:
+            words.insert(0, rng.choice(FEATURE_WORDS))
+        shape = rng.random()
+        if shape < 0.3:
+            words.append(f"under {int(round(template['price'] * rng.uniform(0.8, 1.5), -1)) or 10}")
+        elif shape < 0.45:
+            low = int(template["price"] * rng.uniform(0.4, 0.9))
+            words.append(f"between {low} and {int(template['price'] * rng.uniform(1.1, 1.8)) + 1}")
+        yield " ".join(words)
+
+
+def make_queries(count: int, seed: int = 0) -> List[str]:
+    return list(iter_queries(count, seed))
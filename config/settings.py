@@ -26,14 +26,74 @@ BACKUP_LLM_MODEL = "gpt-3.5-turbo"
 
 # Vector DB Configuration
 VECTOR_DB_TYPE = "chroma"  # Options: "chroma", "faiss", "pinecone"
+# Embedder: a sentence-transformers model name, or "hashing" / "hashing:<dim>" for the
+# weight-free character n-gram hashing embedder (fast, deterministic, lexical only)
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
-EMBEDDING_DIM = 384
+EMBEDDING_DIM = 384  # Also the default dimension of the hashing embedder
+EMBEDDING_BATCH_SIZE = 64  # Product texts encoded per model call during ingest
+EMBEDDING_WORKERS = 1  # Processes encoding product texts during catalog builds (1 = in-process)
+VECTOR_DB_SNAPSHOTS = True  # Save/reload embeddings and index under VECTOR_DB_DIR
+QUERY_CACHE_SIZE = 1024  # Cached query embeddings (0 disables)
+QUERY_CACHE_TTL = None  # Seconds before a cached query embedding expires (None = never)
+SEARCH_MANY_CHUNK_SIZE = 1024  # Queries encoded and searched together by search_many
+INGEST_CHUNK_SIZE = 1024  # Products per chunk when streaming a catalog from DATA_DIR
+INGEST_QUEUE_DEPTH = 4  # Chunks each streaming-ingest stage may run ahead of the next
+
+# FAISS index engine: "flat" (exact inner product), "hnsw", "ivf", "ivfpq"
+FAISS_INDEX_TYPE = "flat"
+FAISS_INDEX_PARAMS = {
+    "hnsw_m": 32,            # HNSW graph degree
+    "ef_construction": 40,   # HNSW build-time candidate list size
+    "ef_search": 64,         # HNSW query-time candidate list size
+    "nlist": 1024,           # IVF coarse clusters (capped by training set size)
+    "nprobe": 16,            # IVF clusters visited per query
+    "pq_m": 16,              # IVF-PQ sub-quantizers
+    "pq_nbits": 8,           # IVF-PQ bits per code
+    "train_size": 50000      # Vectors buffered to train IVF engines
+}
+# Filtered searches on approximate engines scan matching rows exactly below this count
+FILTER_BRUTE_FORCE_LIMIT = 20000
+# FAISS index shards, each searched by its own worker process (1 = one in-process index)
+FAISS_SHARDS = 1
+
+# Hybrid retrieval: fuse BM25 lexical matches with vector results (reciprocal rank fusion).
+# Off by default: the BM25 index is a second full pass over the catalog at ingest and
+# an inverted index held next to the vectors, and every query scores the lexical-only
+# hits against stored vectors. Turn it on for catalogs searched by exact terms the
+# embedding model handles poorly (brand names, model numbers, SKUs).
+HYBRID_SEARCH = False
+HYBRID_CANDIDATES = 20  # Candidates taken from each retriever before fusion (at least top_k)
+RRF_K = 60  # Reciprocal rank fusion constant: score = sum of 1 / (RRF_K + rank)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Embedding storage: "float32", "float16" or "int8" (per-dimension scalar quantization)
+EMBEDDING_STORAGE = "float32"
+QUANTIZATION_RECALL_K = 10  # k for the recall@k report produced when storage is compressed
 
 # Agent Configuration
 MAX_RECOMMENDATIONS = 10
+PREFERENCE_CACHE_SIZE = 4096  # Cached query -> extracted preferences (0 disables)
 SIMILARITY_THRESHOLD = 0.3
 SEARCH_TOP_K = 20
 
+# Metrics: Prometheus text format served at http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = True
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+METRICS_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Async API: blocking calls (encode, search, ingest) run on a shared bounded thread pool
+ASYNC_WORKERS = 4  # Threads running offloaded calls
+ASYNC_MAX_IN_FLIGHT = 64  # Offloaded calls admitted at once per event loop; the rest wait
+
+# Recommendation HTTP service (python -m src.service.server)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8080
+SERVICE_MAX_TOP_K = 100  # Largest top_k a /recommend request may ask for
+BATCH_WINDOW_MS = 3  # How long the first query of a micro-batch waits for others to join
+BATCH_MAX_SIZE = 32  # Queries encoded together in one model call (1 disables batching)
+
 # Streamlit Configuration
 STREAMLIT_PAGE_CONFIG = {
     "page_title": "AI Product Recommender",
@@ -41,6 +101,7 @@ STREAMLIT_PAGE_CONFIG = {
     "layout": "wide",
     "initial_sidebar_state": "expanded"
 }
+PRODUCT_TABLE_ROWS = 500  # Products listed in the "Available Products" tab
 
 # Sample product data (200+ products across 15+ real-world categories)
 SAMPLE_PRODUCTS = [
@@ -0,0 +1,130 @@
+"""
+Recommendation query path shared by every front end: preference
+extraction, query encoding, vector search, filtering, ranking and the
+recommendation text, with a per-stage timing breakdown.
+"""
+import io
+import time
+import cProfile
+import pstats
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src.monitoring.metrics import REGISTRY
+
+# Stage names, in execution order
+STAGES = ("preferences", "encode", "search", "filter", "rank", "text")
+
+STAGE_SECONDS = REGISTRY.histogram("recommendation_stage_seconds", "RecommendationPipeline stage latency", ["stage"])
+
+
+class RecommendationPipeline:
+    """
+    Runs a query through a ProductRecommendationAgent and a VectorDatabase.
+    `encoder` replaces vector_db.encode_query for the encode stage (e.g. a
+    MicroBatcher shared by concurrent requests). Hooks are called as hook(stage, seconds) after every stage; with
+    `profile`, the run is captured with cProfile and the top functions are
+    returned as text.
+    """
+
+    def __init__(self, agent, vector_db, hooks: List[Callable[[str, float], None]] = None,
+                 profile: bool = False, profile_limit: int = 25, encoder: Callable[[str], np.ndarray] = None):
+        self.agent = agent
+        self.vector_db = vector_db
+        self.encoder = encoder or vector_db.encode_query
+        self.hooks = list(hooks or [])
+        self.profile = profile
+        self.profile_limit = profile_limit
+
+    def add_hook(self, hook: Callable[[str, float], None]):
+        self.hooks.append(hook)
+
+    @contextmanager
+    def _stage(self, name: str, timings: Dict[str, float]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = time.perf_counter() - start
+            STAGE_SECONDS.observe(timings[name], stage=name)
+            for hook in self.hooks:
+                hook(name, timings[name])
+
+    def run(self, query: str, top_k: int = 5, threshold: float = 0.3, profile: bool = None) -> Dict:
+        """
+        Recommend products for a query.
+        Returns a dict with the preferences, the (product, score) search
+        results, the ranked products, the recommendation text, `timings`
+        (seconds per stage plus "total") and `profile` (text or None).
+        """
+        profile = self.profile if profile is None else profile
+        profiler = cProfile.Profile() if profile else None
+        timings = {}
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            with self._stage("preferences", timings):
+                preferences = self.agent.extract_preferences(query)
+            with self._stage("encode", timings):
+                query_embedding = self.encoder(query)
+            with self._stage("search", timings):
+                # Preference filters are applied inside the search
+                search_results = self.vector_db.search(
+                    query,
+                    top_k=top_k,
+                    threshold=threshold,
+                    preferences=preferences,
+                    query_embedding=query_embedding
+                )
+            with self._stage("filter", timings):
+                products = [p for p, _ in search_results]
+                filtered_products = self.agent.filter_products(products, preferences)
+            with self._stage("rank", timings):
+                kept = {p['id'] for p in filtered_products}
+                scores = [(p, score) for p, score in search_results if p['id'] in kept]
+                if getattr(self.vector_db, "hybrid", False):
+                    # Rank on the fused relevance so keyword matches keep their place
+                    scores = [(p, p.get("relevance", score)) for p, score in scores]
+                ranked_products = self.agent.rank_products(
+                    filtered_products,
+                    query,
+                    scores,
+                    preferences,
+                    top_k=top_k
+                )
+            with self._stage("text", timings):
+                recommendation_text = self.agent.generate_recommendation_text(ranked_products, query)
+        finally:
+            if profiler:
+                profiler.disable()
+        timings["total"] = time.perf_counter() - start
+        STAGE_SECONDS.observe(timings["total"], stage="total")
+
+        return {
+            "query": query,
+            "preferences": preferences,
+            "search_results": search_results,
+            "products": ranked_products,
+            "recommendation_text": recommendation_text,
+            "timings": timings,
+            "profile": self._profile_text(profiler) if profiler else None
+        }
+
+    async def arecommend(self, query: str, top_k: int = 5, threshold: float = 0.3,
+                         timeout: float = None, executor=None) -> Dict:
+        """
+        run() on a bounded executor (the vector database's by default), so an
+        event loop keeps serving other requests; raises asyncio.TimeoutError
+        after `timeout` seconds.
+        """
+        executor = executor or self.vector_db.executor
+        return await executor.run(self.run, query, top_k, threshold, timeout=timeout)
+
+    def _profile_text(self, profiler: cProfile.Profile) -> str:
+        """Top functions by cumulative time"""
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(self.profile_limit)
+        return output.getvalue()
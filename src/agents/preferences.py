@@ -0,0 +1,203 @@
+"""
+Precompiled preference extraction for ProductRecommendationAgent.
+Price patterns are compiled once at import, the feature and category
+keyword tables are matched in a single pass over the query by an
+Aho-Corasick automaton (cost linear in query length, however large the
+tables grow), and results are kept in a bounded query -> preferences cache.
+"""
+import re
+from collections import deque
+from typing import Dict, List, Tuple
+
+from config.settings import PREFERENCE_CACHE_SIZE
+from src.vectors.cache import LRUCache
+from src.monitoring.metrics import REGISTRY
+
+UNDER_PATTERN = re.compile(r'under\s+\$?(\d+(?:\.\d{2})?)')
+BETWEEN_PATTERN = re.compile(r'between\s+\$?(\d+(?:\.\d{2})?)\s+and\s+\$?(\d+(?:\.\d{2})?)')
+RANGE_PATTERN = re.compile(r'\$(\d+(?:\.\d{2})?)\s*(?:to|-|and)\s*\$(\d+(?:\.\d{2})?)')
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d{2})?')
+
+FEATURE_KEYWORDS = {
+    "wireless": "wireless",
+    "wired": "wired",
+    "ergonomic": "ergonomic",
+    "gaming": "gaming",
+    "mechanical": "mechanical",
+    "portable": "portable",
+    "lightweight": "lightweight",
+    "noise-cancelling": "noise-cancelling",
+    "noise cancelling": "noise-cancelling",
+    "smart": "smart",
+    "waterproof": "waterproof",
+    "rgb": "rgb",
+    "professional": "professional",
+    "budget": "budget",
+    "premium": "premium"
+}
+
+CATEGORY_KEYWORDS = {
+    "electronics": "Electronics",
+    "furniture": "Furniture",
+    "home": "Home",
+    "shoes": "Shoes",
+    "chair": "Furniture",
+    "desk": "Furniture",
+    "monitor": "Electronics",
+    "keyboard": "Electronics",
+    "mouse": "Electronics",
+    "headphones": "Electronics",
+    "laptop": "Electronics",
+    "tablet": "Electronics",
+    "lamp": "Home",
+    "light": "Home",
+    "speaker": "Electronics"
+}
+
+# Words never used as ranking keywords
+STOP_WORDS = frozenset(['under', 'over', 'with', 'that', 'this', 'from', 'between', 'and', 'the'])
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton: finds which of many patterns occur anywhere in
+    a text (the same test as `pattern in text`) in one pass over the text.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.fail = [0]
+        self.outputs: List[List[int]] = [[]]  # Pattern ids ending at each state, including via fail links
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][char] = next_state
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                state = next_state
+            self.outputs[state].append(pattern_id)
+
+        # Breadth-first: a state's fail link points to its longest proper suffix in the trie
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(char, 0)
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+        # The empty pattern occurs in every text
+        self._always = [pattern_id for pattern_id, pattern in enumerate(self.patterns) if not pattern]
+
+    def matches(self, text: str) -> List[int]:
+        """Ids of the patterns occurring in `text`, in ascending id order"""
+        found = set(self._always)
+        state = 0
+        transitions, fail, outputs = self.transitions, self.fail, self.outputs
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return sorted(found)
+
+
+class PreferenceExtractor:
+    """Extracts budget, category, feature, rating and keyword preferences from queries"""
+
+    def __init__(self, feature_keywords: Dict[str, str] = None, category_keywords: Dict[str, str] = None,
+                 cache_size: int = PREFERENCE_CACHE_SIZE):
+        self.feature_keywords = dict(FEATURE_KEYWORDS if feature_keywords is None else feature_keywords)
+        self.category_keywords = dict(CATEGORY_KEYWORDS if category_keywords is None else category_keywords)
+        self.cache = LRUCache(cache_size)
+        REGISTRY.track_cache("preferences", self.cache)
+        self._build()
+
+    def _build(self):
+        """Compile both keyword tables into one automaton, remembering table order"""
+        self._entries: List[Tuple[str, str]] = (
+            [("features", value) for value in self.feature_keywords.values()]
+            + [("categories", value) for value in self.category_keywords.values()]
+        )
+        self.automaton = KeywordAutomaton(list(self.feature_keywords) + list(self.category_keywords))
+
+    def add_keywords(self, feature_keywords: Dict[str, str] = None, category_keywords: Dict[str, str] = None):
+        """Extend the keyword tables (e.g. with brand or category names) and recompile"""
+        self.feature_keywords.update(feature_keywords or {})
+        self.category_keywords.update(category_keywords or {})
+        self._build()
+        self.cache.clear()
+
+    def extract(self, user_query: str) -> Dict:
+        """Preferences for a query; repeated queries are served from the cache"""
+        cached = self.cache.get(user_query)
+        if cached is None:
+            cached = self._extract(user_query)
+            self.cache.put(user_query, cached)
+        # Callers may modify the lists, so never hand out the cached ones
+        return {key: list(value) if isinstance(value, list) else value for key, value in cached.items()}
+
+    def _extract(self, user_query: str) -> Dict:
+        preferences = {
+            "budget_min": None,
+            "budget_max": None,
+            "categories": [],
+            "features": [],
+            "rating_min": 0,
+            "keywords": []
+        }
+        query_lower = user_query.lower()
+
+        under_match = UNDER_PATTERN.search(query_lower)
+        if under_match:
+            preferences["budget_max"] = float(under_match.group(1))
+
+        between_match = BETWEEN_PATTERN.search(query_lower)
+        if between_match:
+            min_price = float(between_match.group(1))
+            max_price = float(between_match.group(2))
+            preferences["budget_min"] = min(min_price, max_price)
+            preferences["budget_max"] = max(min_price, max_price)
+
+        range_match = RANGE_PATTERN.search(query_lower)
+        if range_match and not between_match:
+            min_price = float(range_match.group(1))
+            max_price = float(range_match.group(2))
+            preferences["budget_min"] = min(min_price, max_price)
+            preferences["budget_max"] = max(min_price, max_price)
+
+        if not preferences["budget_max"]:
+            numbers = NUMBER_PATTERN.findall(user_query)
+            if numbers:
+                nums = [float(n) for n in numbers]
+                # A single number > 20 after "under"/"below"/"less" is a price limit
+                if len(nums) == 1 and nums[0] > 20:
+                    if 'under' in query_lower or 'below' in query_lower or 'less' in query_lower:
+                        preferences["budget_max"] = nums[0]
+                # Several numbers are a range
+                elif len(nums) >= 2:
+                    preferences["budget_min"] = min(nums)
+                    preferences["budget_max"] = max(nums)
+
+        # Matches come back in table order: features may repeat, categories may not
+        for entry in self.automaton.matches(query_lower):
+            kind, value = self._entries[entry]
+            if kind == "features" or value not in preferences["categories"]:
+                preferences[kind].append(value)
+
+        preferences["keywords"] = [w for w in query_lower.split() if len(w) > 3 and w not in STOP_WORDS]
+        return preferences
+
+
+# Shared by agents that use the default keyword tables
+default_extractor = PreferenceExtractor()
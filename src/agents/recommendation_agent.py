@@ -4,17 +4,33 @@ Uses OpenAI GPT for intelligent product recommendations
 """
 import os
 import json
+import heapq
 from typing import List, Dict, Tuple
 from datetime import datetime
 
+from src.agents.preferences import default_extractor
+from src.monitoring.metrics import REGISTRY, timed
+
+FILTER_SECONDS = REGISTRY.histogram("agent_filter_seconds", "ProductRecommendationAgent.filter_products latency")
+RANK_SECONDS = REGISTRY.histogram("agent_rank_seconds", "ProductRecommendationAgent.rank_products latency")
+
 class ProductRecommendationAgent:
     """Intelligent product recommendation agent using LLM"""
     
-    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini"):
+    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini", filter_index=None,
+                 ranking_engine=None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model
         self.conversation_history = []
         self.user_preferences = {}
+        # Prebuilt ProductFilter over the catalog, or a callable returning the current one
+        # (e.g. `lambda: db.product_filter`) for a catalog that changes; filter_products
+        # scans lists without it
+        self.filter_index = filter_index
+        # RankingEngine over the catalog; rank_products scores product by product without it
+        self.ranking_engine = ranking_engine
+        # Compiled keyword tables and query cache, shared unless replaced
+        self.preference_extractor = default_extractor
         
         if self.api_key:
             try:
@@ -29,108 +45,28 @@ class ProductRecommendationAgent:
             
     def extract_preferences(self, user_query: str) -> Dict:
         """Extract user preferences from natural language query with improved accuracy"""
-        preferences = {
-            "budget_min": None,
-            "budget_max": None,
-            "categories": [],
-            "features": [],
-            "rating_min": 0,
-            "keywords": []
-        }
-        
-        query_lower = user_query.lower()
-        
-        # Extract numeric prices with improved pattern
-        import re
-        
-        # Check for "under X" pattern
-        under_match = re.search(r'under\s+\$?(\d+(?:\.\d{2})?)', query_lower)
-        if under_match:
-            preferences["budget_max"] = float(under_match.group(1))
-        
-        # Check for "between X and Y" pattern
-        between_match = re.search(r'between\s+\$?(\d+(?:\.\d{2})?)\s+and\s+\$?(\d+(?:\.\d{2})?)', query_lower)
-        if between_match:
-            min_price = float(between_match.group(1))
-            max_price = float(between_match.group(2))
-            preferences["budget_min"] = min(min_price, max_price)
-            preferences["budget_max"] = max(min_price, max_price)
-        
-        # Check for "X - Y" or "X to Y" pattern
-        range_match = re.search(r'\$(\d+(?:\.\d{2})?)\s*(?:to|-|and)\s*\$(\d+(?:\.\d{2})?)', query_lower)
-        if range_match and not between_match:
-            min_price = float(range_match.group(1))
-            max_price = float(range_match.group(2))
-            preferences["budget_min"] = min(min_price, max_price)
-            preferences["budget_max"] = max(min_price, max_price)
-        
-        # Extract all numbers as potential prices
-        if not preferences["budget_max"]:
-            numbers = re.findall(r'\d+(?:\.\d{2})?', user_query)
-            if numbers:
-                nums = [float(n) for n in numbers]
-                # If single number > 20, assume it's a price limit
-                if len(nums) == 1 and nums[0] > 20:
-                    # Check if it follows "under" or similar
-                    if 'under' in query_lower or 'below' in query_lower or 'less' in query_lower:
-                        preferences["budget_max"] = nums[0]
-                # If multiple numbers, use as range
-                elif len(nums) >= 2:
-                    preferences["budget_min"] = min(nums)
-                    preferences["budget_max"] = max(nums)
-                
-        # Extract features - expanded list
-        feature_keywords = {
-            "wireless": "wireless",
-            "wired": "wired",
-            "ergonomic": "ergonomic",
-            "gaming": "gaming",
-            "mechanical": "mechanical",
-            "portable": "portable",
-            "lightweight": "lightweight",
-            "noise-cancelling": "noise-cancelling",
-            "noise cancelling": "noise-cancelling",
-            "smart": "smart",
-            "waterproof": "waterproof",
-            "rgb": "rgb",
-            "professional": "professional",
-            "budget": "budget",
-            "premium": "premium"
-        }
-        for keyword, feature in feature_keywords.items():
-            if keyword in query_lower:
-                preferences["features"].append(feature)
-        
-        # Extract categories
-        category_keywords = {
-            "electronics": "Electronics",
-            "furniture": "Furniture",
-            "home": "Home",
-            "shoes": "Shoes",
-            "chair": "Furniture",
-            "desk": "Furniture",
-            "monitor": "Electronics",
-            "keyboard": "Electronics",
-            "mouse": "Electronics",
-            "headphones": "Electronics",
-            "laptop": "Electronics",
-            "tablet": "Electronics",
-            "lamp": "Home",
-            "light": "Home",
-            "speaker": "Electronics"
-        }
-        for keyword, category in category_keywords.items():
-            if keyword in query_lower and category not in preferences["categories"]:
-                preferences["categories"].append(category)
-        
-        # Extract main keywords for ranking
-        words = query_lower.split()
-        preferences["keywords"] = [w for w in words if len(w) > 3 and w not in ['under', 'over', 'with', 'that', 'this', 'from', 'between', 'and', 'the']]
-                
-        return preferences
-        
+        return self.preference_extractor.extract(user_query)
+        
+    def index_catalog(self, products: List[Dict]):
+        """Build the filter index and ranking engine over a product catalog (rebuild after it changes)"""
+        from src.vectors.catalog import CatalogStore
+        from src.vectors.filters import ProductFilter
+        from src.agents.scoring import RankingEngine
+        catalog = CatalogStore.from_products(products)
+        self.filter_index = ProductFilter(catalog)
+        self.ranking_engine = RankingEngine(catalog)
+        
+    @timed(FILTER_SECONDS)
     def filter_products(self, products: List[Dict], preferences: Dict) -> List[Dict]:
         """Filter products based on user preferences with strict criteria"""
+        filter_index = self.filter_index() if callable(self.filter_index) else self.filter_index
+        if filter_index is not None:
+            rows = filter_index.rows_of(products)
+            if rows is not None:
+                keep = filter_index.select(rows, preferences)
+                filtered = [p for p, selected in zip(products, keep.tolist()) if selected]
+                return filtered if filtered else products
+                
         filtered = products
         
         # STRICT: Filter by price if specified
@@ -163,19 +99,29 @@ class ProductRecommendationAgent:
             
         return filtered if filtered else products  # Return original if filters eliminate everything
         
-    def rank_products(self, products: List[Dict], query: str, similarity_scores: List[Tuple[Dict, float]] = None, preferences: Dict = None) -> List[Dict]:
-        """Rank products based on relevance with improved scoring"""
+    @timed(RANK_SECONDS)
+    def rank_products(self, products: List[Dict], query: str, similarity_scores: List[Tuple[Dict, float]] = None, preferences: Dict = None,
+                      top_k: int = None) -> List[Dict]:
+        """
+        Rank products based on relevance with improved scoring.
+        With `top_k`, only the best top_k products are selected and returned.
+        """
         if not products:
             return []
             
         # If we have similarity scores from vector DB, use them as primary signal
         if similarity_scores:
-            product_dict = {p['id']: p for p in products}
-            ranked = []
-            for p, score in sorted(similarity_scores, key=lambda x: x[1], reverse=True):
-                ranked.append(p)
-            return ranked
-            
+            key = lambda x: x[1]
+            if top_k is not None:
+                # Same order as the stable sort below, without sorting everything
+                return [p for p, _ in heapq.nlargest(top_k, similarity_scores, key=key)]
+            return [p for p, score in sorted(similarity_scores, key=key, reverse=True)]
+            
+        if self.ranking_engine is not None:
+            ranked = self.ranking_engine.rank(products, query, preferences, top_k)
+            if ranked is not None:
+                return ranked
+                
         # Advanced ranking based on relevance
         scored_products = []
         query_lower = query.lower()
@@ -230,7 +176,8 @@ class ProductRecommendationAgent:
             
             scored_products.append((product, score))
             
-        return [p for p, _ in sorted(scored_products, key=lambda x: x[1], reverse=True)]
+        ranked = [p for p, _ in sorted(scored_products, key=lambda x: x[1], reverse=True)]
+        return ranked[:top_k] if top_k is not None else ranked
         
     def generate_recommendation_text(self, products: List[Dict], user_query: str) -> str:
         """Generate simple, direct recommendation summary without AI"""
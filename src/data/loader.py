@@ -0,0 +1,278 @@
+"""
+Streaming catalog loader. Product files under DATA_DIR (JSON Lines, CSV or
+Parquet) are read lazily and yielded as validated, normalized product dicts,
+so a feed of any size can be handed to VectorDatabase.add_product_stream
+without the whole catalog ever existing as a list of dicts.
+
+    python -m src.data.loader [--data-dir data]   # validate the feed and print counts
+"""
+import csv
+import json
+import hashlib
+import math
+import queue
+import argparse
+import threading
+from pathlib import Path
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config.settings import DATA_DIR, INGEST_QUEUE_DEPTH
+
+CSV_SUFFIXES = (".csv",)
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+PARQUET_SUFFIXES = (".parquet",)
+CATALOG_SUFFIXES = CSV_SUFFIXES + JSONL_SUFFIXES + PARQUET_SUFFIXES
+PARQUET_BATCH_ROWS = 8192
+MAX_WARNINGS_PER_FILE = 5
+
+
+def _parse_id(value) -> int:
+    """
+    Integer id from an int, an integer string or an integral float ("12.0").
+    Integers are parsed exactly; only values with a decimal point or
+    exponent go through float, so ids above 2**53 keep every digit. Ids
+    must fit the catalog's int64 column.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"id {value!r} is not an integer")
+    if isinstance(value, int):
+        product_id = value
+    else:
+        try:
+            product_id = int(str(value).strip())
+        except ValueError:
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"id {value!r} is not a number")
+            if not number.is_integer():
+                raise ValueError(f"id {value!r} is not an integer")
+            product_id = int(number)
+    if not -2**63 <= product_id < 2**63:
+        raise ValueError(f"id {value!r} does not fit in 64 bits")
+    return product_id
+
+
+def normalize_product(record: Dict) -> Dict:
+    """
+    Validate a raw record and return it in the catalog's product shape.
+    Raises ValueError naming the first problem found.
+
+    `id` (integer) and `name` are required. Price and rating are optional
+    numbers (price >= 0, rating 0-5); tags may be a list or a "|" / ","
+    separated string and are lowercased and de-duplicated. Other non-empty
+    fields are kept as extras.
+    """
+    product = {}
+    product["id"] = _parse_id(record.get("id"))
+
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is missing")
+    product["name"] = name
+    product["category"] = str(record.get("category") or "").strip()
+
+    for field, upper in (("price", None), ("rating", 5.0)):
+        value = record.get(field)
+        if value is None or value == "":
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} {value!r} is not a number")
+        if not math.isfinite(value) or value < 0 or (upper is not None and value > upper):
+            raise ValueError(f"{field} {value!r} is out of range")
+        product[field] = value
+
+    product["description"] = str(record.get("description") or "").strip()
+    tags = record.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.replace("|", ",").split(",")
+    product["tags"] = list(dict.fromkeys(tag for tag in (str(t).strip().lower() for t in tags) if tag))
+    product["image_url"] = str(record.get("image_url") or "").strip()
+
+    for key, value in record.items():
+        if key not in product and key not in ("price", "rating") and value not in (None, ""):
+            product[key] = value
+    return product
+
+
+def _read_jsonl(path: Path) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    # Reported by iter_catalog; the lines after it still load
+                    yield ValueError(f"invalid JSON ({e.msg})")
+
+
+def _read_csv(path: Path) -> Iterator[Dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def _read_parquet(path: Path) -> Iterator[Dict]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        print(f"Warning: pyarrow is not installed, skipping {path.name}")
+        return
+    # Row groups are decoded one batch at a time
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=PARQUET_BATCH_ROWS):
+        yield from batch.to_pylist()
+
+
+def read_records(path) -> Iterator[Dict]:
+    """Raw records of one catalog file, by suffix"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in JSONL_SUFFIXES:
+        return _read_jsonl(path)
+    if suffix in CSV_SUFFIXES:
+        return _read_csv(path)
+    if suffix in PARQUET_SUFFIXES:
+        return _read_parquet(path)
+    raise ValueError(f"Unsupported catalog file: {path.name}")
+
+
+def catalog_files(data_dir=DATA_DIR) -> List[Path]:
+    """Catalog files below `data_dir`, in name order"""
+    data_dir = Path(data_dir)
+    if not data_dir.is_dir():
+        return []
+    return sorted(path for path in data_dir.rglob("*") if path.is_file() and path.suffix.lower() in CATALOG_SUFFIXES)
+
+
+def catalog_fingerprint(paths: Iterable = None) -> str:
+    """
+    Hash of the resolved path, size and modification time of each catalog
+    file (default: catalog_files()). It changes whenever a file is added,
+    removed, replaced or edited, and is computed without reading the files.
+    """
+    digest = hashlib.sha256()
+    for path in catalog_files() if paths is None else paths:
+        path = Path(path).resolve()
+        stat = path.stat()
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+def iter_catalog(paths: Iterable = None, stats: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Yield normalized products from `paths` (default: catalog_files()).
+    Invalid records and unparsable JSON lines are skipped with a warning.
+    If `stats` is a dict it is filled with files/records/products/skipped counts.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(files=0, records=0, products=0, skipped=0)
+    for path in catalog_files() if paths is None else paths:
+        path = Path(path)
+        stats["files"] += 1
+        warnings = 0
+        for number, record in enumerate(read_records(path), 1):
+            stats["records"] += 1
+            try:
+                if isinstance(record, ValueError):
+                    raise record
+                product = normalize_product(record)
+            except ValueError as e:
+                stats["skipped"] += 1
+                warnings += 1
+                if warnings <= MAX_WARNINGS_PER_FILE:
+                    print(f"Warning: Skipping record {number} of {path.name}: {e}")
+                continue
+            stats["products"] += 1
+            yield product
+        if warnings > MAX_WARNINGS_PER_FILE:
+            print(f"Warning: Skipped {warnings} invalid records in {path.name}")
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Consecutive lists of up to `size` items"""
+    iterator = iter(iterable)
+    size = max(1, int(size))
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+def prefetch(iterable: Iterable, depth: int = INGEST_QUEUE_DEPTH, name: str = "prefetch") -> Iterator:
+    """
+    Iterate `iterable` on a background thread, keeping up to `depth` items
+    ready in a queue. Chaining these makes pipeline stages that overlap
+    while the queues bound how far a stage can run ahead. Exceptions are
+    re-raised in the consumer; closing the consumer stops the thread.
+    """
+    items = queue.Queue(max(1, int(depth)))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the catalog files under DATA_DIR")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    args = parser.parse_args()
+
+    paths = catalog_files(args.data_dir)
+    if not paths:
+        print(f"No catalog files ({', '.join(CATALOG_SUFFIXES)}) under {args.data_dir}")
+        return
+    stats = {}
+    ids = set()
+    for product in iter_catalog(paths, stats):
+        ids.add(product["id"])
+    print(f"{stats['files']} files, {stats['records']} records: {stats['products']} valid "
+          f"({len(ids)} distinct ids), {stats['skipped']} skipped")
+
+
+if __name__ == "__main__":
+    main()
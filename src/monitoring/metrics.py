@@ -0,0 +1,291 @@
+"""
+Lightweight in-process metrics: counters, gauges and fixed-bucket
+histograms in a registry, rendered in the Prometheus text exposition format
+and served by a stdlib HTTP server thread. Cache hit rates are read from
+the tracked LRUCache instances at scrape time.
+"""
+import math
+import time
+import bisect
+import weakref
+import threading
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config.settings import METRICS_HOST, METRICS_PORT, METRICS_LATENCY_BUCKETS
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    """One metric family: a value (or bucket set) per combination of label values"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple) -> Dict:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Tuple[str, Dict, float]]:
+        """(sample name, labels, value) for every labelled series"""
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed cumulative buckets, plus their sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = METRICS_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, labels)
+
+    def samples(self) -> List[Tuple[str, Dict, float]]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        samples = []
+        for key, counts, total, count in series:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return series[2] if series else 0
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """Decorator observing each call's duration in `histogram`"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+class MetricsRegistry:
+    """Named metrics plus tracked caches, rendered together for a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        # name -> {id(cache): (weak reference, the cache's counters dict)}
+        self._caches: Dict[str, Dict[int, Tuple[weakref.ref, Dict[str, int]]]] = {}
+        # name -> counters of collected caches, so the *_total counters never go down
+        self._retired: Dict[str, Dict[str, int]] = {}
+        # Reentrant: a cache collected while the lock is held retires itself under it
+        self._lock = threading.RLock()
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = METRICS_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def track_cache(self, name: str, cache):
+        """
+        Report an LRUCache's counters under cache="<name>". Caches are held
+        weakly; several caches with the same name are summed, and when one
+        is collected its final counts are kept, so the totals only grow.
+        """
+        with self._lock:
+            tracked = self._caches.setdefault(name, {})
+            if id(cache) not in tracked:
+                tracked[id(cache)] = (weakref.ref(cache), cache.counters)
+                weakref.finalize(cache, self._retire_cache, name, id(cache))
+
+    def _retire_cache(self, name: str, key: int):
+        with self._lock:
+            _ref, counters = self._caches[name].pop(key)
+            retired = self._retired.setdefault(name, dict.fromkeys(counters, 0))
+            for field, count in counters.items():
+                retired[field] += count
+
+    def _cache_families(self) -> Iterable[Tuple[str, str, str, List[Tuple[str, Dict, float]]]]:
+        # Every cache's counts are either in _caches or in _retired, never both or neither
+        with self._lock:
+            caches = {name: [(ref(), counters) for ref, counters in tracked.values()]
+                      for name, tracked in self._caches.items()}
+            retired = {name: dict(counters) for name, counters in self._retired.items()}
+        totals = {}
+        for name in caches.keys() | retired.keys():
+            counters = [dict(c) for _cache, c in caches.get(name, [])] + [retired.get(name, {})]
+            totals[name] = {key: sum(c.get(key, 0) for c in counters) for key in ("hits", "misses", "evictions")}
+            totals[name]["size"] = sum(len(cache) for cache, _c in caches.get(name, []) if cache is not None)
+        families = [
+            ("cache_hits_total", "counter", "Cache lookups that found an entry", "hits"),
+            ("cache_misses_total", "counter", "Cache lookups that found no (live) entry", "misses"),
+            ("cache_evictions_total", "counter", "Entries evicted to stay within max size", "evictions"),
+            ("cache_entries", "gauge", "Entries currently cached", "size"),
+        ]
+        for family, kind, documentation, key in families:
+            yield family, kind, documentation, [(family, {"cache": name}, t[key]) for name, t in totals.items()]
+        ratios = []
+        for name, t in totals.items():
+            lookups = t["hits"] + t["misses"]
+            ratios.append(("cache_hit_ratio", {"cache": name}, t["hits"] / lookups if lookups else 0.0))
+        yield "cache_hit_ratio", "gauge", "Hits / lookups since tracking began, collected caches included", ratios
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        families = [(m.name, m.kind, m.documentation, m.samples()) for m in metrics]
+        families.extend(self._cache_families())
+        lines = []
+        for name, kind, documentation, samples in families:
+            lines.append(f"# HELP {name} {_escape(documentation)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by the recommendation path
+REGISTRY = MetricsRegistry()
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST,
+                         registry: MetricsRegistry = REGISTRY) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve GET /metrics from a daemon thread. Returns the server (stop it
+    with shutdown() and server_close()), or None if the address is taken.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"Warning: Metrics server not started on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
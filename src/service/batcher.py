@@ -0,0 +1,101 @@
+"""
+Dynamic micro-batching: concurrent callers submit single items, a worker
+thread gathers whatever arrives within a short window (up to a maximum batch
+size), runs one batched call and fans the results back out as futures.
+"""
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Sequence, Tuple
+
+from config.settings import BATCH_WINDOW_MS, BATCH_MAX_SIZE
+from src.monitoring.metrics import REGISTRY
+
+BATCH_SIZE = REGISTRY.histogram(
+    "microbatch_size", "Items per micro-batch call", ["batcher"], buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+BATCH_SECONDS = REGISTRY.histogram("microbatch_call_seconds", "Duration of the batched call", ["batcher"])
+QUEUE_SECONDS = REGISTRY.histogram("microbatch_queue_seconds", "Time from submit until the batched call starts", ["batcher"])
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects single-item calls into batches for `process_batch`, which takes
+    a list of items and returns one result per item, in order. The first
+    item of a batch waits at most `window_ms` for others to join.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], Sequence[Any]], window_ms: float = BATCH_WINDOW_MS,
+                 max_batch_size: int = BATCH_MAX_SIZE, name: str = "micro-batcher"):
+        self.process_batch = process_batch
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.name = name
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item; the future resolves to its result"""
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item: Any, timeout: float = None) -> Any:
+        """Submit an item and wait for its result"""
+        return self.submit(item).result(timeout)
+
+    def close(self, timeout: float = None):
+        """Finish the queued items and stop the worker thread"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        """The first entry plus whatever else arrives within the window; also whether to stop"""
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            entry = self._queue.get()
+            if entry is _STOP:
+                break
+            batch, stop = self._collect(entry)
+            # Callers that cancelled while waiting are dropped from the batch
+            batch = [(item, future, queued) for item, future, queued in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            start = time.perf_counter()
+            for _, _, queued in batch:
+                QUEUE_SECONDS.observe(start - queued, batcher=self.name)
+            try:
+                results = self.process_batch([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name}: {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            BATCH_SECONDS.observe(time.perf_counter() - start, batcher=self.name)
+            BATCH_SIZE.observe(len(batch), batcher=self.name)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
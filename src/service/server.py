@@ -0,0 +1,206 @@
+"""
+Headless HTTP recommendation service.
+Requests run through the same RecommendationPipeline as the Streamlit app;
+query encodes from concurrent requests are gathered by a MicroBatcher into
+one model call. Endpoints:
+
+    POST /recommend   {"query": ..., "top_k": 5, "threshold": 0.3}
+    GET  /recommend?q=...&top_k=5&threshold=0.3
+    GET  /health
+    GET  /metrics     (Prometheus text format)
+
+    python -m src.service.server [--port 8080] [--db-type faiss] [--window-ms 3] [--max-batch 32] [--data-dir data]
+                                 [--snapshot-dir vector_db | --no-snapshot]
+"""
+import json
+import math
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from config.settings import (
+    SAMPLE_PRODUCTS, DATA_DIR, VECTOR_DB_TYPE, VECTOR_DB_DIR, VECTOR_DB_SNAPSHOTS, EMBEDDING_MODEL, SERVICE_HOST, SERVICE_PORT,
+    SERVICE_MAX_TOP_K, BATCH_WINDOW_MS, BATCH_MAX_SIZE, SIMILARITY_THRESHOLD
+)
+from src.agents.pipeline import RecommendationPipeline
+from src.agents.recommendation_agent import ProductRecommendationAgent
+from src.data.loader import catalog_files, catalog_fingerprint, iter_catalog
+from src.monitoring.metrics import REGISTRY, CONTENT_TYPE
+from src.service.batcher import MicroBatcher
+from src.vectors.db import VectorDatabase, get_shared_database
+
+REQUEST_SECONDS = REGISTRY.histogram("service_request_seconds", "HTTP request latency", ["endpoint", "status"])
+ROUTES = ("/recommend", "/health", "/metrics")
+
+
+class RecommendationService:
+    """Thread-safe recommendation entry point shared by the HTTP handler threads"""
+
+    def __init__(self, vector_db: VectorDatabase, agent: ProductRecommendationAgent = None,
+                 window_ms: float = BATCH_WINDOW_MS, max_batch_size: int = BATCH_MAX_SIZE):
+        self.vector_db = vector_db
+        self.agent = agent or ProductRecommendationAgent(filter_index=lambda: vector_db.product_filter)
+        # A batch of one would only add a thread hop
+        self.batcher = MicroBatcher(self._encode_batch, window_ms, max_batch_size, name="query-encoder") \
+            if max_batch_size > 1 else None
+        self.pipeline = RecommendationPipeline(self.agent, vector_db, encoder=self.encode)
+
+    def _encode_batch(self, queries: List[str]) -> np.ndarray:
+        return self.vector_db.encode_queries(queries, cache_results=True)
+
+    def encode(self, query: str) -> np.ndarray:
+        if self.batcher is None:
+            return self.vector_db.encode_query(query)
+        return self.batcher(query)
+
+    def recommend(self, query: str, top_k: int = 5, threshold: float = SIMILARITY_THRESHOLD) -> Dict:
+        """Pipeline result as a JSON-ready dict"""
+        result = self.pipeline.run(query, top_k=top_k, threshold=threshold)
+        scores = {product["id"]: score for product, score in result["search_results"]}
+        return {
+            "query": query,
+            "preferences": result["preferences"],
+            "products": [dict(product, score=scores.get(product["id"])) for product in result["products"]],
+            "recommendation_text": result["recommendation_text"],
+            "timings": result["timings"]
+        }
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+def _json_default(value):
+    """numpy scalars and arrays in responses"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def make_handler(service: RecommendationService):
+    class RecommendationHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status: int, payload):
+            self._send(status, json.dumps(payload, default=_json_default).encode("utf-8"))
+
+        def _recommend(self, params: Dict):
+            query = str(params.get("query") or "").strip()
+            if not query:
+                return self._send_json(400, {"error": "query is required"})
+            try:
+                top_k = int(params.get("top_k", 5))
+                threshold = float(params.get("threshold", SIMILARITY_THRESHOLD))
+            except (TypeError, ValueError):
+                return self._send_json(400, {"error": "top_k must be an integer and threshold a number"})
+            if not 1 <= top_k <= SERVICE_MAX_TOP_K:
+                return self._send_json(400, {"error": f"top_k must be between 1 and {SERVICE_MAX_TOP_K}"})
+            if not math.isfinite(threshold):
+                return self._send_json(400, {"error": "threshold must be a finite number"})
+            self._send_json(200, service.recommend(query, top_k=top_k, threshold=threshold))
+
+        def _route(self, method: str):
+            url = urlparse(self.path)
+            start = time.perf_counter()
+            self._status = 0
+            try:
+                self._dispatch(method, url)
+            except Exception as e:
+                print(f"Recommendation service error: {e}")
+                self._send_json(500, {"error": str(e)})
+            finally:
+                endpoint = url.path if url.path in ROUTES else "other"
+                REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, status=self._status)
+
+        def _dispatch(self, method: str, url):
+            if url.path == "/recommend" and method == "POST":
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    params = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    return self._send_json(400, {"error": "body must be JSON"})
+                if not isinstance(params, dict):
+                    return self._send_json(400, {"error": "body must be a JSON object"})
+                self._recommend(params)
+            elif url.path == "/recommend" and method == "GET":
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                params["query"] = params.pop("q", params.get("query"))
+                self._recommend(params)
+            elif url.path == "/health" and method == "GET":
+                self._send_json(200, {"status": "ok", "products": service.vector_db.catalog.live_count})
+            elif url.path == "/metrics" and method == "GET":
+                self._send(200, REGISTRY.render().encode("utf-8"), CONTENT_TYPE)
+            else:
+                self._send_json(404, {"error": f"no route for {method} {url.path}"})
+
+        def send_response(self, code, message=None):
+            self._status = code
+            super().send_response(code, message)
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return RecommendationHandler
+
+
+def create_server(service: RecommendationService, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product recommendation HTTP service")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--db-type", default=VECTOR_DB_TYPE, choices=["chroma", "faiss"])
+    parser.add_argument("--embedding-model", default=EMBEDDING_MODEL)
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW_MS, help="Micro-batch window")
+    parser.add_argument("--max-batch", type=int, default=BATCH_MAX_SIZE, help="Largest micro-batch (1 disables batching)")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory of JSONL/CSV/Parquet product files")
+    parser.add_argument("--snapshot-dir", default=str(VECTOR_DB_DIR), help="Where index snapshots are saved and reloaded")
+    parser.add_argument("--no-snapshot", action="store_true", default=not VECTOR_DB_SNAPSHOTS,
+                        help="Build the index from scratch and do not save a snapshot")
+    args = parser.parse_args()
+
+    # Product files under --data-dir are streamed in; without any, the sample catalog is served
+    paths = catalog_files(args.data_dir)
+    products = iter_catalog(paths) if paths else SAMPLE_PRODUCTS
+    vector_db = get_shared_database(products, fingerprint=catalog_fingerprint(paths) if paths else None,
+                                    db_type=args.db_type, embedding_model=args.embedding_model,
+                                    snapshot_dir=None if args.no_snapshot else args.snapshot_dir)
+    vector_db.warm_up(background=False)
+    service = RecommendationService(vector_db, window_ms=args.window_ms, max_batch_size=args.max_batch)
+    server = create_server(service, args.host, args.port)
+    print(f"Serving recommendations on http://{args.host}:{server.server_address[1]} "
+          f"(batch window {args.window_ms} ms, max batch {args.max_batch})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
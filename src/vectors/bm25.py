@@ -0,0 +1,135 @@
+"""
+In-memory BM25 inverted index over product text, kept next to the vector
+index for hybrid (lexical + vector) retrieval. Postings are per-term NumPy
+arrays of (row, term frequency), so a query costs O(postings of its terms).
+"""
+import re
+import numpy as np
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.vectors.catalog import _Column
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens ("WH-1000XM5" -> ["wh", "1000xm5"])"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over catalog rows, with incremental add and remove"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        self.doc_freqs = _Column(np.int64)      # Live documents containing each term
+        self.postings_rows: List[_Column] = []  # Per term: rows containing it
+        self.postings_tfs: List[_Column] = []   # Per term: its frequency in those rows
+        self.doc_lengths = _Column(np.float32)  # Tokens per row
+        self.alive = _Column(np.bool_)          # Removed rows keep their postings but never match
+        self.doc_count = 0
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return self.doc_count
+
+    def _ensure_rows(self, size: int):
+        if size > self.alive.size:
+            missing = size - self.alive.size
+            self.alive.extend(np.zeros(missing, dtype=bool))
+            self.doc_lengths.extend(np.zeros(missing, dtype=np.float32))
+
+    def _term_id(self, token: str) -> int:
+        term = self.vocabulary.get(token)
+        if term is None:
+            term = self.vocabulary[token] = len(self.postings_rows)
+            self.postings_rows.append(_Column(np.int64))
+            self.postings_tfs.append(_Column(np.float32))
+            self.doc_freqs.extend([0])
+        return term
+
+    def add(self, rows: Sequence[int], texts: Sequence[str]):
+        """Index the texts of catalog rows"""
+        rows = list(rows)
+        if not rows:
+            return
+        self._ensure_rows(max(rows) + 1)
+        terms, term_rows, tfs = [], [], []
+        for row, text in zip(rows, texts):
+            tokens = tokenize(text)
+            for token, tf in Counter(tokens).items():
+                terms.append(self._term_id(token))
+                term_rows.append(row)
+                tfs.append(tf)
+            self.alive.data[row] = True
+            self.doc_lengths.data[row] = len(tokens)
+            self.doc_count += 1
+            self.total_length += len(tokens)
+
+        # Append postings grouped by term: one extend per distinct term
+        terms = np.asarray(terms, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")
+        terms, term_rows, tfs = terms[order], np.asarray(term_rows, dtype=np.int64)[order], np.asarray(tfs)[order]
+        unique_terms, starts, counts = np.unique(terms, return_index=True, return_counts=True)
+        for term, start, count in zip(unique_terms.tolist(), starts.tolist(), counts.tolist()):
+            self.postings_rows[term].extend(term_rows[start:start + count])
+            self.postings_tfs[term].extend(tfs[start:start + count])
+        np.add.at(self.doc_freqs.data, unique_terms, counts)
+
+    def remove(self, rows: Sequence[int], texts: Sequence[str]):
+        """Stop matching rows; `texts` must be what they were indexed with"""
+        for row, text in zip(rows, texts):
+            if row >= self.alive.size or not self.alive.data[row]:
+                continue
+            tokens = tokenize(text)
+            for token in set(tokens):
+                self.doc_freqs.data[self.vocabulary[token]] -= 1
+            self.alive.data[row] = False
+            self.doc_count -= 1
+            self.total_length -= len(tokens)
+
+    def search(self, query: str, top_k: int = 10,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k rows by BM25 score, best first, optionally restricted to rows
+        set in a boolean `mask`. Returns (rows, scores); rows without any
+        query term are never returned.
+        """
+        terms = [self.vocabulary[token] for token in dict.fromkeys(tokenize(query)) if token in self.vocabulary]
+        if not terms or self.doc_count == 0 or top_k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        average_length = self.total_length / self.doc_count
+        row_parts, score_parts = [], []
+        for term in terms:
+            df = self.doc_freqs.data[term]
+            if df <= 0:
+                continue
+            idf = np.log1p((self.doc_count - df + 0.5) / (df + 0.5))
+            rows = self.postings_rows[term].values
+            tfs = self.postings_tfs[term].values
+            norm = tfs + self.k1 * (1.0 - self.b + self.b * self.doc_lengths.data[rows] / average_length)
+            row_parts.append(rows)
+            score_parts.append(idf * tfs * (self.k1 + 1.0) / norm)
+        if not row_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        rows, scores = np.concatenate(row_parts), np.concatenate(score_parts)
+        keep = self.alive.data[rows]
+        if mask is not None:
+            keep &= mask[rows]
+        rows, scores = rows[keep], scores[keep]
+        if len(row_parts) > 1:
+            rows, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+        if len(rows) == 0:
+            return rows, scores
+
+        top_k = min(top_k, len(rows))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        # Best score first; ties go to the lower row (earlier catalog position)
+        top = top[np.lexsort((rows[top], -scores[top]))]
+        return rows[top], scores[top]
@@ -0,0 +1,305 @@
+"""
+Columnar product catalog: NumPy columns for numeric fields, dictionary-encoded
+categories and tags, and offset-indexed UTF-8 blobs for text. Rows are
+addressed by integer index; product dicts are only built on demand.
+"""
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Iterable, Iterator
+
+# Fields stored in dedicated columns; anything else goes to `extras`
+TEXT_FIELDS = ("name", "description", "image_url")
+CORE_FIELDS = ("id", "name", "category", "price", "description", "tags", "rating", "image_url")
+
+
+def product_text(product: Dict) -> str:
+    """Searchable text that gets embedded for a product"""
+    return f"{product['name']} {product.get('description', '')} {' '.join(product.get('tags', []))}"
+
+
+def text_hash(text: str) -> int:
+    """64-bit content hash used to skip re-embedding unchanged text"""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class _Column:
+    """Growable 1-D NumPy array with amortized appends"""
+
+    def __init__(self, dtype, data: np.ndarray = None):
+        self.dtype = np.dtype(dtype)
+        self.data = data if data is not None else np.empty(16, dtype=self.dtype)
+        self.size = len(data) if data is not None else 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.dtype)
+        end = self.size + len(values)
+        if end > len(self.data):
+            grown = np.empty(max(end, 2 * len(self.data), 16), dtype=self.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = values
+        self.size = end
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class MatrixColumn:
+    """Growable 2-D array (one row per catalog row) with amortized appends"""
+
+    def __init__(self, dim: int = None, dtype=np.float32, data: np.ndarray = None):
+        self.dtype = np.dtype(dtype)
+        self.data = data
+        self.size = len(data) if data is not None else 0
+        self.dim = data.shape[1] if data is not None else dim
+
+    def extend(self, rows: np.ndarray):
+        rows = np.asarray(rows, dtype=self.dtype)
+        if self.data is None:
+            self.dim = rows.shape[1]
+            self.data = np.empty((max(len(rows), 16), self.dim), dtype=self.dtype)
+        end = self.size + len(rows)
+        if end > len(self.data):
+            grown = np.empty((max(end, 2 * len(self.data)), self.dim), dtype=self.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:end] = rows
+        self.size = end
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.data[:self.size] if self.data is not None else None
+
+
+class _StringColumn:
+    """UTF-8 strings packed into one byte blob plus start/length offsets"""
+
+    def __init__(self):
+        self.blob = _Column(np.uint8)
+        self.starts = _Column(np.int64)
+        self.lengths = _Column(np.int64)
+
+    def set(self, row: int, value: str):
+        """Point a row at a new string; the old bytes stay in the blob"""
+        encoded = np.frombuffer(value.encode("utf-8"), dtype=np.uint8)
+        self.starts.data[row] = self.blob.size
+        self.lengths.data[row] = len(encoded)
+        self.blob.extend(encoded)
+
+    def extend(self, strings: Iterable[str]):
+        encoded = [s.encode("utf-8") for s in strings]
+        lengths = np.array([len(b) for b in encoded], dtype=np.int64)
+        starts = self.blob.size + np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(encoded) else lengths
+        self.blob.extend(np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        self.starts.extend(starts)
+        self.lengths.extend(lengths)
+
+    def get(self, row: int) -> str:
+        start = self.starts.data[row]
+        return self.blob.data[start:start + self.lengths.data[row]].tobytes().decode("utf-8")
+
+    def to_list(self) -> List[str]:
+        """Every row's string, decoding the blob in one pass"""
+        blob = self.blob.values.tobytes()
+        return [
+            blob[start:start + length].decode("utf-8")
+            for start, length in zip(self.starts.values.tolist(), self.lengths.values.tolist())
+        ]
+
+
+class CatalogStore:
+    """Compact column store for the product catalog"""
+
+    def __init__(self):
+        self.ids = _Column(np.int64)
+        self.alive = _Column(np.bool_)         # False once a row is deleted or superseded
+        self.text_hashes = _Column(np.uint64)  # Hash of the embedded text, see text_hash()
+        self.prices = _Column(np.float64)      # NaN when a product has no price
+        self.ratings = _Column(np.float64)     # NaN when a product has no rating
+        self.category_codes = _Column(np.int32)
+        self.tag_offsets = _Column(np.int64)   # Row r owns tag_codes[offsets[r]:offsets[r + 1]]
+        self.tag_offsets.extend([0])
+        self.tag_codes = _Column(np.int32)
+        self.text = {field: _StringColumn() for field in TEXT_FIELDS}
+        self.category_names: List[str] = []
+        self.tag_names: List[str] = []
+        self._category_lookup: Dict[str, int] = {}
+        self._tag_lookup: Dict[str, int] = {}
+        self._row_of_id: Dict[int, int] = {}
+        self.extras: Dict[int, Dict] = {}
+
+    @classmethod
+    def from_products(cls, products: Iterable[Dict]) -> "CatalogStore":
+        store = cls()
+        store.extend(products)
+        return store
+
+    def __len__(self) -> int:
+        """Number of physical rows, including deleted ones"""
+        return self.ids.size
+
+    @property
+    def live_count(self) -> int:
+        return len(self._row_of_id)
+
+    def _code(self, value: str, names: List[str], lookup: Dict[str, int]) -> int:
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(names)
+            names.append(value)
+        return code
+
+    def extend(self, products: Iterable[Dict]) -> range:
+        """Append products and return the range of rows they were stored at"""
+        products = list(products)
+        first = len(self)
+        superseded = []
+        for row, product in enumerate(products, first):
+            previous = self._row_of_id.get(int(product["id"]))
+            if previous is not None:
+                superseded.append(previous)
+            self._row_of_id[int(product["id"])] = row
+            extras = {k: v for k, v in product.items() if k not in CORE_FIELDS}
+            if extras:
+                self.extras[row] = extras
+
+        self.ids.extend([int(p["id"]) for p in products])
+        self.alive.extend(np.ones(len(products), dtype=bool))
+        self.text_hashes.extend([text_hash(product_text(p)) for p in products])
+        self.prices.extend([p.get("price", np.nan) for p in products])
+        self.ratings.extend([p.get("rating", np.nan) for p in products])
+        self.category_codes.extend([
+            self._code(p.get("category", ""), self.category_names, self._category_lookup) for p in products
+        ])
+        tag_codes = [
+            [self._code(tag, self.tag_names, self._tag_lookup) for tag in p.get("tags", [])] for p in products
+        ]
+        counts = np.array([len(codes) for codes in tag_codes], dtype=np.int64)
+        self.tag_offsets.extend(self.tag_codes.size + np.cumsum(counts))
+        self.tag_codes.extend([code for codes in tag_codes for code in codes])
+        for field in TEXT_FIELDS:
+            self.text[field].extend(p.get(field, "") for p in products)
+        # A repeated id replaces the earlier row
+        for row in superseded:
+            self.alive.data[row] = False
+            self.extras.pop(row, None)
+        return range(first, len(self))
+
+    def live_rows_by_id(self) -> Dict[int, int]:
+        """Copy of the id -> row mapping for live products"""
+        return dict(self._row_of_id)
+
+    def row_of(self, product_id) -> int:
+        """Row index of a live product id, or -1 if unknown"""
+        return self._row_of_id.get(int(product_id), -1)
+
+    def update(self, row: int, product: Dict):
+        """Overwrite the non-embedded fields (price, rating, category, image, extras) of a row"""
+        self.prices.data[row] = product.get("price", np.nan)
+        self.ratings.data[row] = product.get("rating", np.nan)
+        self.category_codes.data[row] = self._code(
+            product.get("category", ""), self.category_names, self._category_lookup
+        )
+        if product.get("image_url", "") != self.text["image_url"].get(row):
+            self.text["image_url"].set(row, product.get("image_url", ""))
+        extras = {k: v for k, v in product.items() if k not in CORE_FIELDS}
+        if extras:
+            self.extras[row] = extras
+        else:
+            self.extras.pop(row, None)
+
+    def delete(self, row: int):
+        """Tombstone a row; its id no longer resolves"""
+        self.alive.data[row] = False
+        self._row_of_id.pop(int(self.ids.data[row]), None)
+        self.extras.pop(row, None)
+
+    def tags_of(self, row: int) -> List[str]:
+        start, end = self.tag_offsets.data[row], self.tag_offsets.data[row + 1]
+        return [self.tag_names[code] for code in self.tag_codes.data[start:end]]
+
+    def get(self, row: int) -> Dict:
+        """Materialize one row as a product dict"""
+        row = int(row)
+        product = {
+            "id": int(self.ids.data[row]),
+            "name": self.text["name"].get(row),
+            "category": self.category_names[self.category_codes.data[row]],
+        }
+        price = self.prices.data[row]
+        if not np.isnan(price):
+            product["price"] = float(price)
+        product["description"] = self.text["description"].get(row)
+        product["tags"] = self.tags_of(row)
+        rating = self.ratings.data[row]
+        if not np.isnan(rating):
+            product["rating"] = float(rating)
+        product["image_url"] = self.text["image_url"].get(row)
+        product.update(self.extras.get(row, {}))
+        return product
+
+    def rows(self) -> Iterator[int]:
+        """Live row indices"""
+        return iter(np.flatnonzero(self.alive.values).tolist())
+
+    def to_dicts(self) -> List[Dict]:
+        return [self.get(row) for row in self.rows()]
+
+    def search_text(self, row: int) -> str:
+        """Text that gets embedded for a row"""
+        return f"{self.text['name'].get(row)} {self.text['description'].get(row)} {' '.join(self.tags_of(row))}"
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the column arrays"""
+        columns = [self.ids, self.alive, self.text_hashes, self.prices, self.ratings, self.category_codes, self.tag_offsets, self.tag_codes]
+        for column in self.text.values():
+            columns += [column.blob, column.starts, column.lengths]
+        return sum(column.values.nbytes for column in columns)
+
+    # Persistence: one .npy per column so snapshots can be memory-mapped
+
+    def _arrays(self) -> Dict[str, _Column]:
+        arrays = {
+            "ids": self.ids, "alive": self.alive, "text_hashes": self.text_hashes, "prices": self.prices, "ratings": self.ratings,
+            "category_codes": self.category_codes, "tag_offsets": self.tag_offsets, "tag_codes": self.tag_codes
+        }
+        for field, column in self.text.items():
+            arrays[f"{field}_blob"] = column.blob
+            arrays[f"{field}_starts"] = column.starts
+            arrays[f"{field}_lengths"] = column.lengths
+        return arrays
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, column in self._arrays().items():
+            np.save(path / f"{name}.npy", column.values)
+        with open(path / "vocab.json", "w") as f:
+            json.dump({
+                "category_names": self.category_names,
+                "tag_names": self.tag_names,
+                "extras": {str(row): extra for row, extra in self.extras.items()}
+            }, f)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "CatalogStore":
+        """Load a saved catalog; columns are copy-on-write memory maps"""
+        path = Path(path)
+        store = cls()
+        for name, column in store._arrays().items():
+            data = np.load(path / f"{name}.npy", mmap_mode="c" if mmap else None)
+            column.data, column.size = data, len(data)
+        with open(path / "vocab.json") as f:
+            vocab = json.load(f)
+        store.category_names = vocab["category_names"]
+        store.tag_names = vocab["tag_names"]
+        store.extras = {int(row): extra for row, extra in vocab["extras"].items()}
+        store._category_lookup = {name: code for code, name in enumerate(store.category_names)}
+        store._tag_lookup = {name: code for code, name in enumerate(store.tag_names)}
+        store._row_of_id = {
+            int(store.ids.data[row]): row for row in np.flatnonzero(store.alive.values).tolist()
+        }
+        return store
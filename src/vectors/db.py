@@ -1,12 +1,41 @@
 """
-Vector database and embeddings handler using ChromaDB and FAISS
+Vector database and embeddings handler using ChromaDB and FAISS.
+The backends and the embedding model are loaded on first use, so importing
+this module (or building a VectorDatabase from a snapshot) stays cheap.
 """
 import os
-import json
+import time
+import uuid
+import threading
 import warnings
 import numpy as np
-from typing import List, Dict, Tuple
-from sentence_transformers import SentenceTransformer
+from itertools import islice
+from concurrent.futures import Future
+from typing import List, Dict, Tuple, Iterable, Optional
+
+from config.settings import (
+    EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, EMBEDDING_WORKERS, VECTOR_DB_DIR, VECTOR_DB_SNAPSHOTS, QUERY_CACHE_SIZE, QUERY_CACHE_TTL,
+    FAISS_INDEX_TYPE, FAISS_INDEX_PARAMS, FAISS_SHARDS, FILTER_BRUTE_FORCE_LIMIT, SEARCH_MANY_CHUNK_SIZE, INGEST_CHUNK_SIZE,
+    INGEST_QUEUE_DEPTH,
+    EMBEDDING_STORAGE, QUANTIZATION_RECALL_K, HYBRID_SEARCH, HYBRID_CANDIDATES, RRF_K, BM25_K1, BM25_B
+)
+from src.data.loader import chunked, prefetch
+from src.vectors.bm25 import BM25Index
+from src.vectors.cache import LRUCache
+from src.vectors.catalog import CatalogStore, product_text, text_hash
+from src.vectors.embedders import BaseEmbedder, get_embedder
+from src.vectors.executor import BoundedExecutor, get_default_executor
+from src.vectors.parallel import ParallelEncoder, PARALLEL_MIN_TEXTS
+from src.vectors.rwlock import RWLock
+from src.vectors.sharded import ShardedIndex
+from src.vectors.faiss_index import (
+    import_faiss, DEFAULT_INDEX_PARAMS, create_id_index, configure_search, normalize, cosine_to_similarity, requires_training,
+    is_exact, search_parameters, index_nbytes
+)
+from src.vectors.filters import ProductFilter, chroma_where, tag_key
+from src.vectors.quantization import QuantizedMatrix, exact_top_k, recall_at_k, storage_report
+from src.vectors.snapshot import SnapshotStore, catalog_key, stream_key
+from src.monitoring.metrics import REGISTRY
 
 # Suppress deprecation and runtime warnings that break Streamlit output
 warnings.filterwarnings('ignore', category=DeprecationWarning)
@@ -15,48 +44,225 @@ warnings.filterwarnings('ignore', message='.*distutils.*')
 warnings.filterwarnings('ignore', message='.*sqlite3.*')
 warnings.filterwarnings('ignore', message='.*telemetry.*')
 
-try:
-    import chromadb
-    from chromadb.config import Settings
-    CHROMADB_AVAILABLE = True
-except (ImportError, Exception) as e:
-    CHROMADB_AVAILABLE = False
-    print(f"Warning: ChromaDB not available: {e}")
-
-try:
-    import faiss
-    FAISS_AVAILABLE = True
-except (ImportError, Exception) as e:
-    FAISS_AVAILABLE = False
-    print(f"Warning: FAISS not available: {e}")
+SEARCH_SECONDS = REGISTRY.histogram(
+    "vector_search_seconds", "VectorDatabase.search latency (encode, ANN search, fusion)", ["backend", "filtered"]
+)
+SEARCH_MANY_SECONDS = REGISTRY.histogram("vector_search_many_seconds", "VectorDatabase.search_many latency per call", ["backend"])
+SEARCH_MANY_QUERIES = REGISTRY.counter("vector_search_many_queries_total", "Queries answered by search_many", ["backend"])
+SEARCH_ERRORS = REGISTRY.counter("vector_search_errors_total", "Backend errors during search", ["backend"])
+INGEST_SECONDS = REGISTRY.histogram(
+    "vector_ingest_seconds", "VectorDatabase.add_products duration", ["backend", "source"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+)
+INGESTED_PRODUCTS = REGISTRY.counter("vector_ingested_products_total", "Products loaded by add_products", ["backend", "source"])
+UPSERTED_PRODUCTS = REGISTRY.counter(
+    "vector_upserted_products_total", "Products passed to upsert_products, by change", ["backend", "change"]
+)
+DELETED_PRODUCTS = REGISTRY.counter("vector_deleted_products_total", "Products removed by delete_products", ["backend"])
+CATALOG_PRODUCTS = REGISTRY.gauge("vector_catalog_products", "Live products in the most recently changed catalog", ["backend"])
+
+_chromadb = None
+_chromadb_checked = False
+
+
+def _import_chromadb():
+    """Import chromadb on first use; returns None (after a warning) if unavailable"""
+    global _chromadb, _chromadb_checked
+    if not _chromadb_checked:
+        try:
+            import chromadb
+            _chromadb = chromadb
+        except (ImportError, Exception) as e:
+            print(f"Warning: ChromaDB not available: {e}")
+        _chromadb_checked = True
+    return _chromadb
+
+
+class _IndexVectors:
+    """
+    Stored embeddings of a single-process flat FAISS engine. The index
+    already holds every vector (as float32, float16 or int8 codes), so rows
+    are reconstructed from it by id instead of being kept a second time.
+    Same interface as QuantizedMatrix; rows come back normalized, and rows
+    that are no longer alive come back as zeros.
+    """
+    
+    def __init__(self, state: "_IndexState", storage: str):
+        self.state = state
+        self.storage = storage
+        
+    def __len__(self) -> int:
+        return len(self.state.catalog)
+        
+    @property
+    def dim(self):
+        return self.state.index.d if self.state.index is not None else None
+        
+    def extend(self, rows: np.ndarray):
+        pass  # _add_batch_to_faiss adds them to the index
+        
+    def finalize(self):
+        pass
+        
+    def take(self, rows) -> np.ndarray:
+        """Decode rows (an index, slice or index array) to float32"""
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(len(self)))
+        rows = np.asarray(rows, dtype=np.int64)
+        single = rows.ndim == 0
+        rows = np.atleast_1d(rows)
+        vectors = np.zeros((len(rows), self.dim or 0), dtype=np.float32)
+        present = self.state.catalog.alive.values[rows]
+        if present.any():
+            vectors[present] = self.state.index.reconstruct_batch(rows[present])
+        return vectors[0] if single else vectors
+        
+    @property
+    def values(self) -> np.ndarray:
+        return self.take(slice(None)) if len(self) else None
+        
+    def nbytes(self) -> int:
+        return 0  # Counted with the index
+        
+    def save(self, path, chunk_size: int = 65536):
+        """Write the rows as a QuantizedMatrix, which is what snapshots load"""
+        matrix = QuantizedMatrix(self.storage, fit_size=len(self))
+        for start in range(0, len(self), chunk_size):
+            matrix.extend(self.take(slice(start, start + chunk_size)))
+        matrix.finalize()
+        matrix.save(path)
+
+
+class _IndexState:
+    """
+    One generation of the searchable catalog: the catalog columns, stored
+    embeddings and backend index, plus the structures derived from them.
+    Rebuilds fill a new state and swap it in whole.
+    """
+    
+    def __init__(self, catalog: CatalogStore, vectors: QuantizedMatrix):
+        self.catalog = catalog
+        self.vectors = vectors
+        self.index = None  # FAISS index
+        self.pending = []  # FAISS (rows, vectors) buffered until an IVF index can be trained
+        self.collection = None  # Chroma collection
+        self.collection_name = None
+        self.stale_vectors = 0  # Deleted rows still present in an index that cannot remove them
+        self.quantization_stats = {}
+        self._product_filter = None
+        self._lexical_index = None
+        # Guards the lazy builds below; writers build ahead of time, this only stops duplicate builds
+        self._build_lock = threading.Lock()
+        
+    @property
+    def product_filter(self) -> ProductFilter:
+        if self._product_filter is None:
+            with self._build_lock:
+                if self._product_filter is None:
+                    self._product_filter = ProductFilter(self.catalog)
+        return self._product_filter
+        
+    def patch_filter(self, rows: List[int]):
+        """Publish a filter updated for changed (and appended) catalog rows; call with writes locked"""
+        with self._build_lock:
+            current = self._product_filter
+            self._product_filter = current.patched(self.catalog, rows) if current is not None \
+                else ProductFilter(self.catalog)
+        
+    @property
+    def lexical_index(self) -> BM25Index:
+        if self._lexical_index is None:
+            with self._build_lock:
+                if self._lexical_index is None:
+                    index = BM25Index(BM25_K1, BM25_B)
+                    rows = list(self.catalog.rows())
+                    index.add(rows, [self.catalog.search_text(row) for row in rows])
+                    self._lexical_index = index
+        return self._lexical_index
+        
+    def update_lexical_index(self, added: List[int], removed: List[int]):
+        """Apply catalog row changes to the BM25 index, if it has been built"""
+        if self._lexical_index is None:
+            return
+        self._lexical_index.remove(removed, [self.catalog.search_text(row) for row in removed])
+        self._lexical_index.add(added, [self.catalog.search_text(row) for row in added])
+
 
 class VectorDatabase:
     """Handles product embeddings and similarity search"""
     
-    def __init__(self, db_type="chroma", embedding_model="sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(self, db_type="chroma", embedding_model=EMBEDDING_MODEL,
+                 snapshot_dir=VECTOR_DB_DIR if VECTOR_DB_SNAPSHOTS else None,
+                 index_type=FAISS_INDEX_TYPE, index_params=FAISS_INDEX_PARAMS,
+                 storage=EMBEDDING_STORAGE, hybrid=HYBRID_SEARCH, warm_up=False, executor: BoundedExecutor = None,
+                 embedding_workers: int = EMBEDDING_WORKERS, shards: int = FAISS_SHARDS):
         self.db_type = db_type
-        self.embedding_model_name = embedding_model
-        self.embedding_model = SentenceTransformer(embedding_model)
-        self.products = []
+        self.storage = storage
+        self.hybrid = hybrid
+        self.index_type = index_type
+        self.index_params = dict(DEFAULT_INDEX_PARAMS, **(index_params or {}))
+        # FAISS only: partition the index across this many worker processes (see ShardedIndex)
+        self.shards = max(1, int(shards))
+        # A model name / "hashing[:dim]" spec, or a BaseEmbedder; models load on first encode
+        self.embedder: BaseEmbedder = get_embedder(embedding_model)
+        self.embedding_model_name = self.embedder.name
+        # Worker processes for encoding whole catalogs (see ParallelEncoder)
+        self.embedding_workers = max(1, int(embedding_workers))
+        self.ingest_stats = {}
+        self.snapshots = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        self.query_cache = LRUCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+        # Thread pool for the async methods (the shared default unless given)
+        self.executor = executor or get_default_executor()
+        REGISTRY.track_cache("query_embedding", self.query_cache)
+        # Searches hold the read side; in-place upserts/deletes take the write side.
+        # Writers (including whole rebuilds) are serialized by _write_lock.
+        self._lock = RWLock()
+        self._write_lock = threading.RLock()
+        self._spare_collection = None
         
         if db_type == "chroma":
             self._init_chroma_db()
         elif db_type == "faiss":
             self._init_faiss_db()
+        self._state = self._new_state()
+        if warm_up:
+            self.warm_up(background=True)
+            
+    @property
+    def model_load_seconds(self):
+        return self.embedder.load_seconds
+        
+    def warm_up(self, background: bool = True):
+        """
+        Load the embedding model and run one encode ahead of the first query.
+        With `background`, this happens on a daemon thread that is returned;
+        queries arriving meanwhile wait for the same model load.
+        """
+        if not background:
+            self._warm_up()
+            return None
+        thread = threading.Thread(target=self._warm_up, name="embedding-warm-up", daemon=True)
+        thread.start()
+        return thread
+        
+    def _warm_up(self):
+        try:
+            self.embedder.warm_up()
+        except Exception as e:
+            print(f"Warning: Embedding model warm-up failed: {e}")
             
     def _init_chroma_db(self):
         """Initialize ChromaDB vector store"""
-        if not CHROMADB_AVAILABLE:
+        chromadb = _import_chromadb()
+        if chromadb is None:
             self._init_faiss_db()
             self.db_type = "faiss"
             return
             
         try:
             self.client = chromadb.Client()
-            self.collection = self.client.get_or_create_collection(
-                name="products",
-                metadata={"hnsw:space": "cosine"}
-            )
+            # Created up front so a broken Chroma falls back to FAISS here
+            self._spare_collection = self._create_collection()
         except Exception as e:
             print(f"Warning: ChromaDB failed, using FAISS: {e}")
             self._init_faiss_db()
@@ -64,114 +270,859 @@ class VectorDatabase:
         
     def _init_faiss_db(self):
         """Initialize FAISS vector store"""
-        if not FAISS_AVAILABLE:
-            raise ImportError("FAISS is not installed. Install with: pip install faiss-cpu")
-        self.index = None
-        self.id_to_product = {}
+        import_faiss()
+        
+    def _create_collection(self):
+        """A new, empty Chroma collection; returns (name, collection)"""
+        # One collection per catalog generation: the in-memory client is shared process-wide
+        name = f"products_{uuid.uuid4().hex[:12]}"
+        return name, self.client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
         
-    def add_products(self, products: List[Dict]):
-        """Add products to vector database with embeddings"""
-        self.products = products
+    def _new_state(self) -> "_IndexState":
+        """An empty catalog and backend index to build into"""
+        # Raw embeddings (float32/float16/int8), one row per catalog row
+        state = _IndexState(CatalogStore(), QuantizedMatrix(self.storage, fit_size=self.index_params["train_size"]))
+        if self._index_holds_vectors:
+            state.vectors = _IndexVectors(state, self.storage)
+        if self.db_type == "chroma":
+            spare, self._spare_collection = self._spare_collection, None
+            state.collection_name, state.collection = spare or self._create_collection()
+        return state
         
-        for product in products:
-            # Create searchable text from product fields
-            text = f"{product['name']} {product.get('description', '')} {' '.join(product.get('tags', []))}"
+    @property
+    def _index_holds_vectors(self) -> bool:
+        """Whether stored embeddings are read back from the index instead of kept separately"""
+        return self.db_type == "faiss" and is_exact(self.index_type) and self.shards == 1
+        
+    def _swap(self, state: "_IndexState"):
+        """
+        Make `state` the live catalog with one reference assignment. Searches
+        that started earlier finish on the state they began with.
+        """
+        previous, self._state = self._state, state
+        if previous.collection is not None or isinstance(previous.index, ShardedIndex):
+            # Wait out searches still reading the old collection or shards, then release them
+            with self._lock.write():
+                pass
+            if previous.collection is not None:
+                self.client.delete_collection(previous.collection_name)
+            else:
+                previous.index.close()
             
-            if self.db_type == "chroma":
-                self._add_to_chroma(product, text)
-            elif self.db_type == "faiss":
-                self._add_to_faiss(product, text)
+    @property
+    def catalog(self) -> CatalogStore:
+        return self._state.catalog
+        
+    @property
+    def vectors(self) -> QuantizedMatrix:
+        return self._state.vectors
+        
+    @property
+    def index(self):
+        return self._state.index
+        
+    @property
+    def collection(self):
+        return self._state.collection
+        
+    @property
+    def quantization_stats(self) -> Dict:
+        return self._state.quantization_stats
+        
+    @property
+    def product_filter(self) -> ProductFilter:
+        """Filter columns of the live catalog; writers publish an updated one with each change"""
+        return self._state.product_filter
+        
+    @property
+    def lexical_index(self) -> BM25Index:
+        """BM25 index over the live catalog rows, built with the catalog and then kept in sync"""
+        return self._state.lexical_index
+        
+    def add_products(self, products: List[Dict], batch_size: int = EMBEDDING_BATCH_SIZE):
+        """
+        Replace the database contents with `products`.
+        Products are stored in a columnar CatalogStore; their texts are encoded
+        in batches of `batch_size` and each batch is written to the store with
+        a single add call. When snapshots are enabled and one exists for this
+        catalog and model, it is reloaded instead. With embedding_workers > 1,
+        catalogs of PARALLEL_MIN_TEXTS or more are encoded by a process pool.
+        
+        The new catalog and index are built off to the side while searches
+        keep using the current ones, and then swapped in at once (see rebuild
+        for doing this on a background thread).
+        """
+        batch_size = max(1, int(batch_size))
+        products = products if isinstance(products, list) else list(products)
+        with self._write_lock:
+            start = time.perf_counter()
+            state = self._new_state()
+            
+            key = catalog_key(products, self.embedding_model_name, self._snapshot_config) if self.snapshots else None
+            if key and self._load_snapshot(state, key, len(products), batch_size):
+                source = "snapshot"
+            else:
+                source = "model"
+                rows = state.catalog.extend(products)
+                reference = [] if self.storage != "float32" else None
+                embeddings = None
+                if self.embedding_workers > 1 and len(rows) >= PARALLEL_MIN_TEXTS:
+                    with ParallelEncoder(self.embedder, self.embedding_workers, batch_size) as encoder:
+                        embeddings = encoder.encode_batch([state.catalog.search_text(row) for row in rows])
+                self._embed_rows(state, rows, batch_size, reference, embeddings=embeddings)
+                self._remove_from_index(state, [row for row in rows if not state.catalog.alive.data[row]])
+                if reference:
+                    state.quantization_stats = self._quantization_report(state, np.vstack(reference))
+                if key and len(state.catalog):
+                    self._save_snapshot(state, key)
+                    
+            # Build the derived structures now, not on the first search after the swap
+            state.product_filter
+            if self.hybrid:
+                state.lexical_index
+            self._swap(state)
+                    
+            elapsed = time.perf_counter() - start
+            self.ingest_stats = {
+                "products": len(products),
+                "batch_size": batch_size,
+                "source": source,
+                "seconds": elapsed,
+                "products_per_sec": len(products) / elapsed if elapsed > 0 else 0.0
+            }
+            if self.storage != "float32":
+                self.ingest_stats["quantization"] = state.quantization_stats
+        INGEST_SECONDS.observe(elapsed, backend=self.db_type, source=source)
+        INGESTED_PRODUCTS.inc(len(products), backend=self.db_type, source=source)
+        CATALOG_PRODUCTS.set(state.catalog.live_count, backend=self.db_type)
+        return self.ingest_stats
+        
+    def rebuild(self, products: Iterable[Dict], batch_size: int = EMBEDDING_BATCH_SIZE) -> Future:
+        """
+        add_products() on a background thread. Searches are served from the
+        current catalog until the rebuilt one is swapped in; the returned
+        future resolves to the ingest stats.
+        """
+        future = Future()
+        
+        def run():
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self.add_products(products, batch_size))
+                except Exception as e:
+                    future.set_exception(e)
+                    
+        threading.Thread(target=run, name="catalog-rebuild", daemon=True).start()
+        return future
+        
+    def add_product_stream(self, products: Iterable[Dict], chunk_size: int = INGEST_CHUNK_SIZE,
+                           batch_size: int = EMBEDDING_BATCH_SIZE, queue_depth: int = INGEST_QUEUE_DEPTH,
+                           fingerprint: str = None) -> Dict:
+        """
+        Replace the database contents with a stream of products (for example
+        src.data.loader.iter_catalog()), without ever holding it as a list.
+        
+        Three stages overlap on their own threads: reading/chunking the
+        stream, encoding each chunk of `chunk_size` products, and writing
+        chunks to the catalog and index. Each stage runs at most
+        `queue_depth` chunks ahead of the next, so only a few chunks of
+        product dicts exist at a time. The quantization report needs the
+        whole catalog up front and is skipped.
+        
+        A stream cannot be hashed before it is read, so snapshots are keyed
+        on `fingerprint`, which identifies its source (for example
+        src.data.loader.catalog_fingerprint of the files it is read from).
+        With snapshots enabled and a fingerprint, a matching snapshot is
+        loaded without reading the stream, and a streamed build is saved.
+        Like add_products, the new catalog is swapped in when complete.
+        """
+        batch_size = max(1, int(batch_size))
+        with self._write_lock:
+            start = time.perf_counter()
+            state = self._new_state()
+            key = stream_key(fingerprint, self.embedding_model_name, self._snapshot_config) \
+                if self.snapshots and fingerprint else None
+            if key and self._load_snapshot(state, key, None, batch_size):
+                source, count, timings = "snapshot", len(state.catalog), {}
+            else:
+                source = "stream"
+                count, timings = self._stream_into(state, products, chunk_size, batch_size, queue_depth)
+                if key and len(state.catalog):
+                    self._save_snapshot(state, key)
+            
+            state.product_filter
+            if self.hybrid:
+                state.lexical_index
+            self._swap(state)
+            
+            elapsed = time.perf_counter() - start
+            self.ingest_stats = {
+                "products": count,
+                "batch_size": batch_size,
+                "chunk_size": chunk_size,
+                "source": source,
+                "seconds": elapsed,
+                "products_per_sec": count / elapsed if elapsed > 0 else 0.0,
+                **timings
+            }
+        INGEST_SECONDS.observe(elapsed, backend=self.db_type, source=source)
+        INGESTED_PRODUCTS.inc(count, backend=self.db_type, source=source)
+        CATALOG_PRODUCTS.set(state.catalog.live_count, backend=self.db_type)
+        return self.ingest_stats
+        
+    def _stream_into(self, state: "_IndexState", products: Iterable[Dict], chunk_size: int, batch_size: int,
+                     queue_depth: int) -> Tuple[int, Dict]:
+        """Read, encode and write a product stream into `state`; returns the count and stage timings"""
+        timings = {"encode_seconds": 0.0, "write_seconds": 0.0}
+        # The pool's start-up is paid once for the whole stream, so every chunk goes to it
+        encoder = ParallelEncoder(self.embedder, self.embedding_workers, batch_size, min_texts=0)
+        
+        def encode(chunks):
+            try:
+                for chunk in chunks:
+                    encode_start = time.perf_counter()
+                    texts = [product_text(product) for product in chunk]
+                    embeddings = encoder.encode_batch(texts)
+                    timings["encode_seconds"] += time.perf_counter() - encode_start
+                    yield chunk, texts, embeddings
+            finally:
+                chunks.close()
                 
-    def _add_to_chroma(self, product: Dict, text: str):
-        """Add product to Chroma collection"""
-        embedding = self.embedding_model.encode(text).tolist()
-        
-        self.collection.add(
-            ids=[str(product['id'])],
-            embeddings=[embedding],
-            documents=[text],
-            metadatas=[{
-                "name": product['name'],
-                "price": str(product['price']),
-                "category": product['category'],
-                "rating": str(product.get('rating', 0)),
-                "full_data": json.dumps(product)
-            }]
-        )
+        count = 0
+        chunks = prefetch(chunked(products, chunk_size), queue_depth, name="ingest-read")
+        encoded = prefetch(encode(chunks), queue_depth, name="ingest-encode")
+        try:
+            for chunk, texts, embeddings in encoded:
+                write_start = time.perf_counter()
+                rows = state.catalog.extend(chunk)
+                state.vectors.extend(embeddings)
+                self._add_batch(state, rows, texts, embeddings)
+                count += len(chunk)
+                timings["write_seconds"] += time.perf_counter() - write_start
+        finally:
+            encoded.close()
+            encoder.close()
+        state.vectors.finalize()
+        self._flush_pending(state)
+        # Ids repeated later in the stream superseded their earlier rows
+        self._remove_from_index(state, np.flatnonzero(~state.catalog.alive.values).tolist())
+        return count, timings
+        
+    def upsert_products(self, products: List[Dict], batch_size: int = EMBEDDING_BATCH_SIZE) -> Dict:
+        """
+        Insert new products and update existing ones (matched by id).
+        Only products whose embedded text (name, description, tags) changed are
+        re-encoded; price, rating, category or image changes update the stored
+        fields in place. Cost is proportional to the number of products passed,
+        plus the filter overlay (see ProductFilter.patched), which is at most
+        O(sqrt(catalog)) rows and is folded into a full O(catalog) rebuild only
+        when it outgrows that, so repeated small upserts stay amortized sublinear.
+        New texts are encoded before searches are paused, so they only wait
+        for the catalog and index writes.
+        """
+        with self._write_lock:
+            start = time.perf_counter()
+            state = self._state
+            stats = {"inserted": 0, "reembedded": 0, "updated": 0}
+            to_embed, updates, removed = [], [], set()
+            
+            for product in products:
+                product_id = int(product['id'])
+                row = -1 if product_id in removed else state.catalog.row_of(product_id)
+                if row < 0:
+                    stats["inserted"] += 1
+                    to_embed.append(product)
+                elif state.catalog.text_hashes.data[row] == text_hash(product_text(product)):
+                    stats["updated"] += 1
+                    updates.append((row, product))
+                else:
+                    # Text changed: the product moves to a fresh row with a new vector
+                    stats["reembedded"] += 1
+                    updates.append((row, None))
+                    removed.add(product_id)
+                    to_embed.append(product)
+                    
+            batch_size = max(1, int(batch_size))
+            embeddings = self.embedder.encode_batch([product_text(p) for p in to_embed], batch_size=batch_size) \
+                if to_embed else None
+                
+            with self._lock.write():
+                updated_rows, stale_rows = [], []
+                for row, product in updates:
+                    if product is None:
+                        stale_rows.append(row)
+                        state.catalog.delete(row)
+                    else:
+                        state.catalog.update(row, product)
+                        updated_rows.append(row)
+                rows = state.catalog.extend(to_embed)
+                self._embed_rows(state, rows, batch_size, embeddings=embeddings)
+                stale_rows += [row for row in rows if not state.catalog.alive.data[row]]
+                self._remove_from_index(state, stale_rows)
+                state.update_lexical_index([row for row in rows if state.catalog.alive.data[row]], stale_rows)
+                if self.db_type == "chroma" and updated_rows:
+                    state.collection.update(
+                        ids=[str(row) for row in updated_rows],
+                        metadatas=[self._chroma_metadata(state, row) for row in updated_rows]
+                    )
+                state.patch_filter(updated_rows + stale_rows)
+                
+            stats["seconds"] = time.perf_counter() - start
+        for change in ("inserted", "reembedded", "updated"):
+            UPSERTED_PRODUCTS.inc(stats[change], backend=self.db_type, change=change)
+        CATALOG_PRODUCTS.set(state.catalog.live_count, backend=self.db_type)
+        return stats
+        
+    def delete_products(self, product_ids: Iterable) -> int:
+        """Remove products by id; returns how many were found and removed"""
+        with self._write_lock, self._lock.write():
+            state = self._state
+            rows = [state.catalog.row_of(product_id) for product_id in product_ids]
+            rows = [row for row in rows if row >= 0]
+            for row in rows:
+                state.catalog.delete(row)
+            self._remove_from_index(state, rows)
+            state.update_lexical_index([], rows)
+            state.patch_filter(rows)
+        DELETED_PRODUCTS.inc(len(rows), backend=self.db_type)
+        CATALOG_PRODUCTS.set(state.catalog.live_count, backend=self.db_type)
+        return len(rows)
+        
+    def _embed_rows(self, state: "_IndexState", rows: range, batch_size: int, reference: List[np.ndarray] = None,
+                    embeddings: np.ndarray = None):
+        """
+        Encode catalog rows in batches and add them to the backend.
+        If `reference` is a list, the float32 batches are also appended to it.
+        `embeddings` (one per row, already encoded) skips the model.
+        """
+        encoded = embeddings
+        for offset in range(rows.start, rows.stop, batch_size):
+            batch = range(offset, min(offset + batch_size, rows.stop))
+            texts = [state.catalog.search_text(row) for row in batch]
+            if encoded is None:
+                embeddings = self.embedder.encode_batch(texts, batch_size=batch_size)
+            else:
+                embeddings = encoded[offset - rows.start:offset - rows.start + len(batch)]
+            state.vectors.extend(embeddings)
+            self._add_batch(state, batch, texts, embeddings)
+            if reference is not None:
+                reference.append(embeddings)
+        state.vectors.finalize()
+        self._flush_pending(state)
         
-    def _add_to_faiss(self, product: Dict, text: str):
-        """Add product to FAISS index"""
-        if not FAISS_AVAILABLE:
+    def _add_batch(self, state: "_IndexState", rows: range, texts: List[str], embeddings: np.ndarray):
+        """Write one batch of embedded catalog rows to the active backend"""
+        if self.db_type == "chroma":
+            self._add_batch_to_chroma(state, rows, texts, embeddings)
+        elif self.db_type == "faiss":
+            self._add_batch_to_faiss(state, rows, embeddings)
+            
+    def _remove_from_index(self, state: "_IndexState", rows: List[int]):
+        """Drop the vectors of deleted rows from the backend"""
+        if not rows:
             return
-        embedding = self.embedding_model.encode(text)
+        if self.db_type == "chroma":
+            state.collection.delete(ids=[str(row) for row in rows])
+        elif self.db_type == "faiss" and state.index is not None:
+            try:
+                state.index.remove_ids(np.asarray(rows, dtype=np.int64))
+            except RuntimeError:
+                # HNSW cannot remove vectors; searches mask deleted rows instead
+                state.stale_vectors += len(rows)
+                
+    def _load_snapshot(self, state: "_IndexState", key: str, count: Optional[int], batch_size: int) -> bool:
+        """
+        Restore catalog, embeddings and index from a snapshot without running
+        the model. `count` is the expected number of catalog rows (None when
+        a stream's length is unknown).
+        """
+        snapshot = self.snapshots.load(key)
+        if snapshot is None or count is not None and len(snapshot["catalog"]) != count:
+            return False
+        count = len(snapshot["catalog"])
+            
+        if snapshot["vectors"].storage != self.storage:
+            return False
+        state.catalog = snapshot["catalog"]
+        meta = snapshot["meta"]
+        vectors = snapshot["vectors"]
+        if not self._index_holds_vectors:
+            state.vectors = vectors
+        state.quantization_stats = meta.get("quantization", {})
+        state.stale_vectors = meta.get("stale_vectors", 0)
+        index_matches = meta.get("index_type") == self.index_type and meta.get("id_map") and self.shards == 1
+        if self.db_type == "faiss" and snapshot["index_path"] is not None and index_matches:
+            try:
+                faiss = import_faiss()
+                # Memory-mapped IVF lists are read-only, which would block upserts
+                io_flags = 0 if self.index_type in ("ivf", "ivfpq") else faiss.IO_FLAG_MMAP
+                state.index = faiss.read_index(str(snapshot["index_path"]), io_flags)
+                configure_search(state.index, self.index_params)
+                return True
+            except RuntimeError as e:
+                print(f"Warning: Could not read FAISS index snapshot: {e}")
+                state.index = None
+                
+        # Chroma (or a missing/different index): re-add the stored vectors in bulk
+        state.stale_vectors = 0
+        for offset in range(0, count, batch_size):
+            rows = range(offset, min(offset + batch_size, count))
+            texts = [state.catalog.search_text(row) for row in rows]
+            self._add_batch(state, rows, texts, vectors.take(slice(offset, offset + batch_size)))
+        self._flush_pending(state)
+        self._remove_from_index(state, np.flatnonzero(~state.catalog.alive.values).tolist())
+        return True
         
-        if self.index is None:
-            self.index = faiss.IndexFlatL2(len(embedding))
+    @property
+    def _snapshot_config(self) -> Dict:
+        """Index settings a snapshot is built with; part of its key and meta"""
+        return {
+            "db_type": self.db_type,
+            "index_type": self.index_type,
+            "index_params": self.index_params,
+            "storage": self.storage
+        }
+        
+    def _save_snapshot(self, state: "_IndexState", key: str):
+        """Persist stored vectors, index and catalog columns for fast reload"""
+        write_index = None
+        # Shards are rebuilt from the stored vectors on load
+        if self.db_type == "faiss" and state.index is not None and not isinstance(state.index, ShardedIndex):
+            write_index = lambda path: import_faiss().write_index(state.index, path)
             
-        self.index.add(np.array([embedding]))
-        self.id_to_product[len(self.id_to_product)] = product
+        self.snapshots.save(
+            key,
+            state.vectors,
+            state.catalog,
+            meta={
+                "model": self.embedding_model_name,
+                **self._snapshot_config,
+                "id_map": True,
+                "stale_vectors": state.stale_vectors,
+                "quantization": state.quantization_stats
+            },
+            write_index=write_index
+        )
         
-    def search(self, query: str, top_k: int = 5, threshold: float = 0.3) -> List[Tuple[Dict, float]]:
+    def _add_batch_to_chroma(self, state: "_IndexState", rows: range, texts: List[str], embeddings: np.ndarray):
+        """Add a batch of catalog rows to the Chroma collection in one call"""
+        state.collection.add(
+            ids=[str(row) for row in rows],
+            embeddings=embeddings.tolist(),
+            documents=texts,
+            metadatas=[self._chroma_metadata(state, row) for row in rows]
+        )
+        
+    def _chroma_metadata(self, state: "_IndexState", row: int) -> Dict:
+        """
+        Numeric price/rating and per-tag flags so `where` filters can use them.
+        A missing price is left out (with priced = 0) rather than stored as a
+        number, so chroma_where can treat it the way ProductFilter treats NaN.
+        """
+        price = state.catalog.prices.data[row]
+        rating = state.catalog.ratings.data[row]
+        metadata = {
+            "priced": int(not np.isnan(price)),
+            "category": state.catalog.category_names[state.catalog.category_codes.data[row]],
+            "rating": float(rating) if not np.isnan(rating) else 0.0
+        }
+        if not np.isnan(price):
+            metadata["price"] = float(price)
+        for tag in state.catalog.tags_of(row):
+            metadata[tag_key(tag)] = 1
+        return metadata
+        
+    def _add_batch_to_faiss(self, state: "_IndexState", rows: range, embeddings: np.ndarray):
+        """
+        Add a batch of catalog rows to the FAISS index in one call. Catalog
+        row numbers are used as FAISS ids, so rows can be removed later.
+        Engines that need training buffer batches until `train_size` vectors
+        are available (or the ingest ends, see _flush_pending).
+        """
+        vectors = normalize(embeddings)
+        ids = np.arange(rows.start, rows.stop, dtype=np.int64)
+        
+        if state.index is None and requires_training(self.index_type, self.storage):
+            state.pending.append((ids, vectors))
+            if sum(len(v) for _, v in state.pending) >= self.index_params["train_size"]:
+                self._flush_pending(state)
+            return
+        if state.index is None:
+            state.index = self._create_index(vectors.shape[1])
+        state.index.add_with_ids(vectors, ids)
+        
+    def _create_index(self, dim: int, n_train: int = 0):
+        """Empty id-mapped FAISS index, sharded across worker processes when shards > 1"""
+        if self.shards > 1:
+            return ShardedIndex(self.shards, dim, self.index_type, self.index_params, n_train, self.storage)
+        return create_id_index(dim, self.index_type, self.index_params, n_train=n_train, storage=self.storage)
+        
+    def _search_index(self, state: "_IndexState", queries: np.ndarray, k: int, mask: np.ndarray = None):
+        """FAISS search of normalized queries, restricted to rows set in `mask` if given"""
+        if isinstance(state.index, ShardedIndex):
+            return state.index.search(queries, k, mask=mask)
+        if mask is None:
+            return state.index.search(queries, k)
+        params, _bitmap = search_parameters(state.index, self.index_params, mask)
+        return state.index.search(queries, k, params=params)
+        
+    def _flush_pending(self, state: "_IndexState"):
+        """Train an IVF index on the buffered vectors and add them"""
+        if not state.pending:
+            return
+        ids = np.concatenate([ids for ids, _ in state.pending])
+        vectors = np.vstack([vectors for _, vectors in state.pending])
+        state.pending = []
+        state.index = self._create_index(vectors.shape[1], n_train=len(vectors))
+        state.index.train(vectors)
+        state.index.add_with_ids(vectors, ids)
+        
+    def search(self, query: str, top_k: int = 5, threshold: float = 0.3,
+               preferences: Dict = None, query_embedding: np.ndarray = None) -> List[Tuple[Dict, float]]:
         """
         Search for similar products
         Returns list of (product, similarity_score) tuples
+        
+        `preferences` (from ProductRecommendationAgent.extract_preferences) are
+        applied inside the search, so up to top_k matching products come back
+        without over-fetching.
+        
+        With hybrid search, BM25 matches are fused with the vector results
+        and ranked by the fused relevance (see _fuse_lexical); scores are
+        still vector similarities and `threshold` applies to every result.
+        Each product then also carries its fused score as "relevance" (in
+        (0, 1], 1 for the top result of both retrievers), so callers that
+        re-rank can keep the fused order.
+        
+        `query_embedding` skips encoding when the caller already has it.
         """
-        query_embedding = self.embedding_model.encode(query)
+        start = time.perf_counter()
+        if query_embedding is None:
+            query_embedding = self.encode_query(query)
+        depth = max(top_k, HYBRID_CANDIDATES) if self.hybrid else top_k
         
-        if self.db_type == "chroma":
-            return self._search_chroma(query_embedding, top_k, threshold)
-        elif self.db_type == "faiss":
-            return self._search_faiss(query_embedding, top_k, threshold)
+        # One generation for the whole search; a rebuild swapped in meanwhile
+        # is picked up by the next call
+        with self._lock.read():
+            state = self._state
+            plan = self._filter_plan(state, preferences)
+            if self.db_type == "chroma":
+                hits = self._search_chroma(state, query_embedding, depth, threshold, plan)
+            elif self.db_type == "faiss":
+                hits = self._search_faiss(state, query_embedding, depth, threshold, plan)
+            if self.hybrid:
+                hits = self._fuse_lexical(state, query, query_embedding, hits, top_k, threshold, plan)
+        SEARCH_SECONDS.observe(time.perf_counter() - start, backend=self.db_type, filtered=str(bool(preferences)).lower())
+        return hits
+        
+    def _fuse_lexical(self, state: "_IndexState", query: str, query_embedding, hits: List[Tuple[Dict, float]],
+                      top_k: int, threshold: float, plan: Dict = None) -> List[Tuple[Dict, float]]:
+        """
+        Reciprocal rank fusion of vector hits with BM25 hits for the same
+        query and filter plan. Each list contributes 1 / (RRF_K + rank) and
+        results are ordered by the sum; ties keep the vector order. Scores
+        stay vector similarities: lexical-only matches are scored against
+        the query embedding from their stored vectors and, like the vector
+        hits, dropped below `threshold`. The fused score, divided by its
+        maximum 2 / (RRF_K + 1), is stored on each product as "relevance".
+        """
+        mask = plan["mask"] if plan is not None else None
+        rows, _ = state.lexical_index.search(query, max(top_k, HYBRID_CANDIDATES), mask)
+        
+        fused = {}
+        for rank, (product, similarity) in enumerate(hits, 1):
+            fused[state.catalog.row_of(product['id'])] = [1.0 / (RRF_K + rank), product, similarity]
+        lexical_only = [row for row in rows.tolist() if row not in fused]
+        if lexical_only:
+            query_vector = normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+            cosines = normalize(state.vectors.take(lexical_only)) @ query_vector
+            similarities = dict(zip(lexical_only, cosine_to_similarity(cosines).tolist()))
+        for rank, row in enumerate(rows.tolist(), 1):
+            entry = fused.get(row)
+            if entry is None:
+                if similarities[row] < threshold:
+                    continue
+                entry = fused[row] = [0.0, state.catalog.get(row), similarities[row]]
+            entry[0] += 1.0 / (RRF_K + rank)
+            
+        ranked = sorted(fused.values(), key=lambda entry: entry[0], reverse=True)[:top_k]
+        for score, product, _similarity in ranked:
+            product["relevance"] = score * (RRF_K + 1) / 2.0
+        return [(product, similarity) for _score, product, similarity in ranked]
             
-    def _search_chroma(self, query_embedding, top_k: int, threshold: float) -> List[Tuple[Dict, float]]:
-        """Search using Chroma"""
-        if not CHROMADB_AVAILABLE or self.collection is None:
+    def _filter_plan(self, state: "_IndexState", preferences: Dict = None) -> Dict:
+        """Filter plan for a search; also masks deleted rows an index still holds"""
+        plan = state.product_filter.plan(preferences) if preferences else None
+        if plan is None and state.stale_vectors and self.db_type == "faiss":
+            plan = {"mask": state.catalog.alive.values}
+        return plan
+        
+    def search_many(self, queries: Iterable[str], top_k: int = 5, threshold: float = 0.3,
+                    chunk_size: int = SEARCH_MANY_CHUNK_SIZE) -> List[List[Tuple[Dict, float]]]:
+        """
+        Search for many queries at once.
+        Queries are processed in chunks of `chunk_size`: each chunk is encoded
+        with one batched model call and searched with one matrix query, so
+        memory stays bounded however many queries are passed.
+        Returns one result list per query, in the same format as search().
+        """
+        start = time.perf_counter()
+        queries = iter(queries)
+        chunk_size = max(1, int(chunk_size))
+        depth = max(top_k, HYBRID_CANDIDATES) if self.hybrid else top_k
+        results = []
+        while True:
+            chunk = list(islice(queries, chunk_size))
+            if not chunk:
+                break
+            embeddings = self.encode_queries(chunk)
+            with self._lock.read():
+                state = self._state
+                if self.db_type == "chroma":
+                    hits = self._search_chroma_many(state, embeddings, depth, threshold)
+                elif self.db_type == "faiss":
+                    hits = self._search_faiss_many(state, embeddings, depth, threshold)
+                if self.hybrid:
+                    plan = self._filter_plan(state)
+                    hits = [self._fuse_lexical(state, query, embedding, query_hits, top_k, threshold, plan)
+                            for query, embedding, query_hits in zip(chunk, embeddings, hits)]
+            results.extend(hits)
+        SEARCH_MANY_SECONDS.observe(time.perf_counter() - start, backend=self.db_type)
+        SEARCH_MANY_QUERIES.inc(len(results), backend=self.db_type)
+        return results
+        
+    async def asearch(self, query: str, top_k: int = 5, threshold: float = 0.3, preferences: Dict = None,
+                      timeout: float = None) -> List[Tuple[Dict, float]]:
+        """search() on the bounded executor; raises asyncio.TimeoutError after `timeout` seconds"""
+        return await self.executor.run(self.search, query, top_k, threshold, preferences, timeout=timeout)
+        
+    async def asearch_many(self, queries: Iterable[str], top_k: int = 5, threshold: float = 0.3,
+                           chunk_size: int = SEARCH_MANY_CHUNK_SIZE,
+                           timeout: float = None) -> List[List[Tuple[Dict, float]]]:
+        """search_many() on the bounded executor"""
+        return await self.executor.run(self.search_many, list(queries), top_k, threshold, chunk_size, timeout=timeout)
+        
+    async def aadd_products(self, products: List[Dict], batch_size: int = EMBEDDING_BATCH_SIZE,
+                            timeout: float = None) -> Dict:
+        """
+        add_products() on the bounded executor. A timeout or cancellation
+        only stops waiting once the ingest has started; it still completes.
+        """
+        return await self.executor.run(self.add_products, products, batch_size, timeout=timeout)
+        
+    def _normalize_query(self, query: str) -> str:
+        """
+        Query cache key: whitespace collapsed, and lowercased only for an
+        uncased embedder, so queries sharing a key embed identically. The
+        model itself always sees the original query.
+        """
+        key = " ".join(query.split())
+        return key.lower() if self.embedder.uncased else key
+        
+    def encode_query(self, query: str) -> np.ndarray:
+        """Embed a query, reusing the cached embedding for repeated queries"""
+        key = self._normalize_query(query)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = self.embedder.encode(query)
+            embedding.setflags(write=False)
+            self.query_cache.put(key, embedding)
+        return embedding
+        
+    def encode_queries(self, queries: List[str], cache_results: bool = False) -> np.ndarray:
+        """
+        Embed a list of queries with one model call for the cache misses.
+        Cached embeddings are reused but batch results are only added to the
+        cache with `cache_results` (interactive micro-batches), so offline
+        jobs do not evict interactive queries.
+        """
+        keys = [self._normalize_query(query) for query in queries]
+        cached = {key: self.query_cache.get(key) for key in set(keys)}
+        # One original spelling per missing key is what the model embeds
+        originals = dict(zip(keys, queries))
+        missing = [key for key, embedding in cached.items() if embedding is None]
+        if missing:
+            encoded = self.embedder.encode_batch([originals[key] for key in missing])
+            cached.update(zip(missing, encoded))
+            if cache_results:
+                for key, embedding in zip(missing, encoded):
+                    embedding.setflags(write=False)
+                    self.query_cache.put(key, embedding)
+        return np.vstack([cached[key] for key in keys])
+        
+    def _search_chroma(self, state: "_IndexState", query_embedding, top_k: int, threshold: float,
+                       plan: Dict = None) -> List[Tuple[Dict, float]]:
+        """Search using Chroma, with preference predicates as a `where` clause"""
+        if state.collection is None:
             return []
+        if plan is not None:
+            top_k = min(top_k, int(plan["mask"].sum()))
             
         try:
-            results = self.collection.query(
+            results = state.collection.query(
                 query_embeddings=[query_embedding.tolist()],
-                n_results=top_k
+                n_results=top_k,
+                where=chroma_where(plan)
             )
             
-            products_with_scores = []
             if results and results['ids'] and len(results['ids']) > 0:
-                for i, product_id in enumerate(results['ids'][0]):
-                    metadata = results['metadatas'][0][i]
-                    distance = results['distances'][0][i]
-                    
-                    # Convert distance to similarity (cosine distance: 0=similar, 2=dissimilar)
-                    similarity = 1 - (distance / 2)
-                    
-                    if similarity >= threshold:
-                        product = json.loads(metadata['full_data'])
-                        products_with_scores.append((product, similarity))
-                        
-            return sorted(products_with_scores, key=lambda x: x[1], reverse=True)
+                return self._chroma_hits(state, results['ids'][0], results['distances'][0], threshold)
+            return []
         except Exception as e:
+            SEARCH_ERRORS.inc(backend="chroma")
             print(f"ChromaDB search error: {e}")
             return []
+            
+    def _search_chroma_many(self, state: "_IndexState", query_embeddings: np.ndarray, top_k: int,
+                            threshold: float) -> List[List[Tuple[Dict, float]]]:
+        """Search Chroma with a matrix of query embeddings in one call"""
+        if state.collection is None:
+            return [[] for _ in range(len(query_embeddings))]
+            
+        try:
+            results = state.collection.query(
+                query_embeddings=query_embeddings.tolist(),
+                n_results=top_k
+            )
+            return [
+                self._chroma_hits(state, ids, distances, threshold)
+                for ids, distances in zip(results['ids'], results['distances'])
+            ]
+        except Exception as e:
+            SEARCH_ERRORS.inc(backend="chroma")
+            print(f"ChromaDB search error: {e}")
+            return [[] for _ in range(len(query_embeddings))]
+            
+    def _chroma_hits(self, state: "_IndexState", rows, distances, threshold: float) -> List[Tuple[Dict, float]]:
+        """Turn one Chroma result row into (product, similarity) tuples"""
+        products_with_scores = []
+        for row, distance in zip(rows, distances):
+            # Cosine distance is 1 - cosine (0=similar, 2=dissimilar)
+            similarity = cosine_to_similarity(1 - distance)
+            
+            if similarity >= threshold:
+                product = state.catalog.get(int(row))
+                products_with_scores.append((product, similarity))
+                
+        return sorted(products_with_scores, key=lambda x: x[1], reverse=True)
         
-    def _search_faiss(self, query_embedding, top_k: int, threshold: float) -> List[Tuple[Dict, float]]:
-        """Search using FAISS"""
-        if self.index is None or self.index.ntotal == 0:
+    def _search_faiss(self, state: "_IndexState", query_embedding, top_k: int, threshold: float,
+                      plan: Dict = None) -> List[Tuple[Dict, float]]:
+        """Search using FAISS, restricted to rows selected by the filter plan"""
+        if state.index is None or state.index.ntotal == 0:
             return []
             
-        distances, indices = self.index.search(np.array([query_embedding]), min(top_k, self.index.ntotal))
+        query = normalize(query_embedding)
+        if plan is None:
+            scores, indices = self._search_index(state, query, min(top_k, state.index.ntotal))
+        else:
+            scores, indices = self._search_faiss_filtered(state, query, top_k, plan["mask"])
+        return self._faiss_hits(state, indices[0], scores[0], top_k, threshold)
         
+    def _search_faiss_many(self, state: "_IndexState", query_embeddings: np.ndarray, top_k: int,
+                           threshold: float) -> List[List[Tuple[Dict, float]]]:
+        """Search FAISS with a matrix of query embeddings in one call"""
+        if state.index is None or state.index.ntotal == 0:
+            return [[] for _ in range(len(query_embeddings))]
+            
+        plan = self._filter_plan(state)
+        if plan is None:
+            scores, indices = self._search_index(state, normalize(query_embeddings), min(top_k, state.index.ntotal))
+        else:
+            scores, indices = self._search_index(state, normalize(query_embeddings), top_k, plan["mask"])
+        return [self._faiss_hits(state, rows, cosines, top_k, threshold) for rows, cosines in zip(indices, scores)]
+        
+    def _faiss_hits(self, state: "_IndexState", indices, scores, top_k: int, threshold: float) -> List[Tuple[Dict, float]]:
+        """Turn one FAISS result row into (product, similarity) tuples"""
         products_with_scores = []
-        for idx, distance in zip(indices[0], distances[0]):
+        for idx, cosine in zip(indices, scores):
             if idx == -1:
                 continue
-            # Convert L2 distance to similarity score (0-1)
-            similarity = 1 / (1 + distance)
+            # Inner product of normalized vectors is cosine; map to the Chroma 0-1 scale
+            similarity = float(cosine_to_similarity(cosine))
             
             if similarity >= threshold:
-                product = self.id_to_product[int(idx)]
+                product = state.catalog.get(idx)
                 products_with_scores.append((product, similarity))
                 
         return products_with_scores[:top_k]
         
+    def _search_faiss_filtered(self, state: "_IndexState", query: np.ndarray, top_k: int, mask: np.ndarray):
+        """
+        Top-k among the rows set in `mask`. Approximate engines can miss
+        matches under a selective filter, so small selections are scored
+        exactly against the stored embeddings instead.
+        """
+        selected = int(mask.sum())
+        top_k = min(top_k, selected)
+        
+        if not is_exact(self.index_type) and selected <= FILTER_BRUTE_FORCE_LIMIT and len(state.vectors):
+            rows = np.flatnonzero(mask)
+            cosines = normalize(state.vectors.take(rows)) @ query[0]
+            top = np.argpartition(-cosines, top_k - 1)[:top_k]
+            top = top[np.argsort(-cosines[top], kind="stable")]
+            return cosines[top][None, :], rows[top][None, :]
+            
+        return self._search_index(state, query, top_k, mask)
+        
+    def _quantization_report(self, state: "_IndexState", reference: np.ndarray, k: int = QUANTIZATION_RECALL_K,
+                             sample: int = 200) -> Dict:
+        """
+        Memory saved by compressed storage (stored embeddings plus the index,
+        against a float32 index alone) and recall@k against exact float32
+        search, using up to `sample` catalog rows as queries.
+        """
+        reference = normalize(reference)
+        queries = reference[np.linspace(0, len(reference) - 1, min(sample, len(reference))).astype(int)]
+        exact = exact_top_k(reference, queries, k)
+        if self.db_type == "faiss" and state.index is not None:
+            _, approx = self._search_index(state, queries, min(k, state.index.ntotal))
+        else:
+            approx = exact_top_k(normalize(state.vectors.take(slice(None))), queries, k)
+            
+        if self.db_type == "faiss":
+            index_bytes = index_nbytes(state.index, self.storage) if state.index is not None else 0
+        else:
+            index_bytes = reference.nbytes  # Chroma keeps its own float32 copy
+        return storage_report(reference.nbytes, state.vectors.nbytes(), index_bytes, recall_at_k(exact, approx), k,
+                              self.storage)
+        
     def get_all_products(self) -> List[Dict]:
         """Get all products in database"""
-        return self.products
+        with self._lock.read():
+            return self._state.catalog.to_dicts()
+
+
+_shared_databases: Dict[tuple, VectorDatabase] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_database(products: Iterable[Dict], fingerprint: str = None, **kwargs) -> VectorDatabase:
+    """
+    Process-wide VectorDatabase loaded with `products` (a list, or any other
+    iterable, which is streamed with add_product_stream), built once per
+    catalog and set of constructor arguments. The catalog is identified by
+    `fingerprint`, which a stream must supply (e.g. loader.catalog_fingerprint
+    of its files); a list defaults to a hash of its contents. Concurrent
+    first callers block on a lock until the model is loaded and the catalog
+    is indexed, and then every caller gets the same instance. Searches may
+    run from any number of threads alongside rebuild/upsert/delete, which
+    swap or update the index under a write lock.
+    """
+    if fingerprint is None:
+        if not isinstance(products, list):
+            raise ValueError("get_shared_database needs a fingerprint for a product stream")
+        fingerprint = catalog_key(products, "")
+    key = (fingerprint,) + tuple(sorted((name, repr(value)) for name, value in kwargs.items()))
+    database = _shared_databases.get(key)
+    if database is None:
+        with _shared_lock:
+            database = _shared_databases.get(key)
+            if database is None:
+                database = VectorDatabase(**kwargs)
+                if isinstance(products, list):
+                    database.add_products(products)
+                else:
+                    database.add_product_stream(products, fingerprint=fingerprint)
+                _shared_databases[key] = database
+    return database
@@ -0,0 +1,164 @@
+"""
+Text embedders for VectorDatabase: the SentenceTransformer backend and a
+weight-free feature-hashing backend. Select one with get_embedder() using
+an EMBEDDING_MODEL spec: a sentence-transformers model name, or
+"hashing" / "hashing:<dim>".
+"""
+import time
+import threading
+import numpy as np
+from typing import Sequence, Tuple
+
+from config.settings import EMBEDDING_BATCH_SIZE, EMBEDDING_DIM
+
+HASHING_PREFIX = "hashing"
+
+
+class BaseEmbedder:
+    """Turns texts into float32 vectors of a fixed dimension"""
+
+    name = "base"
+    load_seconds = None  # Time spent loading model weights, if any
+    uncased = False  # True if the embedding ignores letter case
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def encode(self, text: str) -> np.ndarray:
+        """Embed one text as a 1-D float32 vector"""
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+        """Embed texts as a (len(texts), dimension) float32 matrix"""
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Load whatever the first encode would otherwise load"""
+        self.encode("warm up")
+
+
+class SentenceTransformerEmbedder(BaseEmbedder):
+    """sentence-transformers model, loaded (once, thread-safely) on first use"""
+
+    def __init__(self, model_name: str):
+        self.name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    start = time.perf_counter()
+                    self._model = SentenceTransformer(self.name)
+                    self.load_seconds = time.perf_counter() - start
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def uncased(self) -> bool:
+        return bool(getattr(self.model.tokenizer, "do_lower_case", False))
+
+    def encode(self, text: str) -> np.ndarray:
+        return np.asarray(self.model.encode(text), dtype=np.float32)
+
+    def encode_batch(self, texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.asarray(self.model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+
+# Multiplier (the 64-bit FNV prime) and finalizer constant of the n-gram hash
+_HASH_PRIME = np.uint64(1099511628211)
+_HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+class HashingEmbedder(BaseEmbedder):
+    """
+    Feature hashing of character n-grams: each lowercased n-gram (byte-level,
+    word boundaries marked by spaces) adds +/-1 to one of `dim` buckets and
+    the result is L2-normalized. Needs no weights, is deterministic across
+    processes, and is vectorized over the whole batch with NumPy.
+    """
+
+    uncased = True
+
+    def __init__(self, dim: int = EMBEDDING_DIM, ngram_range: Tuple[int, int] = (3, 5)):
+        self.dim = int(dim)
+        self.ngram_range = tuple(ngram_range)
+        self.name = f"{HASHING_PREFIX}:{self.dim}"
+        if self.ngram_range != (3, 5):
+            self.name += f":{self.ngram_range[0]}-{self.ngram_range[1]}"
+
+    @property
+    def dimension(self) -> int:
+        return self.dim
+
+    def warm_up(self):
+        pass
+
+    def encode_batch(self, texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+        texts = list(texts)
+        batch_size = max(1, int(batch_size))
+        if len(texts) <= batch_size:
+            return self._encode_chunk(texts)
+        return np.vstack([self._encode_chunk(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
+
+    def _encode_chunk(self, texts: Sequence[str]) -> np.ndarray:
+        encoded = [f" {' '.join(text.lower().split())} ".encode("utf-8") for text in texts]
+        vectors = np.zeros((len(encoded), self.dim), dtype=np.float64)
+        if not encoded:
+            return vectors.astype(np.float32)
+
+        lengths = np.array([len(b) for b in encoded], dtype=np.int64)
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        owner = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            count = len(data) - n + 1
+            if count <= 0:
+                continue
+            # Polynomial hash of every n-byte window, seeded with n so sizes differ
+            hashes = np.full(count, n, dtype=np.uint64)
+            for offset in range(n):
+                hashes = hashes * _HASH_PRIME + data[offset:offset + count]
+            hashes ^= hashes >> np.uint64(29)
+            hashes *= _HASH_MIX
+            hashes ^= hashes >> np.uint64(32)
+
+            # Keep windows that start and end inside the same text
+            valid = owner[:count] == owner[n - 1:n - 1 + count]
+            hashes = hashes[valid]
+            rows = owner[:count][valid]
+            buckets = (hashes % np.uint64(self.dim)).astype(np.int64)
+            signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+            vectors += np.bincount(
+                rows * self.dim + buckets, weights=signs, minlength=len(encoded) * self.dim
+            ).reshape(len(encoded), self.dim)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+
+
+def get_embedder(spec) -> BaseEmbedder:
+    """
+    Embedder for an EMBEDDING_MODEL spec. "hashing" or "hashing:<dim>" selects
+    HashingEmbedder; anything else is a sentence-transformers model name.
+    BaseEmbedder instances are returned unchanged.
+    """
+    if isinstance(spec, BaseEmbedder):
+        return spec
+    parts = str(spec).split(":")
+    if parts[0] == HASHING_PREFIX:
+        dim = int(parts[1]) if len(parts) > 1 and parts[1] else EMBEDDING_DIM
+        ngram_range = tuple(int(n) for n in parts[2].split("-")) if len(parts) > 2 else (3, 5)
+        return HashingEmbedder(dim, ngram_range)
+    return SentenceTransformerEmbedder(spec)
+
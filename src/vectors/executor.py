@@ -0,0 +1,90 @@
+"""
+Bounded offload of blocking calls (model encodes, index searches, ingest)
+from asyncio code to a shared thread pool. A per-event-loop semaphore caps
+the calls admitted at once, so excess requests queue on the loop instead of
+piling up in the pool, and every call can carry a timeout. The heavy work
+(PyTorch, FAISS, NumPy) releases the GIL, so threads run it in parallel.
+"""
+import asyncio
+import weakref
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from config.settings import ASYNC_WORKERS, ASYNC_MAX_IN_FLIGHT
+from src.monitoring.metrics import REGISTRY
+
+IN_FLIGHT = REGISTRY.gauge("async_calls_in_flight", "Offloaded calls admitted and not yet finished", ["executor"])
+WAITING = REGISTRY.gauge("async_calls_waiting", "Offloaded calls waiting for admission", ["executor"])
+TIMEOUTS = REGISTRY.counter("async_call_timeouts_total", "Offloaded calls that exceeded their timeout", ["executor"])
+
+
+class BoundedExecutor:
+    """
+    Runs blocking functions on `max_workers` threads for coroutines, with
+    at most `max_in_flight` calls admitted per event loop.
+    A timeout or cancellation stops the caller waiting and withdraws a call
+    that has not started yet; a call already running finishes in its thread.
+    """
+
+    def __init__(self, max_workers: int = ASYNC_WORKERS, max_in_flight: int = ASYNC_MAX_IN_FLIGHT,
+                 name: str = "vector-offload"):
+        self.max_workers = max(1, int(max_workers))
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.name = name
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix=name)
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_in_flight)
+        return semaphore
+
+    async def _run(self, call: Callable[[], Any]) -> Any:
+        semaphore = self._semaphore()
+        WAITING.inc(executor=self.name)
+        try:
+            await semaphore.acquire()
+        finally:
+            WAITING.dec(executor=self.name)
+        IN_FLIGHT.inc(executor=self.name)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, call)
+        finally:
+            IN_FLIGHT.dec(executor=self.name)
+            semaphore.release()
+
+    async def run(self, function: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Await function(*args, **kwargs) on the pool. `timeout` covers the
+        wait for admission as well as the call; asyncio.TimeoutError is
+        raised when it expires.
+        """
+        call = functools.partial(function, *args, **kwargs)
+        if timeout is None:
+            return await self._run(call)
+        try:
+            return await asyncio.wait_for(self._run(call), timeout)
+        except asyncio.TimeoutError:
+            TIMEOUTS.inc(executor=self.name)
+            raise
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_default_executor = None
+_default_lock = threading.Lock()
+
+
+def get_default_executor() -> BoundedExecutor:
+    """Process-wide executor shared by VectorDatabase and RecommendationPipeline async methods"""
+    global _default_executor
+    if _default_executor is None:
+        with _default_lock:
+            if _default_executor is None:
+                _default_executor = BoundedExecutor()
+    return _default_executor
@@ -0,0 +1,182 @@
+"""
+FAISS index factory: flat inner product, HNSW, IVF and IVF-PQ engines.
+All engines index L2-normalized vectors with inner product, so scores are
+cosine similarities whatever engine is selected.
+"""
+import math
+import numpy as np
+from typing import Dict
+
+_faiss = None
+
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
+
+DEFAULT_INDEX_PARAMS = {
+    "hnsw_m": 32,            # HNSW graph degree
+    "ef_construction": 40,   # HNSW build-time candidate list size
+    "ef_search": 64,         # HNSW query-time candidate list size
+    "nlist": 1024,           # IVF coarse clusters (capped by training set size)
+    "nprobe": 16,            # IVF clusters visited per query
+    "pq_m": 16,              # IVF-PQ sub-quantizers (must divide the dimension)
+    "pq_nbits": 8,           # IVF-PQ bits per sub-quantizer code
+    "train_size": 50000      # Vectors buffered to train IVF engines
+}
+
+# Bytes per dimension of the vector codes kept for each embedding storage type
+STORAGE_BYTES = {"float32": 4, "float16": 2, "int8": 1}
+
+# faiss warns below this many training points per IVF cluster
+_MIN_POINTS_PER_CENTROID = 39
+
+
+def import_faiss():
+    """Import faiss on first use (it is slow to load); raises ImportError if unavailable"""
+    global _faiss
+    if _faiss is None:
+        try:
+            import faiss
+        except (ImportError, Exception) as e:
+            raise ImportError(f"FAISS is not installed. Install with: pip install faiss-cpu ({e})") from e
+        _faiss = faiss
+    return _faiss
+
+
+def faiss_available() -> bool:
+    try:
+        import_faiss()
+        return True
+    except ImportError:
+        return False
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Return an L2-normalized float32 copy of a 2-D array"""
+    vectors = np.array(vectors, dtype=np.float32, copy=True, ndmin=2)
+    import_faiss().normalize_L2(vectors)
+    return vectors
+
+
+def cosine_to_similarity(cosine):
+    """
+    Map cosine similarity in [-1, 1] onto the [0, 1] score used by `threshold`.
+    This matches the Chroma conversion 1 - cosine_distance / 2; compressed
+    engines can land marginally outside the range, so the result is clipped.
+    """
+    return np.clip((1.0 + cosine) / 2.0, 0.0, 1.0)
+
+
+def requires_training(index_type: str, storage: str = "float32") -> bool:
+    """IVF engines and int8 scalar quantization learn from a training sample"""
+    return index_type in ("ivf", "ivfpq") or storage == "int8"
+
+
+def _scalar_quantizer_type(storage: str):
+    faiss = import_faiss()
+    return {"float16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}.get(storage)
+
+
+def create_index(dim: int, index_type: str = "flat", params: Dict = None, n_train: int = 0,
+                 storage: str = "float32"):
+    """
+    Build an empty inner-product index. IVF engines size their coarse
+    quantizer (and PQ codebooks) from `n_train`, the number of vectors that
+    will be used to train them. With float16/int8 `storage`, flat, HNSW and
+    IVF engines keep scalar-quantized codes instead of float32 vectors
+    (IVF-PQ is already compressed and ignores it).
+    """
+    faiss = import_faiss()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type '{index_type}'. Options: {', '.join(INDEX_TYPES)}")
+    params = dict(DEFAULT_INDEX_PARAMS, **(params or {}))
+    metric = faiss.METRIC_INNER_PRODUCT
+    qtype = _scalar_quantizer_type(storage)
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim) if qtype is None else faiss.IndexScalarQuantizer(dim, qtype, metric)
+    elif index_type == "hnsw":
+        if qtype is None:
+            index = faiss.IndexHNSWFlat(dim, params["hnsw_m"], metric)
+        else:
+            index = faiss.IndexHNSWSQ(dim, qtype, params["hnsw_m"], metric)
+        index.hnsw.efConstruction = params["ef_construction"]
+    else:
+        nlist = max(1, min(params["nlist"], n_train // _MIN_POINTS_PER_CENTROID))
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf" and qtype is None:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+        elif index_type == "ivf":
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, qtype, metric)
+        else:
+            pq_m = max(m for m in range(1, params["pq_m"] + 1) if dim % m == 0)
+            pq_nbits = max(1, min(params["pq_nbits"], int(math.log2(max(n_train, 2)))))
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_nbits, metric)
+
+    configure_search(index, params)
+    return index
+
+
+def create_id_index(dim: int, index_type: str = "flat", params: Dict = None, n_train: int = 0,
+                    storage: str = "float32"):
+    """
+    Index that stores caller-supplied int64 ids. IVF engines take ids
+    natively; flat and HNSW are wrapped in IndexIDMap2.
+    """
+    index = create_index(dim, index_type, params, n_train, storage)
+    if requires_training(index_type):
+        return index
+    return import_faiss().IndexIDMap2(index)
+
+
+def configure_search(index, params: Dict = None):
+    """Apply query-time tunables (efSearch, nprobe) where the engine has them"""
+    params = dict(DEFAULT_INDEX_PARAMS, **(params or {}))
+    space = import_faiss().ParameterSpace()
+    for name, key in (("efSearch", "ef_search"), ("nprobe", "nprobe")):
+        try:
+            space.set_index_parameter(index, name, params[key])
+        except RuntimeError:
+            pass  # Engine does not have this parameter
+
+
+def index_nbytes(index, storage: str = "float32") -> int:
+    """
+    Bytes of vector codes held by an index. Graph links and IVF list
+    overhead are left out: they do not depend on the storage type. Objects
+    that are not FAISS indexes (ShardedIndex) are estimated from `storage`.
+    """
+    faiss = import_faiss()
+    if not isinstance(index, faiss.Index):
+        return index.ntotal * index.dim * STORAGE_BYTES[storage]
+    base = faiss.downcast_index(index)
+    if isinstance(base, faiss.IndexIDMap):
+        base = faiss.downcast_index(base.index)
+    if isinstance(base, faiss.IndexHNSW):
+        return base.ntotal * faiss.downcast_index(base.storage).sa_code_size()
+    return base.ntotal * base.sa_code_size()
+
+
+def is_exact(index_type: str) -> bool:
+    """Whether the engine scans every vector (filtered search is then exact)"""
+    return index_type == "flat"
+
+
+def search_parameters(index, params: Dict, mask: np.ndarray):
+    """
+    Search parameters restricting results to rows set in a boolean mask.
+    The packed bitmap is returned too: it must stay alive during the search.
+    """
+    faiss = import_faiss()
+    params = dict(DEFAULT_INDEX_PARAMS, **(params or {}))
+    bitmap = np.packbits(mask.astype(bool), bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+
+    base = faiss.downcast_index(index)
+    if isinstance(base, faiss.IndexIDMap):
+        base = faiss.downcast_index(base.index)
+    if isinstance(base, faiss.IndexHNSW):
+        search_params = faiss.SearchParametersHNSW(sel=selector, efSearch=params["ef_search"])
+    elif isinstance(base, faiss.IndexIVF):
+        search_params = faiss.SearchParametersIVF(sel=selector, nprobe=params["nprobe"])
+    else:
+        search_params = faiss.SearchParameters(sel=selector)
+    return search_params, bitmap
@@ -0,0 +1,266 @@
+"""
+Preference predicates evaluated over the whole catalog for filter pushdown.
+Mirrors ProductRecommendationAgent.filter_products: price and rating are
+strict, category and feature filters only apply if something matches, and
+if nothing survives the filters the search runs unfiltered. Deleted
+catalog rows are never selected.
+
+ProductFilter also serves as the prebuilt filter index behind
+ProductRecommendationAgent.filter_products: select() applies the same rules
+to a candidate list by gathering the candidates' columns and binary
+searching tag postings.
+"""
+import numpy as np
+from typing import List, Dict, Optional, Sequence
+
+# patched() keeps changed rows in an overlay until it holds more than
+# max(OVERLAY_MIN_ROWS, OVERLAY_SQRT_FACTOR * sqrt(catalog rows)) rows, then
+# rebuilds. Each patch copies the overlay and each rebuild is O(catalog), so
+# a sqrt-sized overlay keeps the amortized cost of a small patch near O(sqrt N).
+OVERLAY_MIN_ROWS = 1024
+OVERLAY_SQRT_FACTOR = 4
+
+
+class ProductFilter:
+    """
+    Builds search-time filters from the columns of a CatalogStore. The
+    columns are copied, so a filter is a consistent snapshot of the catalog
+    that later writes do not change; use patched() to follow them.
+
+    Columns are held as (alive, prices, ratings, category_codes): the base
+    copy taken at the full build, plus an overlay with the current values of
+    the rows changed or appended since, which takes precedence.
+    """
+
+    def __init__(self, catalog):
+        self.size = len(catalog)
+        self.category_names = list(catalog.category_names)
+        self._base_size = self.size
+        self._base = (
+            catalog.alive.values.copy(),
+            catalog.prices.values.copy(),
+            np.nan_to_num(catalog.ratings.values, nan=0.0),
+            catalog.category_codes.values.copy(),
+        )
+        self.row_of_id = catalog.live_rows_by_id()
+
+        # Invert the row -> tags CSR into tag -> rows
+        offsets = catalog.tag_offsets.values
+        codes = catalog.tag_codes.values
+        rows = np.repeat(np.arange(self.size, dtype=np.int64), np.diff(offsets))
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(catalog.tag_names) + 1))
+        self.tag_rows = {
+            tag: rows[order[bounds[code]:bounds[code + 1]]] for code, tag in enumerate(catalog.tag_names)
+        }
+
+        self._overlay_rows = np.empty(0, dtype=np.int64)  # Sorted
+        self._overlay = tuple(column[:0] for column in self._base)
+        self._overlay_ids: Dict[int, int] = {}  # id -> current row (-1 if deleted), overrides row_of_id
+        self._appended_tag_rows: Dict[str, np.ndarray] = {}  # Postings of appended rows, by tag
+
+    def patched(self, catalog, rows: Sequence[int]) -> "ProductFilter":
+        """
+        A new filter for `catalog` after in-place changes to `rows` (updated
+        or deleted) and any rows appended since this one was built. The base
+        columns, postings and id map are shared; only the overlay is copied
+        and extended, so the cost follows the overlay, not the catalog,
+        until the overlay outgrows its limit and the filter is rebuilt. This
+        filter is left as it was, so readers holding it are unaffected.
+        """
+        size = len(catalog)
+        appended = np.arange(self.size, size, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        changed = np.union1d(rows[rows < self.size], appended)
+        overlay_rows = np.union1d(self._overlay_rows, changed)
+        if self._base_size == 0 or \
+                len(overlay_rows) > max(OVERLAY_MIN_ROWS, OVERLAY_SQRT_FACTOR * np.sqrt(self._base_size)):
+            return ProductFilter(catalog)
+
+        patched = ProductFilter.__new__(ProductFilter)
+        patched.__dict__.update(self.__dict__)
+        patched.size = size
+        patched.category_names = list(catalog.category_names)
+        patched._overlay_rows = overlay_rows
+        patched._overlay = (
+            catalog.alive.values[overlay_rows],
+            catalog.prices.values[overlay_rows],
+            np.nan_to_num(catalog.ratings.values[overlay_rows], nan=0.0),
+            catalog.category_codes.values[overlay_rows],
+        )
+
+        patched._overlay_ids = dict(self._overlay_ids)
+        ids = catalog.ids.values
+        for row in changed.tolist():
+            product_id = int(ids[row])
+            patched._overlay_ids[product_id] = catalog.row_of(product_id)
+
+        if len(appended):
+            patched._appended_tag_rows = dict(self._appended_tag_rows)
+            offsets = catalog.tag_offsets.values
+            codes = catalog.tag_codes.values
+            owners = np.repeat(appended, np.diff(offsets[self.size:size + 1]))
+            new_codes = codes[offsets[self.size]:offsets[size]]
+            for code in np.unique(new_codes).tolist():
+                tag = catalog.tag_names[code]
+                patched._appended_tag_rows[tag] = np.concatenate([
+                    self._appended_tag_rows.get(tag, np.empty(0, dtype=np.int64)), owners[new_codes == code]
+                ])
+        return patched
+
+    def _evaluate(self, predicate) -> np.ndarray:
+        """predicate(alive, prices, ratings, category_codes) as a mask over every row"""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[:self._base_size] = predicate(*self._base)
+        if len(self._overlay_rows):
+            mask[self._overlay_rows] = predicate(*self._overlay)
+        return mask
+
+    def _gather(self, rows: np.ndarray) -> List[np.ndarray]:
+        """(alive, prices, ratings, category_codes) of `rows`"""
+        columns = [column[np.minimum(rows, self._base_size - 1)] for column in self._base]
+        if len(self._overlay_rows):
+            positions = np.minimum(np.searchsorted(self._overlay_rows, rows), len(self._overlay_rows) - 1)
+            hit = self._overlay_rows[positions] == rows
+            for column, values in zip(columns, self._overlay):
+                column[hit] = values[positions[hit]]
+        return columns
+
+    def _postings(self, tag: str) -> List[np.ndarray]:
+        """Sorted rows carrying `tag`: the base postings, then those of appended rows"""
+        return [postings for postings in (self.tag_rows.get(tag), self._appended_tag_rows.get(tag))
+                if postings is not None and len(postings)]
+
+    def has_tag(self, tag: str) -> bool:
+        return tag in self.tag_rows or tag in self._appended_tag_rows
+
+    def row_of(self, product_id) -> int:
+        """Row of a live product id, or -1"""
+        row = self._overlay_ids.get(product_id)
+        return self.row_of_id.get(product_id, -1) if row is None else row
+
+    def rows_of(self, products: Sequence[Dict]) -> Optional[np.ndarray]:
+        """Catalog rows of products (matched by id), or None if any is not in the catalog"""
+        rows = np.fromiter((self.row_of(p['id']) for p in products), dtype=np.int64, count=len(products))
+        return None if (rows < 0).any() else rows
+
+    def matching_categories(self, categories: List[str]) -> List[str]:
+        """Catalog category names that contain any requested category"""
+        wanted = [c.lower() for c in categories]
+        return [name for name in self.category_names if any(c in name.lower() for c in wanted)]
+
+    def plan(self, preferences: Optional[Dict]) -> Optional[Dict]:
+        """
+        Decide which predicates apply for these preferences.
+        Returns None when no filtering is needed, otherwise a dict with the
+        active predicates and the boolean row mask they select.
+        """
+        if not preferences or self.size == 0:
+            return None
+
+        mask = self._evaluate(lambda alive, prices, ratings, codes: alive)
+        plan = {}
+
+        if preferences.get("budget_min") is not None:
+            low = plan["budget_min"] = preferences["budget_min"]
+            mask &= self._evaluate(lambda alive, prices, ratings, codes: np.isnan(prices) | (prices >= low))
+        if preferences.get("budget_max") is not None:
+            high = plan["budget_max"] = preferences["budget_max"]
+            mask &= self._evaluate(
+                lambda alive, prices, ratings, codes: (np.isnan(prices) & (high >= 0)) | (prices <= high)
+            )
+
+        if preferences.get("categories"):
+            names = self.matching_categories(preferences["categories"])
+            codes = [code for code, name in enumerate(self.category_names) if name in names]
+            category_mask = mask & self._evaluate(
+                lambda alive, prices, ratings, category_codes: np.isin(category_codes, codes)
+            )
+            if category_mask.any():
+                plan["categories"] = names
+                mask = category_mask
+
+        if preferences.get("features"):
+            feature_mask = np.zeros(self.size, dtype=bool)
+            for feature in preferences["features"]:
+                for postings in self._postings(feature):
+                    feature_mask[postings] = True
+            feature_mask &= mask
+            if feature_mask.any():
+                plan["features"] = [f for f in preferences["features"] if self.has_tag(f)]
+                mask = feature_mask
+
+        if preferences.get("rating_min", 0) > 0:
+            rating_min = plan["rating_min"] = preferences["rating_min"]
+            mask &= self._evaluate(lambda alive, prices, ratings, codes: ratings >= rating_min)
+
+        if not plan or not mask.any():
+            return None
+        plan["mask"] = mask
+        return plan
+
+
+    def select(self, rows: np.ndarray, preferences: Dict) -> np.ndarray:
+        """
+        Boolean mask over candidate `rows` with the filter_products rules:
+        strict price and rating, category and feature filters only if they
+        keep something. Cost is O(len(rows)), independent of catalog size.
+        """
+        keep = np.ones(len(rows), dtype=bool)
+        _, prices, ratings, category_codes = self._gather(rows)
+        missing_price = np.isnan(prices)
+
+        if preferences.get("budget_min") is not None:
+            keep &= missing_price | (prices >= preferences["budget_min"])
+        if preferences.get("budget_max") is not None:
+            keep &= (missing_price & (preferences["budget_max"] >= 0)) | (prices <= preferences["budget_max"])
+
+        if preferences.get("categories"):
+            names = set(self.matching_categories(preferences["categories"]))
+            codes = [code for code, name in enumerate(self.category_names) if name in names]
+            category_keep = keep & np.isin(category_codes, codes)
+            if category_keep.any():
+                keep = category_keep
+
+        if preferences.get("features"):
+            feature_keep = np.zeros(len(rows), dtype=bool)
+            for feature in preferences["features"]:
+                for postings in self._postings(feature):
+                    # Postings are sorted, so membership is a binary search per candidate
+                    positions = np.minimum(np.searchsorted(postings, rows), len(postings) - 1)
+                    feature_keep |= postings[positions] == rows
+            feature_keep &= keep
+            if feature_keep.any():
+                keep = feature_keep
+
+        if preferences.get("rating_min", 0) > 0:
+            keep &= ratings >= preferences["rating_min"]
+        return keep
+
+
+def tag_key(tag: str) -> str:
+    """Metadata key flagging that a product carries `tag` (Chroma has no list values)"""
+    return f"tag_{tag}"
+
+
+def chroma_where(plan: Optional[Dict]) -> Optional[Dict]:
+    """Translate a filter plan into a Chroma `where` clause on numeric metadata"""
+    if not plan:
+        return None
+    clauses = []
+    # Unpriced products carry no price key; like ProductFilter.plan they pass any non-negative budget
+    unpriced = {"priced": 0}
+    if "budget_min" in plan:
+        clauses.append({"$or": [unpriced, {"price": {"$gte": float(plan["budget_min"])}}]})
+    if "budget_max" in plan:
+        below = {"price": {"$lte": float(plan["budget_max"])}}
+        clauses.append({"$or": [unpriced, below]} if plan["budget_max"] >= 0 else below)
+    if "categories" in plan:
+        categories = plan["categories"]
+        clauses.append({"category": categories[0]} if len(categories) == 1 else {"category": {"$in": categories}})
+    if "features" in plan:
+        flags = [{tag_key(feature): 1} for feature in plan["features"]]
+        clauses.append(flags[0] if len(flags) == 1 else {"$or": flags})
+    if "rating_min" in plan:
+        clauses.append({"rating": {"$gte": float(plan["rating_min"])}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
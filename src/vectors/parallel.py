@@ -0,0 +1,120 @@
+"""
+Multi-process text encoding for catalog builds. Texts are split into shards
+and encoded by a pool of worker processes, each of which loads the embedder
+once. Workers write their rows straight into one shared-memory float32
+matrix, so embeddings come back without being pickled.
+"""
+import os
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Sequence
+
+import numpy as np
+
+from config.settings import EMBEDDING_BATCH_SIZE, EMBEDDING_WORKERS
+from src.vectors.embedders import BaseEmbedder, HashingEmbedder, SentenceTransformerEmbedder, get_embedder
+
+# Texts below this count are encoded in-process; a pool would not pay for its start-up
+PARALLEL_MIN_TEXTS = 2048
+# Shards per worker for one encode_batch call, so a slow shard does not hold up the rest
+SHARDS_PER_WORKER = 4
+
+_worker_embedder = None
+
+
+def _init_worker(spec, threads: int):
+    """Pool initializer: cap intra-op threads, then load the embedder once"""
+    global _worker_embedder
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+    _worker_embedder = get_embedder(spec)
+    _worker_embedder.warm_up()
+
+
+def _worker_dimension() -> int:
+    return _worker_embedder.dimension
+
+
+def _encode_shard(shm_name: str, shape: tuple, start: int, texts: Sequence[str], batch_size: int) -> int:
+    """Encode texts into rows start:start + len(texts) of the shared output matrix"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        output = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        output[start:start + len(texts)] = _worker_embedder.encode_batch(texts, batch_size=batch_size)
+        del output
+    finally:
+        shm.close()
+    return len(texts)
+
+
+def embedder_spec(embedder: BaseEmbedder):
+    """What a worker needs to rebuild `embedder`: its spec string, or the (picklable) embedder itself"""
+    if isinstance(embedder, (SentenceTransformerEmbedder, HashingEmbedder)):
+        return embedder.name
+    return embedder
+
+
+class ParallelEncoder:
+    """
+    Process pool that encodes texts with `embedder` on `workers` processes.
+    Use as a context manager, or call close(); workers start on the first
+    call with at least `min_texts` texts, smaller calls stay in-process.
+    Results match embedder.encode_batch on the same texts.
+    """
+
+    def __init__(self, embedder: BaseEmbedder, workers: int = EMBEDDING_WORKERS,
+                 batch_size: int = EMBEDDING_BATCH_SIZE, min_texts: int = PARALLEL_MIN_TEXTS):
+        self.embedder = embedder
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.min_texts = min_texts
+        self._pool = None
+        self._dimension = None
+
+    def _start(self):
+        if self._pool is None:
+            # Spawned, not forked: the parent may hold model threads and locks
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(embedder_spec(self.embedder), threads)
+            )
+            self._dimension = self._pool.submit(_worker_dimension).result()
+        return self._pool
+
+    def encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts as a (len(texts), dimension) float32 matrix"""
+        texts = list(texts)
+        if len(texts) < self.min_texts or self.workers == 1 or not texts:
+            return self.embedder.encode_batch(texts, batch_size=self.batch_size)
+        pool = self._start()
+        shape = (len(texts), self._dimension)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(texts) * self._dimension * 4))
+        try:
+            shard = max(self.batch_size, math.ceil(len(texts) / (self.workers * SHARDS_PER_WORKER)))
+            futures = [
+                pool.submit(_encode_shard, shm.name, shape, start, texts[start:start + shard], self.batch_size)
+                for start in range(0, len(texts), shard)
+            ]
+            for future in futures:
+                future.result()
+            output = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+            embeddings = output.copy()
+            del output
+        finally:
+            shm.close()
+            shm.unlink()
+        return embeddings
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> "ParallelEncoder":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
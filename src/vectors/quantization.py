@@ -0,0 +1,154 @@
+"""
+Compressed storage for embeddings: float32, float16, or int8 scalar
+quantization with per-dimension offsets and scales.
+"""
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, List
+
+from src.vectors.catalog import MatrixColumn
+
+STORAGE_TYPES = ("float32", "float16", "int8")
+CODES_FILE = "codes.npy"
+QUANTIZER_FILE = "quantizer.npz"
+META_FILE = "storage.json"
+
+
+class QuantizedMatrix:
+    """
+    Growable row store that keeps vectors in a compressed dtype and decodes
+    rows back to float32 on demand. int8 needs per-dimension ranges, so rows
+    are buffered as float32 until `fit_size` rows (or finalize()) fit them.
+    """
+
+    def __init__(self, storage: str = "float32", fit_size: int = 50000):
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown embedding storage '{storage}'. Options: {', '.join(STORAGE_TYPES)}")
+        self.storage = storage
+        self.fit_size = fit_size
+        code_dtype = {"float32": np.float32, "float16": np.float16, "int8": np.uint8}[storage]
+        self.codes = MatrixColumn(dtype=code_dtype)
+        self.offsets = None  # int8: per-dimension minimum
+        self.scales = None   # int8: per-dimension step size
+        self._pending: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return self.codes.size + sum(len(rows) for rows in self._pending)
+
+    @property
+    def dim(self):
+        return self.codes.dim or (self._pending[0].shape[1] if self._pending else None)
+
+    def extend(self, rows: np.ndarray):
+        rows = np.asarray(rows, dtype=np.float32)
+        if self.storage == "int8" and self.scales is None:
+            self._pending.append(rows)
+            if sum(len(r) for r in self._pending) >= self.fit_size:
+                self.finalize()
+            return
+        self.codes.extend(self._encode(rows))
+
+    def finalize(self):
+        """Fit int8 ranges on the buffered rows and encode them"""
+        if not self._pending:
+            return
+        rows = np.vstack(self._pending)
+        self._pending = []
+        self._fit(rows)
+        self.codes.extend(self._encode(rows))
+
+    def _fit(self, rows: np.ndarray):
+        low, high = rows.min(axis=0), rows.max(axis=0)
+        self.offsets = low.astype(np.float32)
+        self.scales = np.maximum(high - low, 1e-12).astype(np.float32) / 255.0
+
+    def _encode(self, rows: np.ndarray) -> np.ndarray:
+        if self.storage == "int8":
+            codes = np.rint((rows - self.offsets) / self.scales)
+            return np.clip(codes, 0, 255).astype(np.uint8)
+        return rows
+
+    def take(self, rows) -> np.ndarray:
+        """Decode rows (an index, slice or index array) to float32"""
+        codes = np.asarray(self.codes.values[rows])
+        if self.storage == "int8":
+            return codes.astype(np.float32) * self.scales + self.offsets
+        return codes.astype(np.float32)
+
+    @property
+    def values(self) -> np.ndarray:
+        """All rows decoded to float32"""
+        return self.take(slice(None)) if self.codes.size else None
+
+    def nbytes(self) -> int:
+        total = self.codes.values.nbytes if self.codes.size else 0
+        if self.scales is not None:
+            total += self.scales.nbytes + self.offsets.nbytes
+        return total
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / CODES_FILE, self.codes.values)
+        if self.scales is not None:
+            np.savez(path / QUANTIZER_FILE, offsets=self.offsets, scales=self.scales)
+        with open(path / META_FILE, "w") as f:
+            json.dump({"storage": self.storage}, f)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "QuantizedMatrix":
+        path = Path(path)
+        with open(path / META_FILE) as f:
+            matrix = cls(json.load(f)["storage"])
+        codes = np.load(path / CODES_FILE, mmap_mode="c" if mmap else None)
+        matrix.codes = MatrixColumn(dtype=codes.dtype, data=codes)
+        if (path / QUANTIZER_FILE).exists():
+            with np.load(path / QUANTIZER_FILE) as quantizer:
+                matrix.offsets, matrix.scales = quantizer["offsets"], quantizer["scales"]
+        return matrix
+
+
+def recall_at_k(exact: np.ndarray, approx: np.ndarray) -> float:
+    """Mean fraction of the exact top-k ids that the approximate search returned"""
+    if exact.size == 0:
+        return 1.0
+    hits = [len(set(e[e >= 0]) & set(a[a >= 0])) / max(1, (e >= 0).sum()) for e, a in zip(exact, approx)]
+    return float(np.mean(hits))
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, chunk_size: int = 65536) -> np.ndarray:
+    """Exact inner-product top-k ids, scanning `vectors` in chunks"""
+    k = min(k, len(vectors))
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        scores = queries @ vectors[start:start + chunk_size].T
+        ids = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+        scores = np.hstack([best_scores, scores])
+        ids = np.hstack([best_ids, ids])
+        top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    return best_ids
+
+
+def storage_report(float32_bytes: int, stored_bytes: int, index_bytes: int, recall: float, k: int,
+                   storage: str) -> Dict:
+    """
+    Memory of a compressed build against a float32 one. `float32_bytes` is
+    what a float32 index alone would hold; the compressed build holds the
+    stored embeddings plus the index, which is what `resident_bytes` and
+    `compression` count.
+    """
+    resident_bytes = stored_bytes + index_bytes
+    return {
+        "storage": storage,
+        "float32_bytes": float32_bytes,
+        "stored_bytes": stored_bytes,
+        "index_bytes": index_bytes,
+        "resident_bytes": resident_bytes,
+        "bytes_saved": float32_bytes - resident_bytes,
+        "compression": float32_bytes / resident_bytes if resident_bytes else 0.0,
+        f"recall@{k}": recall
+    }
@@ -0,0 +1,181 @@
+"""
+Scatter-gather FAISS index: catalog rows are partitioned across worker
+processes (row id modulo the shard count), each holding its own FAISS index
+and talking to the parent over a pipe. Queries are broadcast to every shard
+and the per-shard top-k lists are merged with a heap, so results have the
+same shape and scores as a single index.
+"""
+import os
+import heapq
+import threading
+import weakref
+import multiprocessing
+from itertools import islice
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.vectors.faiss_index import DEFAULT_INDEX_PARAMS, import_faiss, create_id_index, search_parameters
+
+
+def _shard_main(connection, shard: int, count: int, dim: int, index_type: str, params: Dict, n_train: int,
+                storage: str, threads: int):
+    """Worker loop: apply commands from the parent to this shard's index"""
+    faiss = import_faiss()
+    faiss.omp_set_num_threads(threads)
+    index = create_id_index(dim, index_type, params, n_train, storage)
+    while True:
+        try:
+            command, *args = connection.recv()
+        except EOFError:
+            return
+        if command == "close":
+            connection.send(("ok", None))
+            return
+        try:
+            if command == "search":
+                queries, k, packed, size = args
+                if index.ntotal == 0 or k <= 0:
+                    result = (np.empty((len(queries), 0), dtype=np.float32), np.empty((len(queries), 0), dtype=np.int64))
+                elif packed is None:
+                    result = index.search(queries, min(k, index.ntotal))
+                else:
+                    mask = np.zeros(size, dtype=bool)
+                    mask[shard::count] = np.unpackbits(packed, count=len(range(shard, size, count))).astype(bool)
+                    search_params, _bitmap = search_parameters(index, params, mask)
+                    result = index.search(queries, k, params=search_params)
+            elif command == "add":
+                vectors, ids = args
+                index.add_with_ids(vectors, ids)
+                result = index.ntotal
+            elif command == "train":
+                index.train(args[0])
+                result = None
+            elif command == "remove":
+                index.remove_ids(args[0])
+                result = index.ntotal
+            else:
+                raise ValueError(f"Unknown shard command '{command}'")
+            connection.send(("ok", result))
+        except Exception as e:
+            connection.send(("error", f"{type(e).__name__}: {e}"))
+
+
+def _shutdown(processes: List, connections: List):
+    for connection in connections:
+        try:
+            connection.send(("close",))
+        except (OSError, ValueError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for connection in connections:
+        connection.close()
+
+
+class ShardedIndex:
+    """
+    FAISS-compatible index (add_with_ids, train, remove_ids, search, ntotal)
+    spread over `shards` local worker processes. Searches take a boolean row
+    `mask` instead of FAISS search parameters, which cannot cross a process
+    boundary. Calls are serialized; each one runs on all shards in parallel.
+    """
+
+    def __init__(self, shards: int, dim: int, index_type: str = "flat", params: Dict = None, n_train: int = 0,
+                 storage: str = "float32"):
+        self.shards = max(1, int(shards))
+        self.dim = dim
+        self.params = dict(DEFAULT_INDEX_PARAMS, **(params or {}))
+        self._counts = [0] * self.shards
+        self._lock = threading.Lock()
+        # Spawned, not forked: the parent may be running search threads
+        context = multiprocessing.get_context("spawn")
+        threads = max(1, (os.cpu_count() or 1) // self.shards)
+        self._connections, self._processes = [], []
+        for shard in range(self.shards):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_shard_main, name=f"index-shard-{shard}", daemon=True,
+                args=(child, shard, self.shards, dim, index_type, self.params, n_train, storage, threads)
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self._finalizer = weakref.finalize(self, _shutdown, self._processes, self._connections)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(self._counts)
+
+    def _call(self, commands: Dict[int, tuple]) -> Dict[int, object]:
+        """Send one command per shard, then collect every reply; raises RuntimeError if a shard failed"""
+        with self._lock:
+            for shard, command in commands.items():
+                self._connections[shard].send(command)
+            replies = {}
+            for shard in commands:
+                try:
+                    replies[shard] = self._connections[shard].recv()
+                except EOFError:
+                    replies[shard] = ("error", "worker exited")
+        errors = [f"shard {shard}: {reply[1]}" for shard, reply in replies.items() if reply[0] == "error"]
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return {shard: reply[1] for shard, reply in replies.items()}
+
+    def _by_shard(self, ids: np.ndarray) -> Dict[int, np.ndarray]:
+        ids = np.asarray(ids, dtype=np.int64)
+        owners = ids % self.shards
+        return {shard: ids[owners == shard] for shard in range(self.shards) if (owners == shard).any()}
+
+    def train(self, vectors: np.ndarray):
+        """Every shard trains on the same sample, so their coarse quantizers agree"""
+        self._call({shard: ("train", vectors) for shard in range(self.shards)})
+
+    def add_with_ids(self, vectors: np.ndarray, ids: np.ndarray):
+        ids = np.asarray(ids, dtype=np.int64)
+        owners = ids % self.shards
+        commands = {}
+        for shard in range(self.shards):
+            selected = owners == shard
+            if selected.any():
+                commands[shard] = ("add", np.ascontiguousarray(vectors[selected]), ids[selected])
+        for shard, total in self._call(commands).items():
+            self._counts[shard] = total
+
+    def remove_ids(self, ids: np.ndarray):
+        for shard, total in self._call({shard: ("remove", rows) for shard, rows in self._by_shard(ids).items()}).items():
+            self._counts[shard] = total
+
+    def search(self, queries: np.ndarray, k: int, mask: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k (scores, ids) per query across all shards, like a FAISS search:
+        (len(queries), k) arrays, padded with -1 ids where fewer than k match.
+        With `mask`, only rows set in it are returned.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        commands = {}
+        for shard in range(self.shards):
+            packed = np.packbits(mask[shard::self.shards]) if mask is not None else None
+            commands[shard] = ("search", queries, k, packed, len(mask) if mask is not None else 0)
+        results = self._call(commands)
+
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        for query in range(len(queries)):
+            # Each shard's list is already sorted best-first
+            lists = [
+                [(score, row) for score, row in zip(shard_scores[query].tolist(), shard_ids[query].tolist()) if row != -1]
+                for shard_scores, shard_ids in results.values()
+            ]
+            merged = list(islice(heapq.merge(*lists, key=lambda hit: -hit[0]), k))
+            if merged:
+                scores[query, :len(merged)], indices[query, :len(merged)] = zip(*merged)
+        return scores, indices
+
+    def close(self):
+        """Stop the worker processes"""
+        self._finalizer()
@@ -0,0 +1,130 @@
+"""
+On-disk snapshots of (optionally quantized) embeddings, index and columnar
+catalog for VectorDatabase
+"""
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Optional, Callable
+
+from src.vectors.catalog import CatalogStore
+from src.vectors.quantization import QuantizedMatrix
+
+VECTORS_DIR = "vectors"
+CATALOG_DIR = "catalog"
+INDEX_FILE = "faiss.index"
+META_FILE = "meta.json"
+# Meta fields a snapshot must share with a newer one to be pruned by it
+PRUNE_MATCH_FIELDS = ("model", "db_type", "index_type", "index_params", "storage")
+
+
+def catalog_key(products: List[Dict], model_name: str, config: Dict = None) -> str:
+    """
+    Hash of the catalog contents, the embedding model name and the index
+    `config` (engine, its parameters, embedding storage), so a snapshot is
+    only reused by a database built the same way.
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(json.dumps(config or {}, sort_keys=True, default=str).encode("utf-8"))
+    for product in products:
+        digest.update(json.dumps(product, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+def stream_key(fingerprint: str, model_name: str, config: Dict = None) -> str:
+    """
+    catalog_key for a product stream, which cannot be hashed up front:
+    `fingerprint` identifies its source instead (for example
+    src.data.loader.catalog_fingerprint of the files it is read from).
+    """
+    return catalog_key([{"stream": fingerprint}], model_name, config)
+
+
+class SnapshotStore:
+    """Reads and writes keyed snapshots below a root directory"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / f"snapshot-{key}"
+
+    def exists(self, key: str) -> bool:
+        return (self.path_for(key) / META_FILE).exists()
+
+    def load(self, key: str) -> Optional[Dict]:
+        """
+        Load a snapshot, memory-mapping the embeddings and catalog columns.
+        Returns None if the snapshot is missing or unreadable.
+        """
+        path = self.path_for(key)
+        if not self.exists(key):
+            return None
+        try:
+            with open(path / META_FILE) as f:
+                meta = json.load(f)
+            catalog = CatalogStore.load(path / CATALOG_DIR)
+            vectors = QuantizedMatrix.load(path / VECTORS_DIR)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Could not read snapshot {path}: {e}")
+            return None
+
+        index_path = path / INDEX_FILE
+        return {
+            "meta": meta,
+            "vectors": vectors,
+            "catalog": catalog,
+            "index_path": index_path if index_path.exists() else None
+        }
+
+    def save(self, key: str, vectors: QuantizedMatrix, catalog: CatalogStore,
+             meta: Dict, write_index: Callable[[str], None] = None):
+        """
+        Write a snapshot atomically: files go to a temporary directory that is
+        renamed into place, then older snapshots built with the same model and
+        index settings (other catalogs) are removed. Snapshots of other
+        configurations sharing the directory are left alone.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        final_path = self.path_for(key)
+        tmp_path = self.root / f".tmp-{key}-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+
+        try:
+            vectors.save(tmp_path / VECTORS_DIR)
+            catalog.save(tmp_path / CATALOG_DIR)
+            if write_index is not None:
+                write_index(str(tmp_path / INDEX_FILE))
+            with open(tmp_path / META_FILE, "w") as f:
+                json.dump(dict(meta, key=key, count=len(catalog)), f)
+
+            shutil.rmtree(final_path, ignore_errors=True)
+            os.replace(tmp_path, final_path)
+        except OSError as e:
+            print(f"Warning: Could not write snapshot {final_path}: {e}")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+
+        self.prune(keep=key, match={field: meta.get(field) for field in PRUNE_MATCH_FIELDS})
+
+    def prune(self, keep: str, match: Dict = None):
+        """
+        Remove snapshots whose key differs from `keep`. With `match`, only
+        those whose meta has the same values for all of its fields.
+        """
+        for path in self.root.glob("snapshot-*"):
+            if path.name == self.path_for(keep).name:
+                continue
+            if match:
+                try:
+                    with open(path / META_FILE) as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if any(meta.get(field) != value for field, value in match.items()):
+                    continue
+            shutil.rmtree(path, ignore_errors=True)
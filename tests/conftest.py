@@ -0,0 +1,65 @@
+"""
+Shared fixtures. Tests use the dependency-free hashing embedder and FAISS,
+so they need neither a model download nor ChromaDB.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config.settings import SAMPLE_PRODUCTS
+from src.vectors.db import VectorDatabase
+
+
+def make_db(**kwargs) -> VectorDatabase:
+    """FAISS database with the hashing embedder and no snapshots unless given"""
+    options = dict(db_type="faiss", embedding_model="hashing", snapshot_dir=None, hybrid=False)
+    options.update(kwargs)
+    return VectorDatabase(**options)
+
+
+def ids(hits):
+    """Product ids of (product, score) search results"""
+    return [product["id"] for product, _score in hits]
+
+
+FILTER_PREFERENCES = [
+    {"budget_max": 200},
+    {"budget_min": 100, "budget_max": 500},
+    {"budget_max": -1},
+    {"categories": ["shoes"], "rating_min": 4.0},
+    {"features": ["wireless", "new-tag"]},
+    {"categories": ["electronics"], "features": ["bluetooth"], "budget_max": 300},
+]
+
+
+def assert_filters_agree(patched, fresh):
+    """A patched ProductFilter plans, selects and resolves ids like a fresh build"""
+    assert patched.size == fresh.size
+    assert {i for i, row in patched._overlay_ids.items() if row >= 0} <= fresh.row_of_id.keys()
+    for product_id, row in fresh.row_of_id.items():
+        assert patched.row_of(product_id) == row
+    rows = np.array(sorted(fresh.row_of_id.values()), dtype=np.int64)
+    for preferences in FILTER_PREFERENCES:
+        expected, got = fresh.plan(preferences), patched.plan(preferences)
+        assert (expected is None) == (got is None), preferences
+        if expected is not None:
+            assert np.array_equal(got.pop("mask"), expected.pop("mask")), preferences
+            assert got == expected
+        assert np.array_equal(patched.select(rows, preferences), fresh.select(rows, preferences)), preferences
+
+
+@pytest.fixture
+def products():
+    return [dict(product) for product in SAMPLE_PRODUCTS]
+
+
+@pytest.fixture
+def db(products):
+    database = make_db()
+    database.add_products(products)
+    return database
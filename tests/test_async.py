@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.agents.pipeline import RecommendationPipeline
+from src.agents.recommendation_agent import ProductRecommendationAgent
+from src.vectors.executor import BoundedExecutor
+from tests.conftest import ids, make_db
+
+QUERIES = ["wireless headphones", "gaming chair", "running shoes under 100", "desk lamp", "mechanical keyboard"]
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor(max_workers=4, max_in_flight=2, name="test-offload")
+    yield executor
+    executor.shutdown()
+
+
+def test_concurrent_asearch_matches_search(products, executor):
+    db = make_db(executor=executor)
+
+    async def main():
+        await db.aadd_products(products)
+        singles = asyncio.gather(*(db.asearch(query, 5, 0.0) for query in QUERIES))
+        many = db.asearch_many(QUERIES, 5, 0.0, chunk_size=2)
+        return await asyncio.gather(singles, many)
+
+    singles, many = asyncio.run(main())
+    assert db.catalog.live_count == len(products)
+    for query, single, batch in zip(QUERIES, singles, many):
+        expected = db.search(query, 5, 0.0)
+        assert ids(single) == ids(expected)
+        assert [score for _, score in single] == pytest.approx([score for _, score in expected])
+        assert ids(batch) == ids(db.search_many([query], 5, 0.0)[0])
+
+
+def test_arecommend_matches_run(db, executor):
+    pipeline = RecommendationPipeline(ProductRecommendationAgent(), db)
+
+    async def main():
+        return await asyncio.gather(*(pipeline.arecommend(query, 3, 0.0, executor=executor) for query in QUERIES))
+
+    for query, result in zip(QUERIES, asyncio.run(main())):
+        assert [p["id"] for p in result["products"]] == [p["id"] for p in pipeline.run(query, 3, 0.0)["products"]]
+
+
+def test_timeout_withdraws_a_call_that_has_not_started():
+    executor = BoundedExecutor(max_workers=1, max_in_flight=1, name="test-timeout")
+    release, started = threading.Event(), []
+
+    def blocked(label):
+        started.append(label)
+        release.wait(5)
+        return label
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(blocked, "running"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(blocked, "queued", timeout=0.05)  # Times out waiting for admission
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(asyncio.shield(running), 0.05)
+        release.set()
+        return await running
+
+    try:
+        assert asyncio.run(main()) == "running"
+        assert started == ["running"]
+    finally:
+        executor.shutdown()
+
+
+def test_cancelled_caller_never_runs():
+    executor = BoundedExecutor(max_workers=1, max_in_flight=1, name="test-cancel")
+    release, started = threading.Event(), []
+
+    def blocked(label):
+        started.append(label)
+        release.wait(5)
+
+    async def main():
+        first = asyncio.ensure_future(executor.run(blocked, "first"))
+        second = asyncio.ensure_future(executor.run(blocked, "second"))
+        await asyncio.sleep(0.05)
+        second.cancel()
+        release.set()
+        await first
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+    try:
+        asyncio.run(main())
+        assert started == ["first"]
+    finally:
+        executor.shutdown()
+
+
+def test_semaphore_caps_calls_in_flight():
+    executor = BoundedExecutor(max_workers=8, max_in_flight=2, name="test-cap")
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def work():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    async def main():
+        await asyncio.gather(*(executor.run(work) for _ in range(10)))
+
+    try:
+        asyncio.run(main())
+        assert peak[0] == 2
+    finally:
+        executor.shutdown()
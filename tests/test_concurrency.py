@@ -0,0 +1,79 @@
+import threading
+
+import numpy as np
+
+from benchmarks.synthetic import make_products
+from src.vectors.filters import ProductFilter
+from tests.conftest import assert_filters_agree, make_db
+
+
+def test_patched_filter_matches_a_fresh_build(db, products):
+    rng = np.random.default_rng(0)
+    for step in range(5):
+        changed = [dict(products[i], price=float(rng.uniform(1, 1000))) for i in rng.choice(len(products), 10)]
+        changed.append(dict(products[step], description=f"revised {step}", tags=[f"new-tag-{step}"]))
+        changed.append({"id": 10000 + step, "name": f"New product {step}", "tags": ["new-tag"]})
+        db.upsert_products(changed)
+        db.delete_products([products[20 + step]["id"]])
+
+        assert_filters_agree(db.product_filter, ProductFilter(db.catalog))
+
+
+def test_searches_during_rebuild(products):
+    db = make_db()
+    db.add_products(products)
+    replacement = make_products(3000, seed=7)
+    valid = {p["id"] for p in products} | {p["id"] for p in replacement}
+    errors, stop = [], threading.Event()
+
+    def search():
+        while not stop.is_set():
+            try:
+                for product, _score in db.search("wireless headphones under 200", 5, 0.0,
+                                                 {"budget_max": 200, "features": ["wireless"]}):
+                    assert product["id"] in valid
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    stats = db.rebuild(replacement).result(timeout=120)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert stats["products"] == len(replacement)
+    assert db.catalog.live_count == len(replacement)
+
+
+def test_searches_during_upserts(products):
+    db = make_db()
+    db.add_products(products)
+    valid = {p["id"] for p in products}
+    errors, stop = [], threading.Event()
+
+    def search():
+        while not stop.is_set():
+            try:
+                hits = db.search("shoes under 500", 10, 0.0, {"budget_max": 500, "categories": ["Shoes"]})
+                assert all(product["id"] in valid for product, _score in hits)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    rng = np.random.default_rng(3)
+    for step in range(50):
+        picked = [products[i] for i in rng.choice(len(products), 3, replace=False)]
+        db.upsert_products([dict(p, price=float(rng.uniform(1, 1000))) for p in picked])
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert_filters_agree(db.product_filter, ProductFilter(db.catalog))
@@ -0,0 +1,37 @@
+from benchmarks.synthetic import make_products
+from src.agents.pipeline import RecommendationPipeline
+from src.agents.recommendation_agent import ProductRecommendationAgent
+from tests.conftest import ids, make_db
+
+# Matches "zorvax gift" only through the rare brand term, not through its text overall
+KEYWORD_ONLY = {
+    "id": 99999, "name": "Zorvax Planter Set", "category": "Home", "price": 120.0, "rating": 4.0,
+    "description": "Sturdy garden planter kit with ceramic pots, soil scoop, drainage trays, "
+                   "watering can and seed starter cells for balcony herbs",
+    "tags": ["garden", "outdoor"],
+}
+
+
+def test_hybrid_scores_respect_threshold():
+    db = make_db(hybrid=True)
+    db.add_products(make_products(2000, seed=0))
+    assert all(score >= 0.6 for _, score in db.search("wireless running shoes", 10, 0.6))
+    assert db.search("wireless running shoes", 10, 0.99) == []
+
+
+def test_keyword_only_match_moves_up_in_the_pipeline():
+    products = make_products(2000, seed=0) + [KEYWORD_ONLY]
+    positions = {}
+    for hybrid in (False, True):
+        db = make_db(hybrid=hybrid)
+        db.add_products(products)
+        result = RecommendationPipeline(ProductRecommendationAgent(), db).run("zorvax gift", top_k=5, threshold=0.0)
+        ranked = [p["id"] for p in result["products"]]
+        positions[hybrid] = ranked.index(KEYWORD_ONLY["id"]) if KEYWORD_ONLY["id"] in ranked else None
+        if hybrid:
+            # The final order is the fused order, not the vector similarity order
+            assert ranked == ids(result["search_results"])[:len(ranked)]
+            by_similarity = sorted(result["search_results"], key=lambda hit: hit[1], reverse=True)
+            assert ids(by_similarity).index(KEYWORD_ONLY["id"]) > positions[True]
+    assert positions[False] is None
+    assert positions[True] is not None and positions[True] < 2
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from src.data.loader import catalog_fingerprint, iter_catalog, normalize_product
+from tests.conftest import ids, make_db
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (12, 12),
+    ("12", 12),
+    (" 9007199254740993 ", 9007199254740993),
+    (9007199254740993, 9007199254740993),
+    ("12.0", 12),
+])
+def test_normalize_product_parses_ids_exactly(raw, expected):
+    assert normalize_product({"id": raw, "name": "Widget"})["id"] == expected
+
+
+@pytest.mark.parametrize("raw", [None, "", "abc", "1.5", True, 2**63])
+def test_normalize_product_rejects_bad_ids(raw):
+    with pytest.raises(ValueError):
+        normalize_product({"id": raw, "name": "Widget"})
+
+
+def unread_stream():
+    raise AssertionError("the stream should not be read when its snapshot exists")
+    yield
+
+
+def test_stream_snapshot_is_keyed_on_its_files(tmp_path, products):
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("".join(json.dumps(p) + "\n" for p in products))
+    snapshots = tmp_path / "snapshots"
+
+    built = make_db(snapshot_dir=snapshots)
+    assert built.add_product_stream(iter_catalog([path]), fingerprint=catalog_fingerprint([path]))["source"] == "stream"
+    loaded = make_db(snapshot_dir=snapshots)
+    assert loaded.add_product_stream(unread_stream(), fingerprint=catalog_fingerprint([path]))["source"] == "snapshot"
+    assert loaded.catalog.live_count == len(products)
+    for query in ("wireless headphones", "gaming chair"):
+        assert ids(loaded.search(query, 5, 0.0)) == ids(built.search(query, 5, 0.0))
+
+    path.write_text("".join(json.dumps(p) + "\n" for p in products[:4]))
+    changed = make_db(snapshot_dir=snapshots)
+    assert changed.add_product_stream(iter_catalog([path]), fingerprint=catalog_fingerprint([path]))["source"] == "stream"
+    assert changed.catalog.live_count == 4
+
+
+def test_stream_without_fingerprint_is_not_snapshotted(tmp_path, products):
+    db = make_db(snapshot_dir=tmp_path)
+    assert db.add_product_stream(iter(products))["source"] == "stream"
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,43 @@
+import gc
+
+from src.monitoring.metrics import MetricsRegistry
+from src.vectors.cache import LRUCache
+
+
+def sample(registry: MetricsRegistry, family: str, cache: str) -> float:
+    prefix = f'{family}{{cache="{cache}"}} '
+    return next(float(line[len(prefix):]) for line in registry.render().splitlines() if line.startswith(prefix))
+
+
+def use(cache: LRUCache, hits: int, misses: int):
+    cache.put("key", 1)
+    for _ in range(hits):
+        cache.get("key")
+    for _ in range(misses):
+        cache.get("missing")
+
+
+def test_cache_counters_survive_collection():
+    registry = MetricsRegistry()
+    first, second = LRUCache(4), LRUCache(4)
+    registry.track_cache("query", first)
+    registry.track_cache("query", second)
+    registry.track_cache("query", first)  # Tracking twice does not count twice
+    use(first, hits=3, misses=2)
+    use(second, hits=1, misses=1)
+    assert sample(registry, "cache_hits_total", "query") == 4
+    assert sample(registry, "cache_entries", "query") == 2
+
+    del first
+    gc.collect()
+    assert sample(registry, "cache_hits_total", "query") == 4
+    assert sample(registry, "cache_misses_total", "query") == 3
+    assert sample(registry, "cache_entries", "query") == 1
+
+    del second
+    gc.collect()
+    third = LRUCache(4)
+    registry.track_cache("query", third)
+    use(third, hits=2, misses=0)
+    assert sample(registry, "cache_hits_total", "query") == 6
+    assert sample(registry, "cache_hit_ratio", "query") == 6 / 9
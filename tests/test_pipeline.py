@@ -0,0 +1,24 @@
+from src.agents.pipeline import STAGES, RecommendationPipeline
+from src.agents.recommendation_agent import ProductRecommendationAgent
+from tests.conftest import ids
+
+
+class DropFirstAgent(ProductRecommendationAgent):
+    """Filters out the best search result, so survivors and results no longer line up by position"""
+
+    def filter_products(self, products, preferences):
+        return products[1:]
+
+
+def test_ranking_uses_the_scores_of_the_filtered_products(db):
+    result = RecommendationPipeline(DropFirstAgent(), db).run("wireless headphones", top_k=5, threshold=0.0)
+    dropped = ids(result["search_results"])[0]
+    ranked = [p["id"] for p in result["products"]]
+    assert dropped not in ranked
+    assert ranked == ids(result["search_results"])[1:]
+
+
+def test_run_reports_every_stage(db):
+    result = RecommendationPipeline(ProductRecommendationAgent(), db).run("gaming chair", top_k=3)
+    assert set(result["timings"]) == set(STAGES) | {"total"}
+    assert 0 < len(result["products"]) <= 3
@@ -0,0 +1,154 @@
+import re
+from typing import Dict
+
+import pytest
+
+from src.agents.preferences import PreferenceExtractor
+
+
+def legacy_extract_preferences(user_query: str) -> Dict:
+    """extract_preferences as it was before PreferenceExtractor, kept verbatim as the reference"""
+    preferences = {
+        "budget_min": None,
+        "budget_max": None,
+        "categories": [],
+        "features": [],
+        "rating_min": 0,
+        "keywords": []
+    }
+
+    query_lower = user_query.lower()
+
+    # Extract numeric prices with improved pattern
+    # Check for "under X" pattern
+    under_match = re.search(r'under\s+\$?(\d+(?:\.\d{2})?)', query_lower)
+    if under_match:
+        preferences["budget_max"] = float(under_match.group(1))
+
+    # Check for "between X and Y" pattern
+    between_match = re.search(r'between\s+\$?(\d+(?:\.\d{2})?)\s+and\s+\$?(\d+(?:\.\d{2})?)', query_lower)
+    if between_match:
+        min_price = float(between_match.group(1))
+        max_price = float(between_match.group(2))
+        preferences["budget_min"] = min(min_price, max_price)
+        preferences["budget_max"] = max(min_price, max_price)
+
+    # Check for "X - Y" or "X to Y" pattern
+    range_match = re.search(r'\$(\d+(?:\.\d{2})?)\s*(?:to|-|and)\s*\$(\d+(?:\.\d{2})?)', query_lower)
+    if range_match and not between_match:
+        min_price = float(range_match.group(1))
+        max_price = float(range_match.group(2))
+        preferences["budget_min"] = min(min_price, max_price)
+        preferences["budget_max"] = max(min_price, max_price)
+
+    # Extract all numbers as potential prices
+    if not preferences["budget_max"]:
+        numbers = re.findall(r'\d+(?:\.\d{2})?', user_query)
+        if numbers:
+            nums = [float(n) for n in numbers]
+            # If single number > 20, assume it's a price limit
+            if len(nums) == 1 and nums[0] > 20:
+                # Check if it follows "under" or similar
+                if 'under' in query_lower or 'below' in query_lower or 'less' in query_lower:
+                    preferences["budget_max"] = nums[0]
+            # If multiple numbers, use as range
+            elif len(nums) >= 2:
+                preferences["budget_min"] = min(nums)
+                preferences["budget_max"] = max(nums)
+
+    # Extract features - expanded list
+    feature_keywords = {
+        "wireless": "wireless",
+        "wired": "wired",
+        "ergonomic": "ergonomic",
+        "gaming": "gaming",
+        "mechanical": "mechanical",
+        "portable": "portable",
+        "lightweight": "lightweight",
+        "noise-cancelling": "noise-cancelling",
+        "noise cancelling": "noise-cancelling",
+        "smart": "smart",
+        "waterproof": "waterproof",
+        "rgb": "rgb",
+        "professional": "professional",
+        "budget": "budget",
+        "premium": "premium"
+    }
+    for keyword, feature in feature_keywords.items():
+        if keyword in query_lower:
+            preferences["features"].append(feature)
+
+    # Extract categories
+    category_keywords = {
+        "electronics": "Electronics",
+        "furniture": "Furniture",
+        "home": "Home",
+        "shoes": "Shoes",
+        "chair": "Furniture",
+        "desk": "Furniture",
+        "monitor": "Electronics",
+        "keyboard": "Electronics",
+        "mouse": "Electronics",
+        "headphones": "Electronics",
+        "laptop": "Electronics",
+        "tablet": "Electronics",
+        "lamp": "Home",
+        "light": "Home",
+        "speaker": "Electronics"
+    }
+    for keyword, category in category_keywords.items():
+        if keyword in query_lower and category not in preferences["categories"]:
+            preferences["categories"].append(category)
+
+    # Extract main keywords for ranking
+    words = query_lower.split()
+    preferences["keywords"] = [w for w in words if len(w) > 3 and w not in ['under', 'over', 'with', 'that', 'this', 'from', 'between', 'and', 'the']]
+
+    return preferences
+
+
+QUERIES = [
+    "wireless headphones",
+    "Wireless Headphones UNDER $200",
+    "gaming chair under 150.50",
+    "desk lamp between 30 and 80",
+    "monitor between $500 and $200",
+    "$20 to $45 mouse",
+    "$99-$10 keyboard",
+    "speaker 35",
+    "speaker below 35",
+    "laptop less than 999 with 16 gb",
+    "headphones 2 4 8",
+    "noise-cancelling noise cancelling headphones",
+    "wired wireless mouse, ergonomic!",
+    "smart home light: lightweight, portable?",
+    "chair, desk & desk-chair for the home office",
+    "rgb mechanical keyboard (premium) or budget",
+    "smartphone tablet stand",
+    "lampshade for lamps",
+    "the best shoes with that sole from this brand",
+    "",
+    "   ",
+    "under",
+    "12.345 chairs",
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_extractor_matches_the_regex_and_keyword_extraction(query):
+    extractor = PreferenceExtractor()
+    expected = legacy_extract_preferences(query)
+    assert extractor.extract(query) == expected
+    assert extractor.extract(query) == expected  # Served from the cache
+
+
+def test_cached_preferences_are_not_shared_with_callers():
+    extractor = PreferenceExtractor()
+    query = "wireless gaming headphones under 100"
+    first = extractor.extract(query)
+    expected = legacy_extract_preferences(query)
+    first["features"].append("refurbished")
+    first["categories"].clear()
+    first["keywords"][0] = "changed"
+    first["budget_max"] = 1.0
+    assert extractor.extract(query) == expected
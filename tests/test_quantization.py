@@ -0,0 +1,22 @@
+import pytest
+
+from tests.conftest import ids, make_db
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_quantization_report_counts_the_index(products, storage):
+    db = make_db(storage=storage)
+    db.add_products(products)
+    report = db.quantization_stats
+    assert report["resident_bytes"] == report["stored_bytes"] + report["index_bytes"]
+    assert report["compression"] == pytest.approx(report["float32_bytes"] / report["resident_bytes"])
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_quantized_search_keeps_the_float32_top_hit(products, storage):
+    exact, quantized = make_db(), make_db(storage=storage)
+    exact.add_products(products)
+    quantized.add_products(products)
+    for query in ("wireless headphones", "running shoes", "gaming chair"):
+        assert ids(quantized.search(query, 1, 0.0)) == ids(exact.search(query, 1, 0.0))
+    assert quantized.quantization_stats["compression"] > 1.0
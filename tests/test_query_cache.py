@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.vectors.embedders import HashingEmbedder
+from tests.conftest import make_db
+
+
+class CasedEmbedder(HashingEmbedder):
+    """Hashing embedder that records its input and keeps letter case"""
+
+    uncased = False
+
+    def __init__(self):
+        super().__init__(dim=64)
+        self.seen = []
+
+    def encode_batch(self, texts, batch_size=32):
+        self.seen.extend(texts)
+        marked = [text + " capitalized" if text != text.lower() else text for text in texts]
+        return super().encode_batch(marked, batch_size)
+
+
+def test_model_sees_the_original_query():
+    embedder = CasedEmbedder()
+    db = make_db(embedding_model=embedder)
+    db.encode_query("Running  Shoes")
+    db.encode_queries(["Wireless Headphones", "wireless   headphones"])
+    assert "Running  Shoes" in embedder.seen
+    assert "running shoes" not in embedder.seen
+    assert set(embedder.seen) >= {"Wireless Headphones", "wireless   headphones"}
+
+
+def test_cased_embedder_keeps_case_variants_apart():
+    db = make_db(embedding_model=CasedEmbedder())
+    title, lower = db.encode_query("Running Shoes"), db.encode_query("running shoes")
+    assert not np.array_equal(title, lower)
+    assert np.array_equal(db.encode_query("Running   Shoes"), title)
+
+
+def test_uncased_embedder_shares_cache_entries():
+    db = make_db()
+    first = db.encode_query("Running  Shoes")
+    assert db.encode_query("running shoes") is first
+    assert np.array_equal(first, db.embedder.encode("Running  Shoes"))
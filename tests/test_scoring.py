@@ -0,0 +1,67 @@
+import pytest
+
+from benchmarks.synthetic import make_products, make_queries
+from src.agents import scoring
+from src.agents.recommendation_agent import ProductRecommendationAgent
+from src.agents.scoring import RankingEngine
+
+EDGE_PRODUCTS = [
+    {"id": 1, "name": "Wireless Headphones", "category": "Electronics", "price": 99.0, "rating": 4.5,
+     "description": "Noise cancelling wireless headphones", "tags": ["wireless", "audio"]},
+    # Same scoring fields as id 1: every query ties them, and the input order must win
+    {"id": 2, "name": "Wireless Headphones", "category": "Electronics", "price": 99.0, "rating": 4.5,
+     "description": "Noise cancelling wireless headphones", "tags": ["wireless", "audio"]},
+    {"id": 3, "name": "Budget Earbuds", "category": "Electronics", "price": 0.0, "rating": 0.0,
+     "description": "", "tags": []},
+    {"id": 4, "name": "Mystery Gadget"},  # No price, rating, category, description or tags
+    {"id": 5, "name": "Running Shoes", "category": "Shoes", "price": 250.0,
+     "description": "Lightweight trail shoes", "tags": ["sport", "running"]},
+    {"id": 6, "name": "wireless headphones", "category": "Electronics", "rating": 3.0,
+     "tags": ["Wireless"]},
+]
+
+EDGE_CASES = [
+    ("wireless headphones", None),
+    ("Wireless Headphones", {"keywords": ["wireless", "headphones"]}),
+    ("cheap earbuds under 100", {"keywords": ["cheap", "earbuds"], "budget_max": 100}),
+    ("shoes", {"keywords": ["shoes", "trail"], "categories": ["Shoes"], "budget_max": 300}),
+    ("gadget", {"keywords": ["noise cancelling", "audio"], "budget_max": 0}),
+    ("anything", {"keywords": [], "categories": ["Electronics", "Missing"], "budget_max": -5}),
+]
+
+
+def reference_rank(products, query, preferences, top_k=None):
+    """The per-product loop rank_products falls back to without a RankingEngine"""
+    return ProductRecommendationAgent().rank_products(products, query, preferences=preferences, top_k=top_k)
+
+
+def ranked_ids(products):
+    return [p["id"] for p in products]
+
+
+@pytest.mark.parametrize("query, preferences", EDGE_CASES)
+@pytest.mark.parametrize("top_k", [None, 1, 3])
+def test_ranking_engine_matches_the_loop_on_edge_cases(query, preferences, top_k):
+    engine = RankingEngine.from_products(EDGE_PRODUCTS)
+    expected = reference_rank(EDGE_PRODUCTS, query, preferences, top_k)
+    assert ranked_ids(engine.rank(EDGE_PRODUCTS, query, preferences, top_k)) == ranked_ids(expected)
+
+
+@pytest.mark.parametrize("direct_scan_limit", [scoring.DIRECT_SCAN_LIMIT, 0])
+def test_ranking_engine_matches_the_loop_on_a_catalog(monkeypatch, direct_scan_limit):
+    # A zero limit sends every candidate list through the token and tag indexes
+    monkeypatch.setattr(scoring, "DIRECT_SCAN_LIMIT", direct_scan_limit)
+    products = make_products(1500, seed=5)
+    engine = RankingEngine.from_products(products)
+    agent = ProductRecommendationAgent()
+    for query in make_queries(25, seed=2):
+        preferences = agent.extract_preferences(query)
+        candidates = products[::3]
+        for top_k in (None, 10):
+            expected = reference_rank(candidates, query, preferences, top_k)
+            assert ranked_ids(engine.rank(candidates, query, preferences, top_k)) == ranked_ids(expected), query
+
+
+def test_ranking_engine_defers_unknown_products():
+    engine = RankingEngine.from_products(EDGE_PRODUCTS)
+    assert engine.rank(EDGE_PRODUCTS + [{"id": 99, "name": "New"}], "new") is None
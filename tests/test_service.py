@@ -0,0 +1,97 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config.settings import SERVICE_MAX_TOP_K
+from src.service.batcher import MicroBatcher
+from src.service.server import RecommendationService, create_server
+
+
+@pytest.fixture
+def service_url(db):
+    service = RecommendationService(db, max_batch_size=1)
+    server = create_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def post(url: str, payload) -> tuple:
+    request = urllib.request.Request(url + "/recommend", data=json.dumps(payload).encode("utf-8"), method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_recommend(service_url):
+    status, body = post(service_url, {"query": "gaming chair", "top_k": 3})
+    assert status == 200
+    assert 0 < len(body["products"]) <= 3
+
+
+@pytest.mark.parametrize("payload", [
+    {},
+    {"query": "shoes", "top_k": -1},
+    {"query": "shoes", "top_k": 0},
+    {"query": "shoes", "top_k": SERVICE_MAX_TOP_K + 1},
+    {"query": "shoes", "top_k": "many"},
+    {"query": "shoes", "threshold": "nan"},
+    {"query": "shoes", "threshold": "inf"},
+])
+def test_recommend_rejects_bad_parameters(service_url, payload):
+    status, body = post(service_url, payload)
+    assert status == 400
+    assert "error" in body
+
+
+def test_micro_batcher_batches_concurrent_items():
+    sizes = []
+
+    def double(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, window_ms=200, max_batch_size=4)
+    try:
+        futures = [batcher.submit(i) for i in range(6)]
+        assert [future.result(timeout=5) for future in futures] == [0, 2, 4, 6, 8, 10]
+    finally:
+        batcher.close()
+    assert sizes == [4, 2]
+
+
+def test_micro_batcher_fails_every_item_of_a_failed_batch():
+    def broken(items):
+        return items[:-1]
+
+    batcher = MicroBatcher(broken, window_ms=100, max_batch_size=8)
+    try:
+        futures = [batcher.submit(i) for i in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+    finally:
+        batcher.close()
+
+
+def test_batched_service_matches_unbatched(db):
+    batched = RecommendationService(db, max_batch_size=8, window_ms=20)
+    single = RecommendationService(db, max_batch_size=1)
+    queries = ["gaming chair", "wireless headphones under 200", "running shoes"]
+    try:
+        with ThreadPoolExecutor(len(queries)) as pool:
+            results = list(pool.map(batched.recommend, queries))
+        for query, result in zip(queries, results):
+            expected = single.recommend(query)
+            assert [p["id"] for p in result["products"]] == [p["id"] for p in expected["products"]]
+    finally:
+        batched.close()
+        single.close()
@@ -0,0 +1,25 @@
+import pytest
+
+from benchmarks.synthetic import make_products, make_queries
+from src.agents.recommendation_agent import ProductRecommendationAgent
+from tests.conftest import ids, make_db
+
+
+def test_sharded_flat_matches_unsharded():
+    products = make_products(2000, seed=3)
+    single, sharded = make_db(), make_db(shards=2)
+    single.add_products(products)
+    sharded.add_products(products)
+    agent = ProductRecommendationAgent()
+    try:
+        for query in make_queries(20, seed=1):
+            for preferences in (None, agent.extract_preferences(query)):
+                expected = single.search(query, 10, 0.0, preferences)
+                got = sharded.search(query, 10, 0.0, preferences)
+                # Equal scores may come back in either order
+                assert [score for _, score in got] == pytest.approx([score for _, score in expected], abs=1e-6)
+                scores = [score for _, score in expected]
+                unique = [i for i, score in enumerate(scores) if scores.count(score) == 1]
+                assert [ids(got)[i] for i in unique] == [ids(expected)[i] for i in unique]
+    finally:
+        sharded.index.close()
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from src.data.loader import catalog_fingerprint, iter_catalog
+from src.vectors import db as db_module
+from src.vectors.db import get_shared_database
+
+OPTIONS = dict(db_type="faiss", embedding_model="hashing", snapshot_dir=None, hybrid=False)
+
+
+@pytest.fixture(autouse=True)
+def no_shared_databases(monkeypatch):
+    monkeypatch.setattr(db_module, "_shared_databases", {})
+
+
+def test_same_catalog_shares_one_database(products):
+    first = get_shared_database(products, **OPTIONS)
+    assert get_shared_database([dict(p) for p in products], **OPTIONS) is first
+
+
+def test_different_catalog_gets_its_own_database(products):
+    first = get_shared_database(products, **OPTIONS)
+    second = get_shared_database(products[:5], **OPTIONS)
+    assert second is not first
+    assert second.catalog.live_count == 5
+    assert first.catalog.live_count == len(products)
+
+
+def test_stream_is_keyed_on_its_files(tmp_path, products):
+    path = tmp_path / "catalog.jsonl"
+    path.write_text("".join(json.dumps(p) + "\n" for p in products))
+    first = get_shared_database(iter_catalog([path]), fingerprint=catalog_fingerprint([path]), **OPTIONS)
+    assert get_shared_database(iter_catalog([path]), fingerprint=catalog_fingerprint([path]), **OPTIONS) is first
+
+    path.write_text("".join(json.dumps(p) + "\n" for p in products[:3]))
+    changed = get_shared_database(iter_catalog([path]), fingerprint=catalog_fingerprint([path]), **OPTIONS)
+    assert changed is not first
+    assert changed.catalog.live_count == 3
+
+
+def test_stream_without_fingerprint_is_rejected(products):
+    with pytest.raises(ValueError):
+        get_shared_database(iter(products), **OPTIONS)
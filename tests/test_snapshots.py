@@ -0,0 +1,23 @@
+import pytest
+
+from tests.conftest import ids, make_db
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf"])
+def test_snapshot_round_trip(tmp_path, products, index_type):
+    built = make_db(snapshot_dir=tmp_path, index_type=index_type)
+    assert built.add_products(products)["source"] == "model"
+    loaded = make_db(snapshot_dir=tmp_path, index_type=index_type)
+    assert loaded.add_products(products)["source"] == "snapshot"
+
+    for query in ("gaming chair", "wireless headphones", "running shoes"):
+        assert ids(loaded.search(query, 10, 0.0)) == ids(built.search(query, 10, 0.0))
+    assert loaded.vectors.take(slice(None)).shape == built.vectors.take(slice(None)).shape
+
+
+def test_snapshot_is_keyed_on_index_settings(tmp_path, products):
+    make_db(snapshot_dir=tmp_path, index_type="flat").add_products(products)
+    assert make_db(snapshot_dir=tmp_path, index_type="hnsw").add_products(products)["source"] == "model"
+    assert make_db(snapshot_dir=tmp_path, storage="int8").add_products(products)["source"] == "model"
+    # Neither build pruned the other configurations' snapshots
+    assert make_db(snapshot_dir=tmp_path, index_type="flat").add_products(products)["source"] == "snapshot"
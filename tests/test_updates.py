@@ -0,0 +1,103 @@
+import itertools
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks.synthetic import make_products
+from src.agents.recommendation_agent import ProductRecommendationAgent
+from src.vectors import filters
+from src.vectors.catalog import CatalogStore
+from src.vectors.db import VectorDatabase
+from src.vectors.filters import ProductFilter, chroma_where
+from tests.conftest import assert_filters_agree, ids, make_db
+
+
+def test_upsert_and_delete_reach_filtered_search(db, products):
+    agent = ProductRecommendationAgent(filter_index=lambda: db.product_filter)
+    preferences = agent.extract_preferences("shoes under 500")
+    shoe = next(p for p in products if p["category"] == "Shoes" and p.get("price", 0) < 500)
+    assert shoe["id"] in ids(db.search("shoes", 50, 0.0, preferences))
+    assert shoe["id"] in [p["id"] for p in agent.filter_products(products, preferences)]
+
+    db.upsert_products([dict(shoe, price=900.0)])
+    assert shoe["id"] not in ids(db.search("shoes", 50, 0.0, preferences))
+    # The agent looks the filter up per call, so it sees the new price too
+    repriced = [dict(p, price=900.0) if p["id"] == shoe["id"] else p for p in products]
+    assert shoe["id"] not in [p["id"] for p in agent.filter_products(repriced, preferences)]
+
+    other = next(p for p in products if p["category"] == "Shoes" and p["id"] != shoe["id"])
+    assert db.delete_products([other["id"]]) == 1
+    assert other["id"] not in ids(db.search("shoes", 50, 0.0, preferences))
+    assert other["id"] not in ids(db.search("shoes", 200, 0.0))
+
+
+def test_overlay_filter_matches_a_fresh_build(monkeypatch):
+    # A small overlay limit so the walk crosses several folds
+    monkeypatch.setattr(filters, "OVERLAY_MIN_ROWS", 40)
+    db = make_db()
+    products = make_products(500, seed=2)
+    db.add_products(products)
+    rng = np.random.default_rng(1)
+    next_id = 10_000
+    for step in range(30):
+        picked = [products[i] for i in rng.choice(len(products), 5, replace=False)]
+        changed = [dict(p, price=float(rng.uniform(-10, 1000))) for p in picked[:2]]
+        changed.append({k: v for k, v in picked[2].items() if k != "price"})
+        changed.append(dict(picked[3], rating=float(rng.uniform(0, 5)), category="Shoes"))
+        changed.append(dict(picked[4], description=f"revised {step}", tags=["new-tag", "wireless"]))
+        changed.append({"id": next_id, "name": f"New product {step}", "tags": ["new-tag"], "price": 150.0})
+        next_id += 1
+        db.upsert_products(changed)
+        db.delete_products([int(rng.choice([p["id"] for p in products]))])
+        assert_filters_agree(db.product_filter, ProductFilter(db.catalog))
+
+
+def test_small_upsert_shares_the_base_columns(db, products):
+    before = db.product_filter
+    db.upsert_products([dict(products[0], price=1.0)])
+    after = db.product_filter
+    assert after is not before
+    assert all(a is b for a, b in zip(after._base, before._base))
+    assert after.row_of_id is before.row_of_id
+    assert before.select(before.rows_of(products[:1]), {"budget_max": 0.5}).tolist() == [False]
+    assert after.select(after.rows_of(products[:1]), {"budget_max": 1.5}).tolist() == [True]
+
+
+def matches(metadata: dict, where: dict) -> bool:
+    """Evaluate the subset of Chroma `where` syntax that chroma_where emits"""
+    if "$and" in where:
+        return all(matches(metadata, clause) for clause in where["$and"])
+    if "$or" in where:
+        return any(matches(metadata, clause) for clause in where["$or"])
+    (key, condition), = where.items()
+    if key not in metadata:
+        return False
+    if not isinstance(condition, dict):
+        return metadata[key] == condition
+    (operator, value), = condition.items()
+    if operator == "$in":
+        return metadata[key] in value
+    return metadata[key] >= value if operator == "$gte" else metadata[key] <= value
+
+
+def test_chroma_where_matches_product_filter_for_missing_prices():
+    prices = [None, 0.0, 10.0, 50.0, 100.0, None]
+    products = [
+        dict({"id": i, "name": f"Product {i}", "category": "Shoes", "tags": ["sport"], "rating": 4.0},
+             **({"price": price} if price is not None else {}))
+        for i, price in enumerate(prices)
+    ]
+    catalog = CatalogStore.from_products(products)
+    product_filter = ProductFilter(catalog)
+    state = SimpleNamespace(catalog=catalog)
+    metadatas = [VectorDatabase._chroma_metadata(None, state, row) for row in range(len(products))]
+
+    for budget_min, budget_max in itertools.product([None, 0, 20], [None, 0, 60]):
+        plan = product_filter.plan({"budget_min": budget_min, "budget_max": budget_max})
+        if plan is None:
+            continue
+        where = chroma_where(plan)
+        selected = np.array([matches(metadata, where) for metadata in metadatas])
+        assert np.array_equal(selected, plan["mask"]), (budget_min, budget_max)
+
+
@@ -66,6 +66,7 @@ def test_filtering():
     print_header("PRODUCT FILTERING TESTS")
     
     agent = ProductRecommendationAgent()
+    agent.index_catalog(SAMPLE_PRODUCTS)
     
     # Test 1: Price filtering
     print("\nTest 1: Shoes under $500")
@@ -112,7 +113,7 @@ def test_ranking():
         print(f"\nQuery: '{query}' (Top {top_k})")
         
         prefs = agent.extract_preferences(query)
-        results = vector_db.search(query, top_k=top_k*2)
+        results = vector_db.search(query, top_k=top_k, preferences=prefs)
         products = [p for p, _ in results]
         filtered = agent.filter_products(products, prefs)
         ranked = agent.rank_products(filtered, query, 